@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import json
+import time
+from typing import Any, Dict, Optional
+
+# --- CONTROL DE ADMISIÓN Y DESCARTE DE CARGA ---
+# Ante un pico de tráfico, cada petición se convierte en un hilo bloqueado
+# esperando a SQLite y la latencia crece sin límite. Este middleware limita
+# cuántas peticiones se atienden a la vez por tipo (lecturas, escrituras y
+# endpoints costosos), deja esperar a unas cuantas en una cola acotada con
+# plazo máximo, y al resto le responde 503 de inmediato con Retry-After.
+
+# Límites por defecto: (concurrencia, tamaño de cola, segundos máx. en cola, Retry-After).
+# La suma de concurrencias (36) queda por debajo de los 40 hilos del threadpool
+# de Starlette, así que los endpoints síncronos nunca esperan por un hilo.
+DEFAULT_POOLS = {
+    "lecturas": (24, 64, 2.0, 1),
+    "escrituras": (8, 32, 5.0, 2),
+    "costosas": (4, 16, 3.0, 5),
+}
+
+# Rutas que consideramos costosas (agregaciones sobre tablas completas).
+RUTAS_COSTOSAS = ("/api/estadisticas",)
+
+
+class AdmissionPool:
+    """Semáforo con cola acotada y plazo de espera para una clase de peticiones."""
+
+    def __init__(self, nombre: str, limite: int, max_cola: int, plazo: float, retry_after: int):
+        self.nombre = nombre
+        self.limite = limite
+        self.max_cola = max_cola
+        self.plazo = plazo
+        self.retry_after = retry_after
+        self._sem = asyncio.Semaphore(limite)
+        # Métricas
+        self.en_curso = 0
+        self.en_cola = 0
+        self.admitidas = 0
+        self.rechazadas = 0   # Cola llena: 503 inmediato
+        self.vencidas = 0     # Se agotó el plazo esperando en la cola
+        self.encoladas = 0    # Peticiones que tuvieron que esperar en la cola
+        self.espera_total = 0.0
+
+    @property
+    def saturado(self) -> bool:
+        return self.en_cola >= self.max_cola
+
+    async def acquire(self) -> Optional[str]:
+        """
+        Intenta admitir una petición. Devuelve None si fue admitida
+        (hay que llamar a release() al terminar) o el motivo del rechazo.
+        """
+        if not self._sem.locked():
+            await self._sem.acquire()
+        else:
+            if self.saturado:
+                self.rechazadas += 1
+                return "cola llena"
+            self.en_cola += 1
+            self.encoladas += 1
+            inicio = time.monotonic()
+            try:
+                await asyncio.wait_for(self._sem.acquire(), timeout=self.plazo)
+            except asyncio.TimeoutError:
+                self.vencidas += 1
+                return "tiempo de espera agotado"
+            finally:
+                self.en_cola -= 1
+                self.espera_total += time.monotonic() - inicio
+        self.en_curso += 1
+        self.admitidas += 1
+        return None
+
+    def release(self) -> None:
+        self.en_curso -= 1
+        self._sem.release()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "limite": self.limite,
+            "max_cola": self.max_cola,
+            "en_curso": self.en_curso,
+            "en_cola": self.en_cola,
+            "admitidas": self.admitidas,
+            "rechazadas": self.rechazadas,
+            "vencidas": self.vencidas,
+            "encoladas": self.encoladas,
+            "espera_promedio_cola_ms": round(self.espera_total / self.encoladas * 1000, 3) if self.encoladas else 0.0,
+        }
+
+
+class AdmissionController:
+    """Agrupa los pools y decide a cuál pertenece cada petición."""
+
+    def __init__(self, pools: Optional[Dict[str, tuple]] = None):
+        self.pools = {
+            nombre: AdmissionPool(nombre, *config)
+            for nombre, config in (pools or DEFAULT_POOLS).items()
+        }
+
+    def classify(self, method: str, path: str) -> Optional[AdmissionPool]:
+        """Devuelve el pool de la petición, o None si no pasa por control de admisión."""
+        if not path.startswith("/api/"):
+            return None  # /health, /metrics, /docs, estáticos...
+        if path.startswith(RUTAS_COSTOSAS):
+            return self.pools["costosas"]
+        if method in ("GET", "HEAD", "OPTIONS"):
+            return self.pools["lecturas"]
+        return self.pools["escrituras"]
+
+    @property
+    def saturado(self) -> bool:
+        return any(pool.saturado for pool in self.pools.values())
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {nombre: pool.snapshot() for nombre, pool in self.pools.items()}
+
+
+class AdmissionMiddleware:
+    """Middleware ASGI que aplica el AdmissionController a las peticiones HTTP."""
+
+    def __init__(self, app, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        pool = self.controller.classify(scope["method"], scope["path"])
+        if pool is None:
+            return await self.app(scope, receive, send)
+
+        motivo = await pool.acquire()
+        if motivo is not None:
+            return await self._reject(send, pool, motivo)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            pool.release()
+
+    async def _reject(self, send, pool: AdmissionPool, motivo: str) -> None:
+        body = json.dumps({"detail": f"Servicio saturado ({pool.nombre}: {motivo}). Intenta de nuevo más tarde."}).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(pool.retry_after).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
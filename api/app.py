@@ -1,5 +1,10 @@
 # --- Importaciones Principales ---
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from typing import Optional
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn  # Importamos uvicorn para poder correr el servidor directamente
 
@@ -8,13 +13,15 @@ import uvicorn  # Importamos uvicorn para poder correr el servidor directamente
 from . import routes_artistas
 from . import routes_conciertos
 from . import routes_stats # ¡IMPORTANTE! Asegúrate de que esta línea esté descomentada
-
-# --- Creación de la Aplicación FastAPI ---
-app = FastAPI(
-    title="API de Plataforma de Conciertos",
-    description="API para gestionar artistas y conciertos para el proyecto de Desarrollo Web.",
-    version="1.0.0",
-)
+from . import routes_venues
+from . import routes_cambios
+from . import routes_admin
+from . import models
+from .admission import AdmissionController, AdmissionMiddleware
+from .coalescing import request_coalescer
+from .static_files import PrecompressedStaticFiles
+from .settings import Settings, get_settings, TMPFS
+from . import init_db
 
 # --- Configuración de CORS ---
 origins = [
@@ -24,31 +31,141 @@ origins = [
     "http://127.0.0.1:5501",
 ]
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=origins,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-# --- Endpoint de Salud (Health Check) ---
-@app.get("/health", tags=["Health Check"])
-def health_check():
+# --- Fábrica de la Aplicación ---
+def create_app(settings: Optional[Settings] = None) -> FastAPI:
     """
-    Endpoint simple para verificar que la API está
-    funcionando correctamente.
+    Crea la aplicación con la configuración indicada (por defecto la del
+    entorno, ver settings.py). Ej. para una prueba de carga sin disco:
+        app = create_app(Settings.memory("prueba"))
+    La configuración se activa al arrancar la app (lifespan), no al crearla.
+    Solo hay una configuración activa por proceso: arrancar una app con otra
+    configuración mientras otra sigue en marcha lanza RuntimeError.
     """
-    return {"status": "ok", "message": "API de Conciertos funcionando."}
+    settings = settings or get_settings()
+
+    # --- Ciclo de Vida (Lifespan) ---
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        """
+        Se ejecuta al arrancar y al apagar la aplicación.
+        Al arrancar, activa la configuración de la app (models.acquire_config).
+        La primera app que la usa crea la BD si es desechable (memoria o
+        tmpfs) y arranca el difusor del dashboard y el snapshot; después se
+        pone al día el schema de una BD existente (init_db.migrate_db) y se
+        ejecuta la fase de calentamiento (warmup) ANTES de aceptar tráfico.
+        Si falla, la app arranca igual pero /health reporta 503.
+        Al apagar la última app con esta configuración, se vacía la cola de
+        escritura para no perder operaciones pendientes y se borra la BD
+        desechable de tmpfs.
+        """
+        app.state.ready = False
+        primera = models.acquire_config(settings)
+        if primera:
+            if settings.should_bootstrap:
+                await asyncio.to_thread(init_db.init_db, settings)
+                await asyncio.to_thread(init_db.seed_db, settings)
+            # El dashboard en vivo se entera de cada escritura confirmada.
+            routes_stats.stats_broadcaster.start()
+            models.add_change_listener(routes_stats.stats_broadcaster.notify)
+        try:
+            await asyncio.to_thread(init_db.migrate_db, settings)
+            if primera:
+                await asyncio.to_thread(models.start_stats_snapshot)
+            await asyncio.to_thread(models.warmup)
+            app.state.ready = True
+        except Exception as e:
+            print(f"❌ Warmup fallido, /health reportará 503: {e}")
+        yield
+        app.state.ready = False
+        if models.release_config():
+            models.remove_change_listener(routes_stats.stats_broadcaster.notify)
+            routes_stats.stats_broadcaster.stop()
+            models.stop_stats_snapshot()
+            models.shutdown_writer()
+            if settings.should_bootstrap and settings.db_path == TMPFS:
+                await asyncio.to_thread(init_db.remove_db, settings)
+
+    # --- Creación de la Aplicación FastAPI ---
+    app = FastAPI(
+        title="API de Plataforma de Conciertos",
+        description="API para gestionar artistas y conciertos para el proyecto de Desarrollo Web.",
+        version="1.0.0",
+        lifespan=lifespan,
+    )
+    app.state.settings = settings
+
+    # --- Control de Admisión ---
+    # Limita la concurrencia por tipo de petición (lecturas, escrituras, costosas)
+    # y responde 503 + Retry-After cuando las colas se llenan. Se registra antes
+    # que CORS para que CORS quede por fuera y también decore las respuestas 503.
+    admission_controller = AdmissionController()
+    app.state.admission_controller = admission_controller
+    app.add_middleware(AdmissionMiddleware, controller=admission_controller)
+
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=origins,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    # --- Endpoint de Salud (Health Check) ---
+    @app.get("/health", tags=["Health Check"])
+    def health_check():
+        """
+        Sonda de disponibilidad (readiness): responde 503 hasta que termina el
+        warmup y mientras la base de datos no sea accesible.
+        """
+        if not getattr(app.state, "ready", False):
+            return JSONResponse(status_code=503, content={"status": "starting", "message": "API en fase de calentamiento."})
+        if not models.ping_db():
+            return JSONResponse(status_code=503, content={"status": "error", "message": "Base de datos no disponible."})
+        if admission_controller.saturado:
+            return JSONResponse(status_code=503, headers={"Retry-After": "1"},
+                                content={"status": "saturado", "message": "API saturada, descartando carga."})
+        return {"status": "ok", "message": "API de Conciertos funcionando."}
+
+    # --- Endpoint de Métricas ---
+    @app.get("/metrics", tags=["Health Check"])
+    def metrics():
+        """
+        Métricas internas: peticiones en curso, en cola, admitidas y rechazadas
+        por cada pool del control de admisión, peticiones GET coalescidas,
+        tasa de aciertos/memoria de la caché de artistas y de la caché de
+        conteos del listado de conciertos.
+        """
+        return {
+            "admision": admission_controller.snapshot(),
+            "coalescencia": request_coalescer.snapshot(),
+            "cache_artistas": models.artist_cache.snapshot(),
+            "conteos_conciertos": models.conteo_conciertos.snapshot(),
+        }
+
+    # --- Conexión de Rutas (Routers) ---
+    # Incluimos los routers en la aplicación principal.
+    app.include_router(routes_artistas.router)
+    app.include_router(routes_conciertos.router)
+    app.include_router(routes_stats.router) # ¡IMPORTANTE! Asegúrate de que esta línea esté descomentada
+    app.include_router(routes_stats.ws_router)
+    app.include_router(routes_venues.router)
+    app.include_router(routes_cambios.router)
+    app.include_router(routes_admin.router)
+
+    # --- Frontend (mismo origen) ---
+    # Si existe el build del frontend (python -m api.build_frontend), la API lo
+    # sirve en "/": las páginas llaman a /api/... en su propio origen, sin CORS.
+    # Se monta al final para que todas las rutas anteriores tengan prioridad.
+    if os.path.isdir(settings.frontend_dir):
+        app.mount("/", PrecompressedStaticFiles(directory=settings.frontend_dir, html=True), name="frontend")
 
-# --- Conexión de Rutas (Routers) ---
-# Incluimos los routers en la aplicación principal.
-app.include_router(routes_artistas.router)
-app.include_router(routes_conciertos.router)
-app.include_router(routes_stats.router) # ¡IMPORTANTE! Asegúrate de que esta línea esté descomentada
+    return app
 
+# Aplicación con la configuración del entorno (la que cargan uvicorn y server.py).
+app = create_app()
 
-# --- Punto de Entrada para Correr el Servidor ---
+# --- Punto de Entrada para Correr el Servidor (Desarrollo) ---
+# Para producción (varios workers, sin reloader) usar: python -m api.server
 if __name__ == "__main__":
     print("Iniciando servidor FastAPI en http://127.0.0.1:8000")
-    uvicorn.run("app:app", host="127.0.0.1", port=8000, reload=True)
\ No newline at end of file
+    uvicorn.run("api.app:app", host="127.0.0.1", port=8000, reload=True)
\ No newline at end of file
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+# --- CACHÉ LRU DE ARTISTAS (READ-THROUGH) ---
+# Los datos de un artista casi nunca cambian, pero se leían de SQLite en cada
+# GET por ID y en cada JOIN de conciertos. Esta caché acotada guarda las filas
+# en un registro compacto con __slots__ (sin el __dict__ por instancia de un
+# objeto normal ni las tablas hash de un dict por fila).
+
+CAMPOS_ARTISTA = ("id", "nombre", "genero", "pais", "popularidad", "imagen_url", "biografia")
+
+
+class ArtistaRecord:
+    """Fila de la tabla artistas en representación compacta."""
+    __slots__ = CAMPOS_ARTISTA
+
+    def __init__(self, id, nombre, genero, pais, popularidad, imagen_url, biografia):
+        self.id = id
+        self.nombre = nombre
+        self.genero = genero
+        self.pais = pais
+        self.popularidad = popularidad
+        self.imagen_url = imagen_url
+        self.biografia = biografia
+
+    @classmethod
+    def from_row(cls, row) -> "ArtistaRecord":
+        return cls(*(row[campo] for campo in CAMPOS_ARTISTA))
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {campo: getattr(self, campo) for campo in CAMPOS_ARTISTA}
+
+    def size_bytes(self) -> int:
+        """Memoria aproximada del registro más sus valores."""
+        return sys.getsizeof(self) + sum(sys.getsizeof(getattr(self, campo)) for campo in CAMPOS_ARTISTA)
+
+
+class ArtistCache:
+    """
+    Caché LRU acotada de ArtistaRecord por ID.
+    get_many() es read-through: las IDs que faltan se piden al loader en una
+    sola consulta y se guardan, salvo que haya habido una invalidación
+    mientras se leían (la fila leída podría ser la anterior al cambio).
+    """
+
+    def __init__(self, max_size: int = 1024):
+        self.max_size = max_size
+        self._data: "OrderedDict[int, ArtistaRecord]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._generacion = 0  # Aumenta en cada invalidación
+        # Métricas
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _put(self, record: ArtistaRecord) -> None:
+        # Llamar con el candado tomado.
+        self._data[record.id] = record
+        self._data.move_to_end(record.id)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def get_many(self, ids: Iterable[int],
+                 loader: Callable[[List[int]], Iterable[ArtistaRecord]]) -> Dict[int, ArtistaRecord]:
+        """Devuelve {id: ArtistaRecord} para las IDs existentes, cargando las que falten."""
+        encontrados: Dict[int, ArtistaRecord] = {}
+        faltantes: List[int] = []
+        with self._lock:
+            for artista_id in dict.fromkeys(ids):
+                record = self._data.get(artista_id)
+                if record is None:
+                    faltantes.append(artista_id)
+                else:
+                    self._data.move_to_end(artista_id)
+                    encontrados[artista_id] = record
+            self.hits += len(encontrados)
+            self.misses += len(faltantes)
+            generacion = self._generacion
+        if faltantes:
+            cargados = list(loader(faltantes))
+            with self._lock:
+                guardar = generacion == self._generacion
+                for record in cargados:
+                    if guardar:
+                        self._put(record)
+                    encontrados[record.id] = record
+        return encontrados
+
+    def get(self, artista_id: int,
+            loader: Callable[[List[int]], Iterable[ArtistaRecord]]) -> Optional[ArtistaRecord]:
+        return self.get_many([artista_id], loader).get(artista_id)
+
+    def invalidate(self, artista_id: int) -> None:
+        with self._lock:
+            self._data.pop(artista_id, None)
+            self._generacion += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._generacion += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            records = list(self._data.values())
+        total = self.hits + self.misses
+        bytes_total = sum(record.size_bytes() for record in records)
+        return {
+            "entradas": len(records),
+            "max_entradas": self.max_size,
+            "aciertos": self.hits,
+            "fallos": self.misses,
+            "desalojos": self.evictions,
+            "tasa_aciertos": round(self.hits / total, 4) if total else 0.0,
+            "bytes_totales": bytes_total,
+            "bytes_por_artista": round(bytes_total / len(records), 1) if records else 0.0,
+        }
@@ -0,0 +1,299 @@
+# -*- coding: utf-8 -*-
+import datetime
+import gzip
+import json
+import os
+import re
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+
+try:
+    from .settings import Settings, get_settings
+except ImportError:  # Importado desde init_db.py ejecutado como script
+    from settings import Settings, get_settings
+
+# --- BACKUP Y RESTAURACIÓN EN LÍNEA ---
+# Copia consistente de la BD mientras la API sigue atendiendo. Usa la API de
+# backup incremental de SQLite: copia 'backup_pages' páginas por paso y
+# duerme 'backup_pause' segundos entre pasos, así que nunca retiene la BD
+# más que lo que tarda un paso y las peticiones no notan la copia.
+#
+# Si otra conexión escribe durante la copia, SQLite la reinicia desde el
+# principio para que siga siendo consistente. Con mucho tráfico de escritura
+# eso podría no terminar nunca: después de MAX_REINICIOS se copia lo que
+# falta en un solo paso (en modo WAL eso tampoco bloquea a los escritores).
+#
+# Uso:
+#   python -m api.init_db backup [destino] [--gzip]
+#   python -m api.init_db restore <origen>
+#   POST /api/admin/backups (ver routes_admin.py)
+
+MAX_REINICIOS = 3
+CHUNK_COMPRESION = 1 << 20
+INTERVALO_ESTADO = 0.25  # Segundos mínimos entre escrituras del archivo de estado
+
+Progreso = Callable[[Dict[str, Any]], None]
+
+
+def _verificar(ruta: str) -> None:
+    """PRAGMA quick_check sobre una copia; lanza sqlite3.DatabaseError si está dañada."""
+    conn = sqlite3.connect(ruta)
+    try:
+        resultado = conn.execute("PRAGMA quick_check").fetchone()[0]
+    finally:
+        conn.close()
+    if resultado != "ok":
+        raise sqlite3.DatabaseError(f"La copia {ruta} no pasó quick_check: {resultado}")
+
+
+def _comprimir(origen: str, destino: str) -> None:
+    with open(origen, "rb") as entrada, gzip.open(destino, "wb", compresslevel=6) as salida:
+        shutil.copyfileobj(entrada, salida, CHUNK_COMPRESION)
+
+
+def _descomprimir(origen: str, destino: str) -> None:
+    with gzip.open(origen, "rb") as entrada, open(destino, "wb") as salida:
+        shutil.copyfileobj(entrada, salida, CHUNK_COMPRESION)
+
+
+def _copiar(src: sqlite3.Connection, dst: sqlite3.Connection, paginas: int, pausa: float,
+            estado: Dict[str, Any], avisar: Callable[[], None]) -> None:
+    """Backup incremental de src a dst, actualizando 'estado' en cada paso."""
+
+    class _DemasiadosReinicios(Exception):
+        pass
+
+    def paso(status: int, restantes: int, total: int) -> None:
+        copiadas = total - restantes
+        if copiadas < estado["paginas_copiadas"]:
+            estado["reinicios"] += 1
+        estado["paginas_copiadas"], estado["paginas_totales"] = copiadas, total
+        avisar()
+        if estado["reinicios"] >= MAX_REINICIOS:
+            raise _DemasiadosReinicios()
+        if restantes:
+            time.sleep(pausa)  # Suelta la BD (y el GIL) entre pasos
+
+    try:
+        src.backup(dst, pages=paginas, progress=paso)
+    except _DemasiadosReinicios:
+        src.backup(dst, pages=-1)
+        estado["paginas_copiadas"] = estado["paginas_totales"]
+        avisar()
+
+
+def backup_database(destino: str, settings: Optional[Settings] = None, comprimir: Optional[bool] = None,
+                    progreso: Optional[Progreso] = None) -> Dict[str, Any]:
+    """
+    Copia la BD configurada a 'destino' sin detener a la API. Con
+    comprimir=True (o si el destino termina en .gz) la copia se guarda con
+    gzip. La copia se verifica (quick_check) y se publica con un rename, así
+    que 'destino' nunca queda a medio escribir. 'progreso' recibe el estado
+    (fase, páginas copiadas/totales, reinicios) después de cada paso.
+    Devuelve el resumen del backup. Los errores de BD se propagan al llamador.
+    """
+    settings = settings or get_settings()
+    if comprimir is None:
+        comprimir = destino.endswith(".gz")
+    elif comprimir and not destino.endswith(".gz"):
+        destino += ".gz"
+    destino = os.path.abspath(destino)
+    os.makedirs(os.path.dirname(destino), exist_ok=True)
+    copia = (destino[:-3] if comprimir else destino) + ".tmp"
+
+    inicio = time.monotonic()
+    estado: Dict[str, Any] = {"fase": "copiando", "paginas_copiadas": 0, "paginas_totales": 0, "reinicios": 0}
+
+    def avisar() -> None:
+        if progreso is not None:
+            progreso(dict(estado))
+
+    try:
+        src = settings.connect()
+        dst = sqlite3.connect(copia)
+        try:
+            _copiar(src, dst, settings.backup_pages, settings.backup_pause, estado, avisar)
+        finally:
+            dst.close()
+            src.close()
+
+        estado["fase"] = "verificando"
+        avisar()
+        _verificar(copia)
+
+        if comprimir:
+            estado["fase"] = "comprimiendo"
+            avisar()
+            _comprimir(copia, destino + ".tmp")
+            os.remove(copia)
+            os.replace(destino + ".tmp", destino)
+        else:
+            os.replace(copia, destino)
+    finally:
+        for temporal in (copia, destino + ".tmp"):
+            if os.path.exists(temporal):
+                os.remove(temporal)
+
+    estado["fase"] = "completado"
+    avisar()
+    return {
+        "archivo": destino,
+        "bytes": os.path.getsize(destino),
+        "comprimido": comprimir,
+        "paginas": estado["paginas_totales"],
+        "reinicios": estado["reinicios"],
+        "segundos": round(time.monotonic() - inicio, 3),
+    }
+
+
+def restore_database(origen: str, settings: Optional[Settings] = None,
+                     progreso: Optional[Progreso] = None) -> Dict[str, Any]:
+    """
+    Reemplaza el contenido de la BD configurada con el backup 'origen'
+    (.db o .db.gz). El backup se verifica antes de tocar la BD. Las cachés en
+    memoria de una API en marcha no se enteran: hay que reiniciarla después.
+    Los errores de BD se propagan al llamador.
+    """
+    settings = settings or get_settings()
+    if settings.in_memory:
+        raise ValueError("No se puede restaurar una BD en memoria desde otro proceso.")
+    inicio = time.monotonic()
+    estado: Dict[str, Any] = {"fase": "verificando", "paginas_copiadas": 0, "paginas_totales": 0, "reinicios": 0}
+
+    def avisar() -> None:
+        if progreso is not None:
+            progreso(dict(estado))
+
+    temporal = None
+    if origen.endswith(".gz"):
+        temporal = settings.database_file + ".restore.tmp"
+        _descomprimir(origen, temporal)
+    try:
+        fuente = temporal or origen
+        avisar()
+        _verificar(fuente)
+        estado["fase"] = "restaurando"
+        src = sqlite3.connect(fuente)
+        dst = settings.connect()
+        try:
+            dst.execute(f"PRAGMA busy_timeout = {int(settings.busy_timeout)};")
+            _copiar(src, dst, settings.backup_pages, 0.0, estado, avisar)
+        finally:
+            dst.close()
+            src.close()
+    finally:
+        if temporal and os.path.exists(temporal):
+            os.remove(temporal)
+
+    estado["fase"] = "completado"
+    avisar()
+    return {
+        "archivo": os.path.abspath(origen),
+        "paginas": estado["paginas_totales"],
+        "segundos": round(time.monotonic() - inicio, 3),
+    }
+
+
+# --- BACKUPS EN SEGUNDO PLANO (para /api/admin) ---
+# Cada backup escribe su estado en '<id>.json' junto al archivo, así que
+# cualquier worker puede responder por su progreso. Solo se permite un
+# backup a la vez por proceso, pero dos workers (o dos backups en el mismo
+# segundo) no pueden compartir ID: lleva microsegundos y un sufijo
+# aleatorio, y se sigue ordenando por fecha. Se aceptan los IDs sin sufijo
+# (conciertos-AAAAMMDD-HHMMSS) de los backups anteriores.
+
+PATRON_ID = r"^conciertos-\d{8}-\d{6}(-\d{6}-[0-9a-f]{6})?$"
+_PATRON_ID = re.compile(PATRON_ID)
+_en_curso = threading.Lock()
+
+
+def _ruta_estado(settings: Settings, backup_id: str) -> str:
+    return os.path.join(settings.backup_directory(), backup_id + ".json")
+
+
+def _guardar_estado(ruta: str, estado: Dict[str, Any]) -> None:
+    temporal = ruta + ".tmp"
+    with open(temporal, "w", encoding="utf-8") as f:
+        json.dump(estado, f, ensure_ascii=False)
+    os.replace(temporal, ruta)
+
+
+def get_backup_status(backup_id: str, settings: Optional[Settings] = None) -> Optional[Dict[str, Any]]:
+    """Estado de un backup por su ID, o None si no existe."""
+    settings = settings or get_settings()
+    if not _PATRON_ID.match(backup_id):
+        return None
+    try:
+        with open(_ruta_estado(settings, backup_id), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def list_backups(settings: Optional[Settings] = None) -> List[Dict[str, Any]]:
+    """Estado de todos los backups de la carpeta, del más reciente al más antiguo."""
+    settings = settings or get_settings()
+    carpeta = settings.backup_directory()
+    if not os.path.isdir(carpeta):
+        return []
+    ids = sorted((nombre[:-5] for nombre in os.listdir(carpeta)
+                  if nombre.endswith(".json") and _PATRON_ID.match(nombre[:-5])), reverse=True)
+    return [estado for estado in (get_backup_status(backup_id, settings) for backup_id in ids) if estado]
+
+
+def start_backup(settings: Optional[Settings] = None, comprimir: bool = True) -> Optional[Dict[str, Any]]:
+    """
+    Lanza un backup en un hilo y devuelve su estado inicial, o None si ya
+    hay uno en curso en este proceso.
+    """
+    settings = settings or get_settings()
+    if not _en_curso.acquire(blocking=False):
+        return None
+    try:
+        ahora = datetime.datetime.now(datetime.timezone.utc)
+        backup_id = ahora.strftime("conciertos-%Y%m%d-%H%M%S-%f-") + uuid.uuid4().hex[:6]
+        archivo = os.path.join(settings.backup_directory(), backup_id + (".db.gz" if comprimir else ".db"))
+        ruta_estado = _ruta_estado(settings, backup_id)
+        estado: Dict[str, Any] = {
+            "id": backup_id, "archivo": archivo, "comprimido": comprimir, "estado": "en_curso",
+            "fase": "copiando", "paginas_copiadas": 0, "paginas_totales": 0, "reinicios": 0,
+            "inicio": ahora.strftime("%Y-%m-%dT%H:%M:%SZ"), "fin": None, "bytes": None, "error": None,
+        }
+        os.makedirs(settings.backup_directory(), exist_ok=True)
+        _guardar_estado(ruta_estado, estado)
+    except BaseException:
+        # Sin hilo que lo suelte: si no se libera aquí, todo backup posterior responde 409.
+        _en_curso.release()
+        raise
+    ultimo = [0.0]
+
+    def progreso(avance: Dict[str, Any]) -> None:
+        estado.update(avance)
+        # El archivo de estado se reescribe como mucho cada INTERVALO_ESTADO.
+        if time.monotonic() - ultimo[0] >= INTERVALO_ESTADO:
+            ultimo[0] = time.monotonic()
+            _guardar_estado(ruta_estado, estado)
+
+    def ejecutar() -> None:
+        try:
+            resumen = backup_database(archivo, settings, comprimir, progreso)
+            estado.update(estado="completado", bytes=resumen["bytes"])
+        except Exception as e:
+            # Cualquier error termina el backup: el estado nunca queda "en_curso".
+            estado.update(estado="error", error=str(e) or type(e).__name__)
+            print(f"❌ Error en el backup {backup_id}: {e}")
+        finally:
+            estado["fin"] = datetime.datetime.now(datetime.timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+            _guardar_estado(ruta_estado, estado)
+            _en_curso.release()
+
+    try:
+        threading.Thread(target=ejecutar, name=f"backup-{backup_id}", daemon=True).start()
+    except BaseException:
+        _en_curso.release()
+        raise
+    return dict(estado)
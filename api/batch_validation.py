@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+import datetime
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+from pydantic import AfterValidator, BaseModel, Field, TypeAdapter, ValidationError
+from typing_extensions import Annotated, NotRequired, TypedDict
+
+# --- VALIDACIÓN POR LOTES ---
+# Valida listas de artistas o conciertos en una sola llamada a pydantic-core.
+# Las filas se describen con TypedDict (mismas reglas que ArtistaBase y
+# ConciertoBase) y se validan con un TypeAdapter compilado una vez al
+# importar el módulo: no se construye un modelo por fila, el resultado son
+# diccionarios listos para models.py. Los errores llevan el mismo formato que
+# los 422 de FastAPI, con el índice de la fila en 'loc' (ej. ["body", 3, "fecha"]).
+
+MAX_LOTE = 5000  # Filas máximas por petición de carga masiva
+
+MENSAJE_FECHA = "El formato de fecha debe ser ISO 8601 (ej: '2025-11-20T20:00:00Z')"
+
+
+def validar_fecha(valor: str) -> str:
+    """Verifica que la fecha sea ISO 8601; la devuelve sin cambios."""
+    try:
+        datetime.datetime.fromisoformat(valor.replace('Z', '+00:00'))
+    except ValueError:
+        raise ValueError(MENSAJE_FECHA)
+    return valor
+
+
+FechaISO = Annotated[str, AfterValidator(validar_fecha)]
+
+
+class ArtistaFila(TypedDict):
+    """Mismas reglas y defaults que ArtistaBase (routes_artistas.py)."""
+    nombre: Annotated[str, Field(min_length=1, max_length=100)]
+    genero: Annotated[str, Field(max_length=50)]
+    pais: Annotated[str, Field(max_length=50)]
+    popularidad: NotRequired[Annotated[Optional[int], Field(None, ge=0, le=100)]]
+    imagen_url: NotRequired[Annotated[Optional[str], Field(None, max_length=500)]]
+    biografia: NotRequired[Annotated[Optional[str], Field(None)]]
+
+
+class ConciertoFila(TypedDict):
+    """Mismas reglas y defaults que ConciertoBase (routes_conciertos.py)."""
+    artista_id: int
+    nombre_evento: Annotated[str, Field(max_length=150)]
+    venue: Annotated[str, Field(max_length=100)]
+    ciudad: Annotated[str, Field(max_length=100)]
+    pais: Annotated[str, Field(max_length=100)]
+    fecha: FechaISO
+    status: NotRequired[Annotated[Optional[str], Field("Planeado", max_length=50)]]
+    asistencia_proyectada: NotRequired[Annotated[Optional[int], Field(None, ge=0)]]
+    asistencia_real: NotRequired[Annotated[Optional[int], Field(None, ge=0)]]
+    costos_produccion: NotRequired[Annotated[Optional[int], Field(None, ge=0)]]
+    ingresos_taquilla: NotRequired[Annotated[Optional[int], Field(None, ge=0)]]
+    latitud: NotRequired[Annotated[Optional[float], Field(None)]]
+    longitud: NotRequired[Annotated[Optional[float], Field(None)]]
+
+
+# Los defaults de los campos opcionales los aplica el propio validador, así
+# que models.py recibe filas completas (igual que con model_dump()).
+artistas_adapter = TypeAdapter(List[ArtistaFila])
+conciertos_adapter = TypeAdapter(List[ConciertoFila])
+
+FilasValidas = List[Tuple[int, Dict[str, Any]]]  # (índice en el lote, fila validada)
+
+
+def _error(indice: int, campo: Any, mensaje: str, tipo: str) -> Dict[str, Any]:
+    loc = ["body", indice] + ([campo] if campo is not None else [])
+    return {"loc": loc, "msg": mensaje, "type": tipo}
+
+
+def validar_lote(adapter: TypeAdapter, filas: List[Any]) -> Tuple[FilasValidas, List[Dict[str, Any]]]:
+    """
+    Valida todas las filas y devuelve (filas válidas con su índice, errores).
+    El caso normal (todo válido) es una sola llamada al validador; si hay
+    errores, se valida una segunda vez solo el resto de las filas.
+    """
+    indices = list(range(len(filas)))
+    errores: List[Dict[str, Any]] = []
+    try:
+        validas = adapter.validate_python(filas)
+    except ValidationError as e:
+        malas: Set[int] = set()
+        for err in e.errors(include_url=False, include_context=False, include_input=False):
+            indice, *campo = err["loc"]
+            malas.add(indice)
+            errores.append({"loc": ["body", indice, *campo], "msg": err["msg"], "type": err["type"]})
+        indices = [i for i in indices if i not in malas]
+        validas = adapter.validate_python([filas[i] for i in indices])
+    return list(zip(indices, validas)), errores
+
+
+def errores_artista_inexistente(filas: Iterable[Tuple[int, Dict[str, Any]]],
+                                inexistentes: Set[int]) -> List[Dict[str, Any]]:
+    """Un error por cada fila cuyo artista_id no existe (en lugar del 500 de la FOREIGN KEY)."""
+    return [_error(indice, "artista_id", f"El artista con ID {fila['artista_id']} no existe", "foreign_key")
+            for indice, fila in filas if fila["artista_id"] in inexistentes]
+
+
+# --- Schemas de respuesta de las cargas masivas ---
+
+class LoteCreado(BaseModel):
+    indice: int = Field(..., description="Posición de la fila en el lote enviado")
+    id: int = Field(..., description="ID asignado al registro creado")
+
+class LoteError(BaseModel):
+    loc: List[Union[str, int]] = Field(..., description="Ubicación del error: ['body', índice de la fila, campo]")
+    msg: str = Field(..., description="Descripción del error")
+    type: str = Field(..., description="Tipo de error (ej. 'missing', 'value_error', 'foreign_key')")
+
+class LoteResultado(BaseModel):
+    creados: List[LoteCreado] = Field(..., description="Filas creadas con su ID")
+    errores: List[LoteError] = Field(..., description="Filas rechazadas (solo con parcial=true; si no, el lote completo responde 422)")
+
+class LoteResponse(BaseModel):
+    success: bool = Field(True, description="Indica si la solicitud fue exitosa")
+    message: str = Field(..., description="Resumen de la carga")
+    data: LoteResultado = Field(..., description="Resultado de cada fila del lote")
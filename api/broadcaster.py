@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import logging
+from typing import Any, Callable, Dict, Optional, Set
+
+# --- DIFUSOR DE ESTADÍSTICAS (PUSH) ---
+# En lugar de que cada dashboard abierto vuelva a pedir /api/estadisticas,
+# un único difusor recalcula el payload UNA vez por cambio en la BD y envía
+# a todos los clientes suscritos solo las claves que cambiaron (delta).
+# Los avisos llegan de las escrituras de este proceso; las de otros workers
+# se detectan con la función 'sincronizar', que se llama periódicamente
+# mientras haya clientes conectados.
+
+# Tamaño máximo de la cola de mensajes pendientes por cliente.
+MAX_PENDIENTES = 16
+
+# Si el recálculo falla se reintenta, duplicando la espera entre intentos
+# desde REINTENTO_INICIAL hasta REINTENTO_MAXIMO segundos.
+REINTENTO_INICIAL = 0.5
+REINTENTO_MAXIMO = 30.0
+
+logger = logging.getLogger(__name__)
+
+
+def diff_payload(anterior: Dict[str, Any], nuevo: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Calcula las diferencias entre dos payloads. Los diccionarios anidados se
+    comparan recursivamente; cualquier otro valor (incluidas las listas) se
+    envía completo si cambió.
+    """
+    delta: Dict[str, Any] = {}
+    for clave, valor in nuevo.items():
+        previo = anterior.get(clave)
+        if isinstance(valor, dict) and isinstance(previo, dict):
+            sub = diff_payload(previo, valor)
+            if sub:
+                delta[clave] = sub
+        elif valor != previo:
+            delta[clave] = valor
+    return delta
+
+
+class StatsBroadcaster:
+    """
+    Mantiene el último payload de estadísticas y una cola por cliente.
+    notify() puede llamarse desde cualquier hilo (ej. después de un COMMIT);
+    los avisos que llegan mientras hay un recálculo pendiente se agrupan, y
+    si llega alguno durante el recálculo se vuelve a calcular al terminar
+    (el cálculo en curso pudo leer la BD antes de esa escritura).
+    """
+
+    def __init__(self, compute: Callable[[], Dict[str, Any]], debounce: float = 0.1,
+                 sincronizar: Optional[Callable[[], None]] = None, intervalo: float = 1.0):
+        self._compute = compute        # Función (síncrona) que calcula el payload completo
+        self._debounce = debounce      # Segundos para agrupar avisos cercanos
+        self._sincronizar = sincronizar  # Función (síncrona) que detecta escrituras de otros procesos
+        self._intervalo = intervalo    # Segundos entre llamadas a 'sincronizar'
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._clients: Set[asyncio.Queue] = set()
+        self._latest: Optional[Dict[str, Any]] = None
+        self._pending: Optional[asyncio.Task] = None
+        self._vigilante: Optional[asyncio.Task] = None
+        self._sucio = False            # Hubo un aviso que aún no refleja _latest
+        self._avisos = 0               # Avisos recibidos (para detectar los que llegan durante un cálculo)
+        # Métricas: cuántas veces se recalculó el payload
+        self.recomputations = 0
+
+    def start(self) -> None:
+        """Asocia el difusor al event loop de la aplicación (llamar desde el lifespan)."""
+        self._loop = asyncio.get_running_loop()
+        if self._sincronizar is not None:
+            self._vigilante = asyncio.ensure_future(self._vigilar())
+
+    def stop(self) -> None:
+        for tarea in (self._pending, self._vigilante):
+            if tarea is not None:
+                tarea.cancel()
+        self._pending = None
+        self._vigilante = None
+        self._loop = None
+
+    # --- Suscripción de clientes ---
+
+    async def subscribe(self) -> asyncio.Queue:
+        """
+        Registra un cliente y le encola el payload completo actual.
+        Devuelve la cola de la que el cliente debe leer sus mensajes.
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=MAX_PENDIENTES)
+        if self._latest is None:
+            avisos = self._avisos
+            calculado = await self._recompute()
+            if self._latest is None:
+                self._latest = calculado
+            if self._avisos != avisos:
+                # Hubo una escritura durante el cálculo: puede no incluirla.
+                self._schedule()
+        queue.put_nowait({"tipo": "completo", "data": self._latest})
+        self._clients.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self._clients.discard(queue)
+
+    @property
+    def clients(self) -> int:
+        return len(self._clients)
+
+    # --- Avisos de cambio ---
+
+    def notify(self, *args: Any) -> None:
+        """
+        Avisa que hubo una escritura. Es seguro llamarlo desde hilos fuera del
+        event loop; acepta (y descarta) los argumentos del listener de models.
+        """
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        loop.call_soon_threadsafe(self._schedule)
+
+    def _schedule(self) -> None:
+        self._avisos += 1
+        self._sucio = True
+        if self._pending is None or self._pending.done():
+            self._pending = asyncio.ensure_future(self._refresh())
+
+    async def _recompute(self) -> Dict[str, Any]:
+        self.recomputations += 1
+        return await asyncio.to_thread(self._compute)
+
+    async def _refresh(self) -> None:
+        # Se repite mientras lleguen avisos durante el recálculo, o hasta que
+        # un recálculo fallido vuelva a salir bien.
+        espera = self._debounce
+        while self._sucio:
+            await asyncio.sleep(espera)
+            self._sucio = False
+            if not self._clients:
+                # Nadie escucha: basta con invalidar; se recalcula al próximo subscribe().
+                self._latest = None
+                continue
+            try:
+                nuevo = await self._recompute()
+            except Exception:
+                # El aviso sigue pendiente: los clientes tienen cifras viejas.
+                self._sucio = True
+                espera = min(max(espera * 2, REINTENTO_INICIAL), REINTENTO_MAXIMO)
+                logger.exception("Error al recalcular estadísticas para el dashboard; reintento en %.1f s", espera)
+                continue
+            espera = self._debounce
+            anterior, self._latest = self._latest or {}, nuevo
+            delta = diff_payload(anterior, nuevo)
+            if delta:
+                self._broadcast({"tipo": "delta", "data": delta})
+
+    async def _vigilar(self) -> None:
+        """Mientras haya clientes, busca escrituras de otros procesos cada 'intervalo' segundos."""
+        while True:
+            await asyncio.sleep(self._intervalo)
+            if not self._clients:
+                continue
+            try:
+                # Si otro proceso escribió, 'sincronizar' termina llamando a notify().
+                await asyncio.to_thread(self._sincronizar)
+            except Exception:
+                logger.exception("Error al buscar cambios de otros procesos para el dashboard")
+
+    def _broadcast(self, mensaje: Dict[str, Any]) -> None:
+        for queue in list(self._clients):
+            try:
+                queue.put_nowait(mensaje)
+            except asyncio.QueueFull:
+                # Cliente lento: se descartan sus deltas atrasados y se le
+                # reenvía el estado completo para que se resincronice.
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait({"tipo": "completo", "data": self._latest})
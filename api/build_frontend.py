@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+from typing import Dict, List, Optional
+
+try:
+    import brotli  # Opcional: si no está instalado solo se generan variantes .gz
+except ImportError:
+    brotli = None
+
+from .settings import get_settings
+
+# --- BUILD DEL FRONTEND ---
+# Uso (desde la raíz del proyecto):
+#   python -m api.build_frontend
+# Copia frontend/ a frontend_dist/ listo para que la API lo sirva en el
+# mismo origen (ver PrecompressedStaticFiles en static_files.py):
+#   1. Las URLs absolutas a http://127.0.0.1:8000 del JS se vuelven
+#      relativas al origen de la página (sin CORS ni preflights).
+#   2. JS e imágenes se renombran con un hash de su contenido
+#      (api.js -> api.3f2a1b9c0d.js) y se reescriben sus referencias, así
+#      que pueden cachearse como inmutables; los .html conservan su nombre.
+#   3. Los archivos de texto se precomprimen (.gz y, si hay brotli, .br).
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SOURCE_DIR = os.path.join(ROOT_DIR, "frontend")
+DIST_DIR = get_settings().frontend_dir  # CONCIERTOS_FRONTEND_DIR (ver settings.py)
+
+ORIGEN_DESARROLLO = "127.0.0.1:8000"
+EXTENSIONES_TEXTO = (".html", ".js", ".css", ".svg", ".json", ".txt")
+LONGITUD_HASH = 10
+MIN_BYTES_COMPRESION = 256  # Por debajo de esto la variante comprimida no ahorra nada
+
+
+def fingerprint(ruta: str, contenido: bytes) -> str:
+    """'js/api.js' -> 'js/api.<hash>.js' con el hash del contenido final."""
+    base, ext = os.path.splitext(ruta)
+    return f"{base}.{hashlib.sha256(contenido).hexdigest()[:LONGITUD_HASH]}{ext}"
+
+
+def same_origin(js: str) -> str:
+    """Reemplaza el origen de desarrollo por el origen de la página."""
+    js = re.sub(r'(["\'`])ws://' + re.escape(ORIGEN_DESARROLLO),
+                r'(location.protocol === "https:" ? "wss://" : "ws://") + location.host + \1', js)
+    return re.sub(r'(["\'`])https?://' + re.escape(ORIGEN_DESARROLLO), r'\1', js)
+
+
+def rewrite_references(texto: str, manifest: Dict[str, str]) -> str:
+    """Cambia 'img/logo.png' o './js/api.js' por su nombre con hash."""
+    for original, final in manifest.items():
+        texto = re.sub(r'(?<![\w./-])(\./)?' + re.escape(original) + r'(?![\w.-])',
+                       lambda m: (m.group(1) or "") + final, texto)
+    return texto
+
+
+def precompress(ruta: str) -> List[str]:
+    """Escribe ruta.gz (y ruta.br si hay brotli); devuelve las variantes creadas."""
+    with open(ruta, "rb") as f:
+        datos = f.read()
+    if len(datos) < MIN_BYTES_COMPRESION:
+        return []
+    variantes = []
+    # mtime=0 para que el .gz sea idéntico entre builds con el mismo contenido.
+    comprimido = gzip.compress(datos, compresslevel=9, mtime=0)
+    if len(comprimido) < len(datos):
+        with open(ruta + ".gz", "wb") as f:
+            f.write(comprimido)
+        variantes.append(ruta + ".gz")
+    if brotli is not None:
+        comprimido = brotli.compress(datos, quality=11)
+        if len(comprimido) < len(datos):
+            with open(ruta + ".br", "wb") as f:
+                f.write(comprimido)
+            variantes.append(ruta + ".br")
+    return variantes
+
+
+def build(source: str = SOURCE_DIR, dist: str = DIST_DIR) -> Dict[str, str]:
+    """
+    Genera el frontend en 'dist' (se borra antes) y devuelve el manifiesto
+    {ruta original: ruta con hash}, que también queda en dist/manifest.json.
+    """
+    archivos = []
+    for carpeta, _, nombres in os.walk(source):
+        for nombre in nombres:
+            archivos.append(os.path.relpath(os.path.join(carpeta, nombre), source).replace(os.sep, "/"))
+
+    # Primero las imágenes (no referencian nada), luego el JS (puede
+    # referenciar imágenes) y al final el HTML, que referencia ambos.
+    orden = {".js": 1, ".html": 2}
+    archivos.sort(key=lambda ruta: (orden.get(os.path.splitext(ruta)[1], 0), ruta))
+
+    if os.path.isdir(dist):
+        shutil.rmtree(dist)
+    manifest: Dict[str, str] = {}
+    for ruta in archivos:
+        with open(os.path.join(source, ruta), "rb") as f:
+            contenido = f.read()
+        ext = os.path.splitext(ruta)[1]
+        if ext in (".js", ".html"):
+            texto = contenido.decode("utf-8")
+            if ext == ".js":
+                texto = same_origin(texto)
+            contenido = rewrite_references(texto, manifest).encode("utf-8")
+        # Los .html son los puntos de entrada: conservan su nombre y no se cachean.
+        destino = ruta if ext == ".html" else fingerprint(ruta, contenido)
+        if destino != ruta:
+            manifest[ruta] = destino
+        ruta_destino = os.path.join(dist, destino)
+        os.makedirs(os.path.dirname(ruta_destino), exist_ok=True)
+        with open(ruta_destino, "wb") as f:
+            f.write(contenido)
+        if ext in EXTENSIONES_TEXTO:
+            precompress(ruta_destino)
+
+    with open(os.path.join(dist, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    return manifest
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Genera el frontend con hash en los nombres y precomprimido.")
+    parser.add_argument("--source", default=SOURCE_DIR, help="Carpeta del frontend (default: frontend/)")
+    parser.add_argument("--dist", default=DIST_DIR, help="Carpeta de salida (default: frontend_dist/)")
+    args = parser.parse_args(argv)
+    manifest = build(args.source, args.dist)
+    print(f"✅ Frontend generado en {args.dist} ({len(manifest)} archivos con hash).")
+    if brotli is None:
+        print("   - brotli no está instalado: solo se generaron variantes .gz.")
+
+
+if __name__ == "__main__":
+    main()
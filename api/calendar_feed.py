@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+import datetime
+import hashlib
+from typing import Any, Dict, Iterable, List
+
+# --- FEED iCalendar (.ics) POR ARTISTA ---
+# Genera el calendario de conciertos de un artista en formato iCalendar
+# (RFC 5545) para suscribirse desde Google Calendar, Outlook o Apple
+# Calendar. El texto se genera una vez y se guarda en caché en models.py.
+
+PRODID = "-//Proyecto Conciertos//API de Conciertos//ES"
+DURACION_EVENTO = "PT3H"  # Duración por defecto: la BD solo guarda la hora de inicio.
+
+# Status del concierto -> STATUS del VEVENT.
+STATUS_ICS = {"Confirmado": "CONFIRMED", "Cancelado": "CANCELLED"}
+
+
+def _escape(texto: Any) -> str:
+    """Escapa un valor de texto según RFC 5545 (barra, coma, punto y coma, saltos de línea)."""
+    return (str(texto).replace("\\", "\\\\").replace(";", "\\;")
+            .replace(",", "\\,").replace("\r\n", "\\n").replace("\n", "\\n"))
+
+
+def _fold(linea: str) -> List[str]:
+    """Parte una línea en trozos de 75 octetos (las continuaciones empiezan con espacio)."""
+    partes: List[str] = []
+    actual, tamano = "", 0
+    for caracter in linea:
+        octetos = len(caracter.encode("utf-8"))
+        if tamano + octetos > 75:
+            partes.append(actual)
+            actual, tamano = " ", 1
+        actual += caracter
+        tamano += octetos
+    partes.append(actual)
+    return partes
+
+
+def _fecha_ics(fecha: str) -> str:
+    """'2025-11-20T20:00:00Z' -> '20251120T200000Z' (UTC)."""
+    valor = datetime.datetime.fromisoformat(fecha.replace("Z", "+00:00"))
+    if valor.tzinfo is None:
+        valor = valor.replace(tzinfo=datetime.timezone.utc)
+    return valor.astimezone(datetime.timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def render_ics(artista_nombre: str, conciertos: Iterable[Dict[str, Any]]) -> str:
+    """
+    Calendario con un VEVENT por concierto. Los conciertos cancelados se
+    incluyen con STATUS:CANCELLED para que los clientes suscritos los quiten.
+    El DTSTAMP de cada evento es su última modificación ('modificado', ISO
+    8601; si falta, la fecha del concierto), nunca la hora actual: así el
+    mismo estado de la BD genera siempre el mismo texto (y el mismo ETag)
+    en cada regeneración y en cada worker.
+    """
+    lineas = [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        f"PRODID:{PRODID}",
+        "CALSCALE:GREGORIAN",
+        "METHOD:PUBLISH",
+        f"X-WR-CALNAME:{_escape(f'Conciertos de {artista_nombre}')}",
+    ]
+    for concierto in conciertos:
+        lugar = ", ".join(str(v) for v in (concierto["venue"], concierto["ciudad"], concierto["pais"]) if v)
+        lineas += [
+            "BEGIN:VEVENT",
+            f"UID:concierto-{concierto['id']}@api-conciertos",
+            f"DTSTAMP:{_fecha_ics(concierto['modificado'] or concierto['fecha'])}",
+            f"DTSTART:{_fecha_ics(concierto['fecha'])}",
+            f"DURATION:{DURACION_EVENTO}",
+            f"SUMMARY:{_escape(artista_nombre + ' - ' + concierto['nombre_evento'])}",
+            f"LOCATION:{_escape(lugar)}",
+            f"STATUS:{STATUS_ICS.get(concierto['status'], 'TENTATIVE')}",
+        ]
+        if concierto["latitud"] is not None and concierto["longitud"] is not None:
+            lineas.append(f"GEO:{concierto['latitud']};{concierto['longitud']}")
+        lineas.append("END:VEVENT")
+    lineas.append("END:VCALENDAR")
+    return "".join(parte + "\r\n" for linea in lineas for parte in _fold(linea))
+
+
+def etag_for(contenido: str) -> str:
+    """ETag fuerte (entre comillas) derivado del contenido."""
+    return '"' + hashlib.sha1(contenido.encode("utf-8")).hexdigest() + '"'
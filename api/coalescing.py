@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+# --- COALESCENCIA DE PETICIONES IDÉNTICAS (SINGLE-FLIGHT) ---
+# Cuando llegan muchas peticiones GET idénticas al mismo tiempo (ej. todo el
+# equipo abre el mismo enlace del dashboard), solo la primera ejecuta las
+# consultas; las demás esperan y comparten su resultado (o su error).
+
+
+def make_key(route: str, **params: Any) -> Tuple[Hashable, ...]:
+    """
+    Construye la llave de coalescencia a partir de la ruta y los parámetros
+    de la query ya validados. Se ordenan por nombre y se omiten los None,
+    de modo que '?limit=10&page=1' y '?page=1&limit=10' comparten llave.
+    """
+    return (route,) + tuple(sorted((k, v) for k, v in params.items() if v is not None))
+
+
+class _Call:
+    """Una ejecución en curso y su resultado compartido."""
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Garantiza una sola ejecución en curso por llave.
+    Los endpoints son síncronos (corren en el threadpool), por eso se usa
+    threading en lugar de asyncio.
+    """
+
+    def __init__(self, max_wait: float = 5.0):
+        self.max_wait = max_wait  # Segundos máximos que un seguidor espera al líder
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        # Métricas
+        self.executions = 0  # Ejecuciones reales (líderes)
+        self.coalesced = 0   # Peticiones que reutilizaron el resultado de otra
+        self.timeouts = 0    # Seguidores que se cansaron de esperar y ejecutaron por su cuenta
+        self.errors = 0      # Ejecuciones que terminaron en error (propagado a todos)
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        Ejecuta fn() una sola vez por llave entre las llamadas concurrentes.
+        Si fn() lanza una excepción, todas las peticiones que esperaban la
+        reciben. Si el líder tarda más de max_wait, el seguidor ejecuta fn()
+        por su cuenta para no quedar bloqueado indefinidamente.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+                self.executions += 1
+
+        if leader:
+            try:
+                call.result = fn()
+                return call.result
+            except BaseException as e:
+                call.error = e
+                self.errors += 1
+                raise
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.event.set()
+
+        if not call.event.wait(self.max_wait):
+            with self._lock:
+                self.timeouts += 1
+            return fn()
+        with self._lock:
+            self.coalesced += 1
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "ejecuciones": self.executions,
+            "coalescidas": self.coalesced,
+            "tiempo_agotado": self.timeouts,
+            "errores": self.errors,
+            "en_curso": len(self._calls),
+        }
+
+
+# Instancia compartida por todos los routers del proceso.
+request_coalescer = SingleFlight()
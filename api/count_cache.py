@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Hashable, Iterator, Optional, Protocol
+
+# --- CONTEOS CACHEADOS POR COMBINACIÓN DE FILTROS ---
+# Cada página del listado de conciertos ejecutaba un SELECT COUNT(*) que
+# recorría todas las filas del filtro solo para calcular total_pages, y el
+# resultado se tiraba en la siguiente página. Esta caché guarda el total de
+# cada combinación de filtros y lo mantiene al día en cada alta o edición:
+# con la fila antes y después del cambio se sabe exactamente qué conteos
+# ganan o pierden un concierto, sin volver a contar.
+#
+# La caché vive en memoria del proceso y solo ajusta las escrituras propias.
+# Las de otros workers las detecta models.sync_caches() con la versión de la
+# tabla 'cambios' y entonces vacía la caché (clear()), así que ningún total
+# queda desfasado.
+
+
+class Filtro(Protocol):
+    def llave(self) -> Hashable: ...
+    def cumple(self, fila: Dict[str, Any]) -> bool: ...
+
+
+class ConteoCache:
+    """
+    Totales por filtro con ajuste incremental.
+    Las escrituras se marcan con escritura(): mientras haya alguna en curso,
+    o si alguna terminó durante el conteo, el total recién contado no se
+    guarda (podría incluir o no la fila nueva y el ajuste la contaría doble).
+    """
+
+    def __init__(self, max_size: int = 512):
+        self.max_size = max_size
+        self._data: "OrderedDict[Hashable, list]" = OrderedDict()  # llave -> [total, filtro]
+        self._lock = threading.Lock()
+        self._generacion = 0
+        self._pendientes = 0
+        # Métricas
+        self.hits = 0
+        self.misses = 0
+        self.ajustes = 0
+
+    def get(self, filtro: Filtro, loader: Callable[[], int]) -> int:
+        """Devuelve el total del filtro; si no está en caché lo cuenta con loader()."""
+        llave = filtro.llave()
+        with self._lock:
+            entry = self._data.get(llave)
+            if entry is not None:
+                self._data.move_to_end(llave)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+            generacion = self._generacion if self._pendientes == 0 else None
+        total = loader()
+        with self._lock:
+            if generacion is not None and generacion == self._generacion and self._pendientes == 0:
+                self._data[llave] = [total, filtro]
+                while len(self._data) > self.max_size:
+                    self._data.popitem(last=False)
+        return total
+
+    @contextmanager
+    def escritura(self) -> Iterator[None]:
+        """Envuelve una escritura desde antes de enviarla hasta después del ajuste."""
+        with self._lock:
+            self._pendientes += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._pendientes -= 1
+                self._generacion += 1
+
+    def ajustar(self, anterior: Optional[Dict[str, Any]], nueva: Optional[Dict[str, Any]]) -> None:
+        """
+        Aplica un cambio ya confirmado: 'anterior' es la fila antes del cambio
+        (None en un alta) y 'nueva' la fila después (None en una baja).
+        """
+        with self._lock:
+            for entry in self._data.values():
+                filtro = entry[1]
+                delta = (nueva is not None and filtro.cumple(nueva)) - (anterior is not None and filtro.cumple(anterior))
+                if delta:
+                    entry[0] += delta
+                    self.ajustes += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._generacion += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "entradas": len(self._data),
+            "max_entradas": self.max_size,
+            "aciertos": self.hits,
+            "fallos": self.misses,
+            "ajustes": self.ajustes,
+            "tasa_aciertos": round(self.hits / total, 4) if total else 0.0,
+        }
@@ -1,40 +1,42 @@
 import sqlite3
 import os
 
+try:
+    from .settings import get_settings
+except ImportError:  # Ejecutado como script: python api/init_db.py
+    from settings import get_settings
+
 # --- CONSTANTES DE CONFIGURACIÓN ---
 
 # Define la ruta base absoluta del directorio 'api'
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
-# Define la ruta completa para el archivo de la base de datos
-DB_PATH = os.path.join(BASE_DIR, 'data', 'conciertos.db')
+# La ubicación de la base de datos viene de settings.py (CONCIERTOS_DB_PATH, etc.)
 
 # Define la ruta completa para el script de schema SQL
 SCHEMA_PATH = os.path.join(BASE_DIR, 'schema.sql')
 
 # --- FUNCIONES DE BASE DE DATOS ---
 
-def get_db_connection():
+def get_db_connection(settings=None):
     """
-    Establece y devuelve una conexión a la base de datos SQLite.
-    Asegura que el directorio 'data' exista y configura la conexión 
-    para devolver filas como diccionarios (sqlite3.Row).
+    Establece y devuelve una conexión a la base de datos SQLite configurada
+    (por defecto la de get_settings(); el directorio se crea si no existe)
+    y configura la conexión para devolver filas como diccionarios (sqlite3.Row).
     """
-    # Asegura que el subdirectorio 'data' exista
-    os.makedirs(os.path.join(BASE_DIR, 'data'), exist_ok=True)
-    
-    conn = sqlite3.connect(DB_PATH)
+    conn = (settings or get_settings()).connect()
     # Habilita el acceso a columnas por nombre (como un diccionario)
     conn.row_factory = sqlite3.Row  
     return conn
 
-def init_db():
+def init_db(settings=None):
     """
     Inicializa la base de datos ejecutando el script schema.sql.
     Borra las tablas existentes (DROP TABLE) y crea las nuevas (CREATE TABLE).
     """
+    conn = None
     try:
-        conn = get_db_connection()
+        conn = get_db_connection(settings)
         cursor = conn.cursor()
         
         # Lee el contenido del archivo schema.sql
@@ -52,14 +54,15 @@ def init_db():
         if conn:
             conn.close()
 
-def seed_db():
+def seed_db(settings=None):
     """
     Puebla (siembra) la base de datos con un conjunto inicial de datos
     de artistas y conciertos.
     Verifica si ya existen datos para evitar duplicados.
     """
+    conn = None
     try:
-        conn = get_db_connection()
+        conn = get_db_connection(settings)
         cursor = conn.cursor()
 
         # Verifica si la tabla 'artistas' ya ha sido sembrada
@@ -186,15 +189,35 @@ def seed_db():
             (20, "The Car Tour", "The O2", "Londres", "Reino Unido", "2025-06-18T20:00:00Z", "Confirmado", 20000, 19500, 700000, 1200000, 51.5033, 0.0031)
         ]
         
+        # Las ciudades y los venues se guardan una sola vez (tablas de dimensión);
+        # cada concierto apunta a su venue por ID.
+        cursor.executemany(
+            "INSERT OR IGNORE INTO ciudades (nombre, pais) VALUES (?, ?)",
+            [(c[3], c[4]) for c in conciertos]
+        )
+        cursor.executemany(
+            """INSERT OR IGNORE INTO venues (nombre, ciudad_id, latitud, longitud)
+           VALUES (?, (SELECT id FROM ciudades WHERE nombre = ? AND pais = ?), ?, ?)""",
+            [(c[2], c[3], c[4], c[11], c[12]) for c in conciertos]
+        )
         cursor.executemany(
             """INSERT INTO conciertos 
-           (artista_id, nombre_evento, venue, ciudad, pais, fecha, status, 
-            asistencia_proyectada, asistencia_real, costos_produccion, ingresos_taquilla, 
+           (artista_id, nombre_evento, venue_id, fecha, status, 
+            asistencia_proyectada, asistencia_real, costos_produccion, ingresos_taquilla,
             latitud, longitud) 
-           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+           VALUES (?, ?, 
+                   (SELECT v.id FROM venues v JOIN ciudades ci ON ci.id = v.ciudad_id
+                    WHERE v.nombre = ? AND ci.nombre = ? AND ci.pais = ?),
+                   ?, ?, ?, ?, ?, ?, ?, ?)""",
             conciertos
         )
-        print(f"   - {len(conciertos)} conciertos insertados.")
+        cursor.execute("SELECT COUNT(*) FROM venues")
+        print(f"   - {len(conciertos)} conciertos insertados ({cursor.fetchone()[0]} venues distintos).")
+
+        # Los datos iniciales también quedan en el registro de cambios, así un
+        # cliente que sincroniza desde la versión 0 recibe todo.
+        cursor.execute("INSERT INTO cambios (entidad, entidad_id) SELECT 'artistas', id FROM artistas ORDER BY id")
+        cursor.execute("INSERT INTO cambios (entidad, entidad_id) SELECT 'conciertos', id FROM conciertos ORDER BY id")
 
         # Guarda los cambios en la base de datos
         conn.commit()
@@ -207,16 +230,221 @@ def seed_db():
         if conn:
             conn.close()
 
+def remove_db(settings=None):
+    """
+    Borra el archivo de la BD con sus archivos -wal y -shm y los snapshots
+    de estadísticas. Solo para BD desechables: la app lo usa al apagarse
+    si creó una BD en tmpfs (así no se acumulan en /dev/shm).
+    """
+    settings = settings or get_settings()
+    archivo = settings.database_file
+    if archivo is None:
+        return  # En memoria: desaparece sola con su última conexión
+    for ruta in (archivo, archivo + '-wal', archivo + '-shm', *settings.snapshot_paths()):
+        if os.path.exists(ruta):
+            os.remove(ruta)
+
+# --- MIGRACIÓN DE UNA BD EXISTENTE ---
+# init_db() borra y recrea todo; una BD con datos reales se pone al día con
+# migrate_db(), que se ejecuta al arrancar la API (antes del warmup) y no
+# hace nada si el schema ya está al día. Las definiciones salen del mismo
+# schema.sql, así que no hay dos copias del schema que mantener.
+
+def _sentencias_schema():
+    """Sentencias CREATE de schema.sql (sin los DROP ni los comentarios de línea)."""
+    with open(SCHEMA_PATH, 'r') as f:
+        lineas = [linea for linea in f if not linea.lstrip().startswith('--')]
+    sentencias, actual = [], ''
+    for linea in lineas:
+        actual += linea
+        if sqlite3.complete_statement(actual):
+            sentencia = actual.strip().rstrip(';').strip()
+            if sentencia.startswith('CREATE'):
+                sentencias.append(sentencia)
+            actual = ''
+    return sentencias
+
+def _crear(sentencias, prefijo):
+    """La sentencia de schema.sql que empieza con 'prefijo' (ej. 'CREATE TABLE venues ')."""
+    return next(s for s in sentencias if s.startswith(prefijo))
+
+def _normalizar(sql):
+    return ' '.join((sql or '').split())
+
+def migrate_db(settings=None):
+    """
+    Lleva una BD creada con un schema anterior al de schema.sql sin perder
+    datos. Es idempotente y se ejecuta en una sola transacción:
+      - crea las tablas 'ciudades' y 'venues' y pasa los textos de venue,
+        ciudad y país de cada concierto a un venue_id (reconstruye la tabla
+        'conciertos', que en SQLite no admite quitar columnas NOT NULL);
+      - agrega las coordenadas por concierto si faltan;
+      - crea 'cambios' y anota en él los registros existentes;
+      - crea (o redefine) los índices y la vista conciertos_detalle.
+    Devuelve la lista de pasos aplicados (vacía si no había nada que hacer).
+    Los errores de BD se propagan al llamador.
+    """
+    sentencias = _sentencias_schema()
+    pasos = []
+    conn = None
+    try:
+        conn = get_db_connection(settings)
+        conn.isolation_level = None  # Transacción manual: DDL y datos juntos
+        conn.execute("BEGIN IMMEDIATE")
+
+        def existentes(tipo):
+            return {row['name']: row['sql'] for row in
+                    conn.execute("SELECT name, sql FROM sqlite_master WHERE type = ?", (tipo,))}
+
+        tablas = existentes('table')
+        if 'conciertos' not in tablas or 'artistas' not in tablas:
+            conn.execute("ROLLBACK")
+            return pasos  # BD vacía: la crea init_db()
+        columnas = {row['name'] for row in conn.execute("PRAGMA table_info(conciertos)")}
+
+        # 1. Dimensiones de ciudades y venues (schema original: textos en cada concierto).
+        for tabla in ('ciudades', 'venues'):
+            if tabla not in tablas:
+                conn.execute(_crear(sentencias, f"CREATE TABLE {tabla} ").replace(
+                    "CREATE TABLE", "CREATE TABLE IF NOT EXISTS", 1))
+                pasos.append(f"tabla {tabla}")
+        if 'venue_id' not in columnas:
+            conn.execute("DROP VIEW IF EXISTS conciertos_detalle")
+            conn.execute("INSERT OR IGNORE INTO ciudades (nombre, pais) SELECT ciudad, pais FROM conciertos ORDER BY id")
+            # Cada venue toma las coordenadas del primer concierto que las tiene.
+            conn.execute("""
+                INSERT OR IGNORE INTO venues (nombre, ciudad_id, latitud, longitud)
+                SELECT c.venue, ci.id, c.latitud, c.longitud
+                FROM conciertos c JOIN ciudades ci ON ci.nombre = c.ciudad AND ci.pais = c.pais
+                ORDER BY c.latitud IS NULL, c.id
+            """)
+            secuencia = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'conciertos'").fetchone()
+            conn.execute(_crear(sentencias, "CREATE TABLE conciertos ").replace(
+                "CREATE TABLE conciertos ", "CREATE TABLE conciertos_migracion ", 1))
+            conn.execute("""
+                INSERT INTO conciertos_migracion
+                (id, artista_id, nombre_evento, venue_id, fecha, status,
+                 asistencia_proyectada, asistencia_real, costos_produccion, ingresos_taquilla,
+                 latitud, longitud)
+                SELECT c.id, c.artista_id, c.nombre_evento, v.id, c.fecha, c.status,
+                       c.asistencia_proyectada, c.asistencia_real, c.costos_produccion, c.ingresos_taquilla,
+                       c.latitud, c.longitud
+                FROM conciertos c
+                JOIN ciudades ci ON ci.nombre = c.ciudad AND ci.pais = c.pais
+                JOIN venues v ON v.nombre = c.venue AND v.ciudad_id = ci.id
+            """)
+            conn.execute("DROP TABLE conciertos")
+            conn.execute("ALTER TABLE conciertos_migracion RENAME TO conciertos")
+            if secuencia is not None:
+                # Las IDs de conciertos borrados no se reutilizan (AUTOINCREMENT).
+                conn.execute("UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = 'conciertos'", (secuencia[0],))
+            pasos.append("conciertos.venue_id")
+        elif 'latitud' not in columnas:
+            # Schema intermedio: las coordenadas solo estaban en el venue.
+            conn.execute("ALTER TABLE conciertos ADD COLUMN latitud REAL")
+            conn.execute("ALTER TABLE conciertos ADD COLUMN longitud REAL")
+            conn.execute("""
+                UPDATE conciertos SET
+                    latitud = (SELECT v.latitud FROM venues v WHERE v.id = conciertos.venue_id),
+                    longitud = (SELECT v.longitud FROM venues v WHERE v.id = conciertos.venue_id)
+            """)
+            pasos.append("conciertos.latitud/longitud")
+
+        # 2. Registro de cambios: los datos que ya existían quedan en la versión inicial.
+        if 'cambios' not in tablas:
+            conn.execute(_crear(sentencias, "CREATE TABLE cambios "))
+            conn.execute("INSERT INTO cambios (entidad, entidad_id) SELECT 'artistas', id FROM artistas ORDER BY id")
+            conn.execute("INSERT INTO cambios (entidad, entidad_id) SELECT 'conciertos', id FROM conciertos ORDER BY id")
+            pasos.append("tabla cambios")
+
+        # 3. Índices y vista: se crean si faltan y se redefinen si cambiaron.
+        for tipo in ('index', 'view'):
+            actuales = existentes(tipo)
+            for sentencia in sentencias:
+                if not sentencia.startswith(f"CREATE {tipo.upper()} "):
+                    continue
+                nombre = sentencia.split()[2]
+                if _normalizar(actuales.get(nombre)) == _normalizar(sentencia):
+                    continue
+                if nombre in actuales:
+                    conn.execute(f"DROP {tipo.upper()} {nombre}")
+                conn.execute(sentencia)
+                pasos.append(nombre)
+
+        conn.execute("COMMIT")
+        if pasos:
+            print(f"✅ Base de datos migrada: {', '.join(pasos)}.")
+        return pasos
+    except Exception:
+        if conn is not None and conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    finally:
+        if conn:
+            conn.close()
+
 # --- PUNTO DE ENTRADA ---
 
+def _mostrar_progreso(estado):
+    """Progreso de backup/restore en una sola línea de la terminal."""
+    total = estado["paginas_totales"] or 1
+    print(f"\r  {estado['fase']}: {estado['paginas_copiadas']}/{estado['paginas_totales']} páginas "
+          f"({100 * estado['paginas_copiadas'] // total}%), reinicios: {estado['reinicios']}   ", end="", flush=True)
+
+
 if __name__ == "__main__":
     """
     Punto de entrada para ejecutar el script directamente desde la terminal.
-    Ejecuta la inicialización (init_db) y la siembra (seed_db) en orden.
+    Sin argumentos ejecuta la inicialización (init_db) y la siembra (seed_db)
+    en orden. Con 'migrate' pone al día el schema de una BD existente; con
+    'backup' o 'restore' copia la BD en línea (ver backup.py):
+        python -m api.init_db migrate
+        python -m api.init_db backup [destino] [--gzip]
+        python -m api.init_db restore <origen>
     """
-    print("Iniciando proceso de DB...")
-    # 1. Crea las tablas
-    init_db()
-    # 2. Llena las tablas con datos
-    seed_db()
-    print("Proceso de DB completado.")
\ No newline at end of file
+    import argparse
+    import datetime
+    import sys
+
+    try:
+        from . import backup
+    except ImportError:
+        import backup
+
+    parser = argparse.ArgumentParser(description="Inicialización, backup y restauración de la BD de conciertos.")
+    comandos = parser.add_subparsers(dest="comando")
+    comandos.add_parser("migrate", help="Pone al día el schema de una BD existente sin perder datos")
+    parser_backup = comandos.add_parser("backup", help="Copia la BD sin detener la API")
+    parser_backup.add_argument("destino", nargs="?", help="Archivo de destino (default: carpeta de backups)")
+    parser_backup.add_argument("--gzip", action="store_true", help="Comprime la copia (.gz)")
+    parser_restore = comandos.add_parser("restore", help="Reemplaza la BD con un backup (detener la API antes)")
+    parser_restore.add_argument("origen", help="Archivo de backup (.db o .db.gz)")
+    args = parser.parse_args()
+
+    settings = get_settings()
+    if args.comando and settings.in_memory:
+        sys.exit("❌ La BD en memoria solo existe dentro del proceso de la API: usar POST /api/admin/backups.")
+
+    if args.comando == "migrate":
+        if not migrate_db(settings):
+            print("✅ El schema ya estaba al día.")
+    elif args.comando == "backup":
+        destino = args.destino or os.path.join(
+            settings.backup_directory(),
+            datetime.datetime.now(datetime.timezone.utc).strftime("conciertos-%Y%m%d-%H%M%S.db"))
+        print(f"Copiando {settings.database_file} -> {destino}")
+        resumen = backup.backup_database(destino, settings, comprimir=args.gzip or None, progreso=_mostrar_progreso)
+        print(f"\n✅ Backup completado: {resumen['archivo']} ({resumen['bytes']} bytes, "
+              f"{resumen['paginas']} páginas, {resumen['reinicios']} reinicios, {resumen['segundos']} s).")
+    elif args.comando == "restore":
+        print(f"Restaurando {args.origen} -> {settings.database_file}")
+        resumen = backup.restore_database(args.origen, settings, progreso=_mostrar_progreso)
+        print(f"\n✅ Restauración completada ({resumen['paginas']} páginas, {resumen['segundos']} s). "
+              "Reiniciar la API para descartar sus cachés.")
+    else:
+        print("Iniciando proceso de DB...")
+        # 1. Crea las tablas
+        init_db()
+        # 2. Llena las tablas con datos
+        seed_db()
+        print("Proceso de DB completado.")
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+import bisect
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# --- RANKING DE POPULARIDAD EN MEMORIA ---
+# El listado de artistas (ORDER BY popularidad DESC) y el "Top 10" de las
+# estadísticas reordenaban la tabla completa en cada petición. Este índice
+# mantiene a los artistas ordenados por (popularidad desc, id) en memoria:
+# se carga una vez al arrancar y se actualiza en cada alta/edición, con
+# búsqueda binaria para ubicar cada artista.
+#
+# Es una lista ordenada, no un árbol: ubicar una llave es O(log n) pero
+# insertarla o quitarla mueve el resto de la lista, así que cada
+# actualización es O(n). Con unos miles de artistas ese movimiento es un
+# memmove de pocos KB (microsegundos) y las ediciones son raras frente a las
+# lecturas, que a cambio obtienen la posición (rank) y la página del
+# ranking por índice, sin recorrer nada.
+
+# Llave de orden: (-popularidad, id). Los artistas sin popularidad (NULL)
+# van al final, igual que en el ORDER BY ... DESC de SQLite.
+Llave = Tuple[int, int]
+
+
+def _llave(artista_id: int, popularidad: Optional[int]) -> Llave:
+    return (-popularidad if popularidad is not None else 1, artista_id)
+
+
+class PopularityLeaderboard:
+    """Índice ordenado de artistas por popularidad descendente (desempate por id)."""
+
+    def __init__(self):
+        self._keys: List[Llave] = []
+        self._entries: Dict[int, Tuple[Llave, str, Optional[int]]] = {}  # id -> (llave, nombre, popularidad)
+        self._lock = threading.Lock()
+        self.loaded = False
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def load(self, rows: Iterable[Tuple[int, str, Optional[int]]]) -> None:
+        """Reconstruye el índice desde filas (id, nombre, popularidad)."""
+        entries = {row_id: (_llave(row_id, pop), nombre, pop) for row_id, nombre, pop in rows}
+        keys = sorted(entry[0] for entry in entries.values())
+        with self._lock:
+            self._entries = entries
+            self._keys = keys
+            self.loaded = True
+
+    def upsert(self, artista_id: int, nombre: str, popularidad: Optional[int]) -> None:
+        """
+        Inserta o reubica a un artista: O(log n) para ubicarlo, O(n) para
+        mover la lista (ver el comentario del módulo).
+        """
+        nueva = _llave(artista_id, popularidad)
+        with self._lock:
+            anterior = self._entries.get(artista_id)
+            if anterior is not None and anterior[0] != nueva:
+                del self._keys[bisect.bisect_left(self._keys, anterior[0])]
+            if anterior is None or anterior[0] != nueva:
+                bisect.insort(self._keys, nueva)
+            self._entries[artista_id] = (nueva, nombre, popularidad)
+
+    def get(self, artista_id: int) -> Optional[Tuple[str, Optional[int]]]:
+        """Devuelve (nombre, popularidad) del artista o None."""
+        entry = self._entries.get(artista_id)
+        return (entry[1], entry[2]) if entry is not None else None
+
+    def rank(self, artista_id: int) -> Optional[int]:
+        """Posición (1 = más popular) del artista, o None si no existe."""
+        with self._lock:
+            entry = self._entries.get(artista_id)
+            if entry is None:
+                return None
+            return bisect.bisect_left(self._keys, entry[0]) + 1
+
+    def page_ids(self, offset: int, limit: int) -> List[int]:
+        """IDs de los artistas en la ventana [offset, offset + limit) del ranking."""
+        with self._lock:
+            return [key[1] for key in self._keys[offset:offset + limit]]
+
+    def top(self, n: int) -> List[Dict[str, Any]]:
+        """Los n artistas más populares como [{'nombre', 'popularidad'}, ...]."""
+        with self._lock:
+            return [
+                {"nombre": self._entries[key[1]][1], "popularidad": self._entries[key[1]][2]}
+                for key in self._keys[:n]
+            ]
@@ -1,11 +1,30 @@
 import sqlite3
 import os
 import math
-from typing import List, Dict, Any, Optional, Tuple
+import threading
+import pathlib
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple, Callable, Iterable, Set
 
-# --- CONSTANTES DE CONFIGURACIÓN ---
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-DB_PATH = os.path.join(BASE_DIR, 'data', 'conciertos.db')
+from .write_queue import WriteQueue
+from .leaderboard import PopularityLeaderboard
+from .artist_cache import ArtistCache, ArtistaRecord
+from .count_cache import ConteoCache
+from .calendar_feed import render_ics, etag_for
+from .per_artist_cache import CachePorArtista
+from .tour_route import plan_route, PESO_FECHAS_DEFAULT
+from .settings import Settings, get_settings
+
+# --- CONFIGURACIÓN ---
+# La ubicación de la BD, sus PRAGMAs y los tamaños de las cachés vienen de
+# settings.py. 'config' es la configuración activa del proceso; la app la
+# activa al arrancar con acquire_config() (ej. una BD en memoria para pruebas).
+config: Settings = get_settings()
+
+# En memoria compartida la BD desaparece al cerrarse su última conexión:
+# esta conexión la mantiene viva mientras la configuración esté activa.
+_keeper: Optional[sqlite3.Connection] = None
 
 # --- FUNCIÓN DE CONEXIÓN (CORREGIDA) ---
 
@@ -15,87 +34,554 @@ def get_db_connection() -> sqlite3.Connection:
     Configura la conexión para devolver filas como diccionarios (sqlite3.Row)
     y HABILITA la coerción de llaves foráneas (FOREIGN KEY).
     """
-    conn = sqlite3.connect(DB_PATH)
+    conn = config.connect()
     conn.row_factory = sqlite3.Row
     
     # --- CAMBIO IMPORTANTE ---
     # Habilita la coerción de llaves foráneas (desactivado por defecto en SQLite)
     conn.execute("PRAGMA foreign_keys = ON;")
     # -----------------------
+
+    # Con varios workers (procesos) compartiendo el archivo, espera hasta
+    # config.busy_timeout ms (5 s por defecto) por el candado en vez de fallar
+    # de inmediato con "database is locked".
+    conn.execute(f"PRAGMA busy_timeout = {int(config.busy_timeout)};")
     
     return conn
+
+# --- CONEXIONES DE SOLO LECTURA ---
+
+class ReadOnlyConnection(sqlite3.Connection):
+    """
+    Conexión de solo lectura para las rutas GET.
+    Se abre con mode=ro y query_only, de modo que nunca toma el candado de
+    escritura, y lee las páginas mediante mmap en lugar de copiarlas a la
+    caché de páginas de SQLite. En modo WAL no bloquea al escritor.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.row_factory = sqlite3.Row
+        self.execute("PRAGMA query_only = ON;")
+        self.execute(f"PRAGMA mmap_size = {int(config.mmap_size)};")
+        self.execute(f"PRAGMA busy_timeout = {int(config.busy_timeout)};")
+
+def get_read_connection(path: Optional[str] = None) -> sqlite3.Connection:
+    """
+    Abre una conexión de solo lectura (ReadOnlyConnection) sobre la BD,
+    o sobre el archivo indicado en 'path' (ej. un snapshot).
+    """
+    if path is not None:
+        return sqlite3.connect(pathlib.Path(path).as_uri() + "?mode=ro", uri=True, factory=ReadOnlyConnection)
+    return config.connect(read_only=True, factory=ReadOnlyConnection)
+
+# --- SNAPSHOT PARA ANALÍTICA ---
+# Las consultas de estadísticas (GROUP BY sobre toda la tabla) pueden leerse
+# de una copia refrescada periódicamente. Se alternan dos archivos: la copia
+# nueva se escribe en el que no está en uso y después se publica. Cada
+# proceso tiene sus propios archivos (ver Settings.snapshot_paths) y los
+# borra al detener el refresco.
+
+_snapshot_path: Optional[str] = None
+_snapshot_stop = threading.Event()
+_snapshot_thread: Optional[threading.Thread] = None
+
+def refresh_stats_snapshot() -> str:
+    """
+    Copia la BD viva al archivo de snapshot inactivo usando la API de backup
+    en línea (por bloques de páginas, sin detener a los escritores) y lo
+    publica como snapshot activo. Devuelve la ruta publicada.
+    """
+    global _snapshot_path
+    rutas = config.snapshot_paths()
+    destino = rutas[1] if _snapshot_path == rutas[0] else rutas[0]
+    src = config.connect()
+    dst = sqlite3.connect(destino)
+    try:
+        src.backup(dst, pages=256)
+    finally:
+        dst.close()
+        src.close()
+    _snapshot_path = destino
+    return destino
+
+def _snapshot_loop() -> None:
+    while not _snapshot_stop.wait(config.stats_snapshot_interval):
+        try:
+            refresh_stats_snapshot()
+        except sqlite3.Error as e:
+            # Se conserva el snapshot anterior; se reintenta en el siguiente ciclo.
+            print(f"❌ Error al refrescar el snapshot de estadísticas: {e}")
+
+def start_stats_snapshot() -> None:
+    """Crea el primer snapshot y arranca el refresco periódico (si está habilitado)."""
+    global _snapshot_thread
+    if config.stats_snapshot_interval <= 0 or _snapshot_thread is not None:
+        return
+    refresh_stats_snapshot()
+    _snapshot_stop.clear()
+    _snapshot_thread = threading.Thread(target=_snapshot_loop, name="stats-snapshot", daemon=True)
+    _snapshot_thread.start()
+
+def stop_stats_snapshot() -> None:
+    """Detiene el refresco periódico del snapshot y borra sus archivos."""
+    global _snapshot_thread, _snapshot_path
+    if _snapshot_thread is None:
+        return
+    _snapshot_stop.set()
+    _snapshot_thread.join()
+    _snapshot_thread = None
+    _snapshot_path = None
+    for ruta in config.snapshot_paths():
+        # Las lecturas en curso conservan el archivo abierto hasta terminar.
+        if os.path.exists(ruta):
+            os.remove(ruta)
+
+def get_stats_connection() -> sqlite3.Connection:
+    """Conexión para analítica: el snapshot si está activo, si no la BD viva (solo lectura)."""
+    return get_read_connection(_snapshot_path)
+
+def configure_database() -> None:
+    """
+    Ajustes persistentes del archivo de BD para servir con varios procesos.
+    journal_mode=WAL hace que los lectores no bloqueen al escritor y
+    viceversa; el modo queda guardado en el archivo, basta con fijarlo una
+    vez antes de levantar los workers.
+    """
+    if config.in_memory:
+        return  # WAL no aplica a una BD en memoria
+    conn = config.connect()
+    try:
+        conn.execute(f"PRAGMA journal_mode = {config.journal_mode};")
+    finally:
+        conn.close()
+
+def ping_db() -> bool:
+    """Verifica que la BD esté accesible y con el schema creado (para /health)."""
+    conn = None
+    try:
+        conn = get_db_connection()
+        conn.execute("SELECT 1 FROM artistas LIMIT 1").fetchall()
+        return True
+    except sqlite3.Error:
+        return False
+    finally:
+        if conn: conn.close()
+
+def warm_page_cache() -> int:
+    """
+    Lee el archivo de la BD completo para cargarlo en la caché de páginas
+    del sistema operativo. Los workers que arrancan después lo encuentran
+    en memoria. Devuelve el número de bytes leídos.
+    """
+    total = 0
+    archivo = config.database_file
+    if archivo is None or not os.path.exists(archivo):
+        return total
+    with open(archivo, 'rb') as f:
+        while True:
+            chunk = f.read(1 << 20)
+            if not chunk:
+                break
+            total += len(chunk)
+    return total
+
+def warmup() -> None:
+    """
+    Fase de calentamiento antes de aceptar tráfico: trae la BD a la caché
+    de páginas y ejecuta una vez las consultas más pesadas (estadísticas y
+    primera página de listados) para poblar la caché de SQLite.
+    Los errores de BD se propagan al llamador.
+    """
+    warm_page_cache()
+    sync_caches()
+    load_leaderboard()
+    get_stats_from_db()
+    _get_stats_por_artista()
+    get_all_artistas_from_db(1, 20)
+    get_all_conciertos_from_db(1, 10)
+    for problema in verify_conciertos_query_plans():
+        print(f"⚠️ Consulta de conciertos sin índice: {problema}")
+
+# --- ESCRITOR COMPARTIDO (GROUP COMMIT) ---
+
+_writer: Optional[WriteQueue] = None
+_writer_lock = threading.Lock()
+
+def get_write_connection() -> sqlite3.Connection:
+    """
+    Conexión que usa el hilo escritor. Activa el modo WAL (los lectores no
+    bloquean al escritor); con WAL, synchronous=NORMAL es seguro ante caídas
+    y evita un fsync por COMMIT. El busy_timeout ya viene de get_db_connection.
+    """
+    conn = get_db_connection()
+    conn.execute(f"PRAGMA journal_mode = {config.journal_mode};")
+    conn.execute(f"PRAGMA synchronous = {config.synchronous};")
+    return conn
+
+def get_writer() -> WriteQueue:
+    """
+    Devuelve el escritor único del proceso, creándolo la primera vez.
+    Todas las escrituras de conciertos pasan por aquí.
+    """
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = WriteQueue(get_write_connection)
+        return _writer
+
+def shutdown_writer() -> None:
+    """Vacía la cola de escritura y detiene el hilo escritor (al apagar la app)."""
+    global _writer
+    with _writer_lock:
+        writer, _writer = _writer, None
+    if writer is not None:
+        writer.stop()
+
+# --- AVISOS DE CAMBIO ---
+# Otros módulos (dashboard en vivo, cachés) se registran aquí para enterarse
+# de cada escritura confirmada. Un listener recibe (entidad, entidad_id, datos),
+# donde entidad es 'artistas' o 'conciertos' y datos son los campos escritos.
+
+ChangeListener = Callable[[str, int, Dict[str, Any]], None]
+_change_listeners: List[ChangeListener] = []
+
+def add_change_listener(listener: ChangeListener) -> None:
+    """Registra una función que se llama después de cada escritura confirmada."""
+    if listener not in _change_listeners:
+        _change_listeners.append(listener)
+
+def remove_change_listener(listener: ChangeListener) -> None:
+    if listener in _change_listeners:
+        _change_listeners.remove(listener)
+
+def _notify_change(entidad: str, entidad_id: int, datos: Dict[str, Any]) -> None:
+    for listener in list(_change_listeners):
+        listener(entidad, entidad_id, datos)
+
+# --- REGISTRO DE CAMBIOS (TABLA 'cambios') ---
+# A diferencia de los avisos en memoria, el registro vive en la BD: lo ven
+# todos los workers y los clientes pueden pedir los cambios desde su última
+# versión conocida (GET /api/cambios).
+
+def _registrar_cambio(cursor: sqlite3.Cursor, entidad: str, entidad_id: int) -> int:
+    """
+    Anota el cambio con una versión nueva, en la misma transacción que la
+    escritura (si ésta se revierte, el registro también). REPLACE borra la
+    entrada anterior del mismo registro: esa es la compactación.
+    Devuelve la versión asignada.
+    """
+    cursor.execute("INSERT OR REPLACE INTO cambios (entidad, entidad_id) VALUES (?, ?)", (entidad, entidad_id))
+    return cursor.lastrowid
+
+def get_cambios_from_db(desde: int, limit: int) -> Dict[str, Any]:
+    """
+    Devuelve los artistas y conciertos que cambiaron después de la versión
+    'desde' (en su estado actual), hasta 'limit' cambios por llamada.
+    'version' es la versión a enviar en la siguiente llamada y 'hay_mas'
+    indica si quedan cambios pendientes. Si 'desde' es mayor que la última
+    versión (la BD se reinició), 'reiniciar' pide al cliente descartar su
+    copia y sincronizar desde 0.
+    Los errores de BD se propagan a FastAPI.
+    """
+    conn = None
+    try:
+        conn = get_read_connection()
+        # Una sola transacción de lectura: todas las consultas ven la misma versión de la BD.
+        conn.execute("BEGIN")
+        version_actual = conn.execute("SELECT MAX(version) FROM cambios").fetchone()[0] or 0
+        if desde > version_actual:
+            return {"version": 0, "hay_mas": False, "reiniciar": True, "artistas": [], "conciertos": []}
+
+        rows = conn.execute(
+            "SELECT version, entidad, entidad_id FROM cambios WHERE version > ? ORDER BY version LIMIT ?",
+            (desde, limit + 1)
+        ).fetchall()
+        hay_mas = len(rows) > limit
+        rows = rows[:limit]
+
+        ids = {'artistas': [], 'conciertos': []}
+        for row in rows:
+            ids[row['entidad']].append(row['entidad_id'])
+        artistas: List[Dict[str, Any]] = []
+        conciertos: List[Dict[str, Any]] = []
+        if ids['artistas']:
+            marcadores = ', '.join('?' * len(ids['artistas']))
+            artistas = [dict(row) for row in conn.execute(
+                f"SELECT * FROM artistas WHERE id IN ({marcadores})", ids['artistas'])]
+        if ids['conciertos']:
+            marcadores = ', '.join('?' * len(ids['conciertos']))
+            conciertos = [dict(row) for row in conn.execute(
+                f"SELECT * FROM conciertos_detalle WHERE id IN ({marcadores})", ids['conciertos'])]
+            nombres = {a['id']: a['nombre'] for a in artistas}
+            faltantes = [c['artista_id'] for c in conciertos if c['artista_id'] not in nombres]
+            nombres.update((r.id, r.nombre) for r in _artistas_por_id(faltantes, conn).values())
+            for concierto in conciertos:
+                concierto['artista_nombre'] = nombres.get(concierto['artista_id'])
+
+        return {
+            "version": rows[-1]['version'] if rows else desde,
+            "hay_mas": hay_mas,
+            "reiniciar": False,
+            "artistas": artistas,
+            "conciertos": conciertos,
+        }
+    finally:
+        if conn: conn.close()
+
+# --- SINCRONIZACIÓN ENTRE PROCESOS ---
+# El ranking y las cachés en memoria se ajustan al instante con las
+# escrituras del propio proceso, pero con varios workers cada uno tiene su
+# propia copia. La tabla 'cambios' sirve de contador común: su versión
+# máxima crece con cada escritura confirmada de cualquier proceso. Antes de
+# responder desde memoria, sync_caches() compara esa versión (una consulta
+# sobre la llave primaria) con la que ya reflejan las cachés del proceso y,
+# si otro proceso escribió, aplica los registros nuevos.
+#
+# Las escrituras propias avanzan la versión del proceso con
+# _aplicar_propio() solo si nadie escribió antes que ellas; si no, la
+# siguiente sincronización las lee de la BD junto con las ajenas.
+
+_version_local: Optional[int] = None  # Versión de 'cambios' que reflejan las cachés (None: sin sincronizar)
+_sync_lock = threading.Lock()         # Serializa los cambios a las cachés
+_vigia: Optional[sqlite3.Connection] = None  # Conexión dedicada a leer la versión actual
+_vigia_lock = threading.Lock()
+
+# Registros de 'cambios' con los datos actuales que necesitan las cachés.
+_CAMBIOS_DESDE = """
+    SELECT c.entidad, c.entidad_id, a.nombre, a.popularidad, co.artista_id
+    FROM cambios c
+    LEFT JOIN artistas a ON c.entidad = 'artistas' AND a.id = c.entidad_id
+    LEFT JOIN conciertos co ON c.entidad = 'conciertos' AND co.id = c.entidad_id
+    WHERE c.version > ?
+    ORDER BY c.version
+"""
+
+def _version_db() -> int:
+    """Versión actual de la BD (la mayor de 'cambios')."""
+    global _vigia
+    with _vigia_lock:
+        if _vigia is None:
+            _vigia = config.connect(read_only=True, factory=ReadOnlyConnection, check_same_thread=False)
+        return _vigia.execute("SELECT MAX(version) FROM cambios").fetchone()[0] or 0
+
+def _reset_caches() -> None:
+    """Descarta todo lo que las cachés del proceso guardan de la BD."""
+    global _stats_artistas, _stats_artistas_version
+    leaderboard.loaded = False
+    artist_cache.clear()
+    conteo_conciertos.clear()
+    _ciudad_ids.clear()
+    _venue_ids.clear()
+    with _stats_artistas_lock:
+        _stats_artistas = None
+        _stats_artistas_version += 1
+    calendarios.clear()
+    rutas.clear()
+
+def _aplicar_cambios_externos(rows: List[sqlite3.Row]) -> None:
+    """
+    Aplica a las cachés los cambios leídos de 'cambios' (llamar con
+    _sync_lock). Además se avisa a los listeners de cambios, como si la
+    escritura hubiera sido de este proceso; por eso un listener no debe
+    llamar a sync_caches().
+    """
+    if any(row['entidad'] == 'conciertos' for row in rows):
+        # No se sabe cómo era la fila antes del cambio: los totales se recuentan.
+        conteo_conciertos.clear()
+    for row in rows:
+        if row['entidad'] == 'artistas':
+            artist_cache.invalidate(row['entidad_id'])
+            if row['nombre'] is None:
+                continue
+            if leaderboard.loaded:
+                leaderboard.upsert(row['entidad_id'], row['nombre'], row['popularidad'])
+            _notify_change('artistas', row['entidad_id'], {'nombre': row['nombre'], 'popularidad': row['popularidad']})
+        elif row['artista_id'] is not None:
+            _notify_change('conciertos', row['entidad_id'], {'artista_id': row['artista_id']})
+
+def sync_caches() -> None:
+    """
+    Pone al día las cachés del proceso con las escrituras de otros procesos.
+    Sin cambios ajenos cuesta una consulta. Los errores de BD se propagan a FastAPI.
+    """
+    global _version_local
+    if config.in_memory:
+        return  # La BD en memoria es de este proceso: no hay escrituras ajenas.
+    if _version_db() == _version_local:
+        return
+    with _sync_lock:
+        conn = None
+        try:
+            conn = get_read_connection()
+            # Versión y registros de la misma transacción de lectura.
+            conn.execute("BEGIN")
+            version = conn.execute("SELECT MAX(version) FROM cambios").fetchone()[0] or 0
+            if _version_local is None or version < _version_local:
+                # Primera sincronización, o la BD se recreó (init_db) o se
+                # restauró: no se sabe qué cambió, se descarta todo.
+                _reset_caches()
+            elif version > _version_local:
+                _aplicar_cambios_externos(conn.execute(_CAMBIOS_DESDE, (_version_local,)).fetchall())
+            _version_local = version
+        finally:
+            if conn: conn.close()
+
+def _aplicar_propio(previa: int, nueva: int, ajustar: Callable[[], None]) -> None:
+    """
+    Aplica a las cachés una escritura propia ya confirmada, que ocupó las
+    versiones (previa, nueva]. Si las cachés no estaban justo en 'previa'
+    (otro proceso escribió antes, o una sincronización ya leyó esta
+    escritura), no se ajusta nada: sync_caches() lo resuelve con la BD.
+    """
+    global _version_local
+    with _sync_lock:
+        if config.in_memory:
+            ajustar()
+        elif _version_local == previa:
+            ajustar()
+            _version_local = nueva
+
+# --- RANKING DE POPULARIDAD ---
+# Índice en memoria de artistas por (popularidad desc, id). Resuelve el orden
+# del listado, el Top 10 de estadísticas y el ranking sin reordenar en SQL.
+# Se mantiene por proceso y se pone al día con sync_caches() antes de cada
+# uso, así que también refleja las escrituras de los demás workers.
+
+leaderboard = PopularityLeaderboard()
+
+def load_leaderboard() -> None:
+    """Carga (o recarga) el ranking desde la tabla de artistas."""
+    conn = None
+    try:
+        conn = get_read_connection()
+        rows = conn.execute("SELECT id, nombre, popularidad FROM artistas").fetchall()
+        leaderboard.load((row['id'], row['nombre'], row['popularidad']) for row in rows)
+    finally:
+        if conn: conn.close()
+
+def _ensure_leaderboard() -> PopularityLeaderboard:
+    sync_caches()
+    if not leaderboard.loaded:
+        # Con el candado, para que una sincronización no se cruce con la carga.
+        with _sync_lock:
+            if not leaderboard.loaded:
+                load_leaderboard()
+    return leaderboard
+
+def get_artista_ranking(artista_id: int) -> Optional[Dict[str, Any]]:
+    """
+    Devuelve la posición de un artista en el ranking de popularidad
+    o None si el artista no existe. No consulta la BD.
+    """
+    ranking = _ensure_leaderboard()
+    posicion = ranking.rank(artista_id)
+    if posicion is None:
+        return None
+    nombre, popularidad = ranking.get(artista_id)
+    return {
+        "artista_id": artista_id,
+        "nombre": nombre,
+        "popularidad": popularidad,
+        "posicion": posicion,
+        "total_artistas": len(ranking),
+    }
+
+# --- CACHÉ DE ARTISTAS ---
+# Caché LRU acotada de filas de artistas (registro compacto con __slots__).
+# Sirve los GET por ID y los datos del artista que antes salían del JOIN en
+# las consultas de conciertos. Se invalida en update_artista_in_db y, para
+# las ediciones de otros workers, en sync_caches().
+
+artist_cache = ArtistCache(config.artist_cache_size)
+
+def _artistas_por_id(ids: List[int], conn: Optional[sqlite3.Connection] = None) -> Dict[int, ArtistaRecord]:
+    """
+    Devuelve {id: ArtistaRecord} desde la caché; las IDs que falten se leen
+    en una sola consulta (usando 'conn' si se proporciona).
+    """
+    sync_caches()
+
+    def loader(faltantes: List[int]) -> List[ArtistaRecord]:
+        propia = conn is None
+        c = get_read_connection() if propia else conn
+        try:
+            rows = c.execute(
+                f"SELECT id, nombre, genero, pais, popularidad, imagen_url, biografia "
+                f"FROM artistas WHERE id IN ({', '.join('?' * len(faltantes))})",
+                faltantes
+            ).fetchall()
+            return [ArtistaRecord.from_row(row) for row in rows]
+        finally:
+            if propia: c.close()
+    return artist_cache.get_many(ids, loader)
+
+def get_artistas_inexistentes(ids: Iterable[int]) -> Set[int]:
+    """
+    Devuelve las IDs de la lista que no corresponden a ningún artista.
+    Se resuelve con el ranking y la caché de artistas; solo las IDs que no
+    están en ninguno de los dos se buscan en la BD (una consulta).
+    Permite responder 422 antes de que la FOREIGN KEY falle con un 500.
+    """
+    ranking = _ensure_leaderboard()
+    desconocidas = [artista_id for artista_id in set(ids) if ranking.get(artista_id) is None]
+    if not desconocidas:
+        return set()
+    return set(desconocidas) - set(_artistas_por_id(desconocidas))
+
 # --- MODELOS DE ARTISTAS (CRUD - CORREGIDOS) ---
 
 def get_all_artistas_from_db(page: int, limit: int) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
     """
     Obtiene una lista paginada de artistas desde la base de datos,
     ordenados por popularidad.
+    El orden y el total salen del ranking en memoria y las filas de la caché
+    de artistas; a la BD solo se le piden las que no estén en caché.
     Los errores de BD (ej. sqlite3.Error) se propagan a FastAPI.
     """
     if page < 1: page = 1
     if limit < 1 or limit > 100: limit = 10
     offset = (page - 1) * limit
-    
-    conn = None
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT COUNT(*) FROM artistas")
-        total_records = cursor.fetchone()[0]
-        total_pages = math.ceil(total_records / limit)
-        
-        query = """
-            SELECT id, nombre, genero, pais, popularidad, imagen_url, biografia
-            FROM artistas
-            ORDER BY popularidad DESC
-            LIMIT ? OFFSET ?
-        """
-        cursor.execute(query, (limit, offset))
-        artistas = [dict(row) for row in cursor.fetchall()]
-        
-        pagination_data = {
-            "page": page, "limit": limit, "total_records": total_records,
-            "total_pages": total_pages, "has_next": page < total_pages, "has_prev": page > 1
-        }
-        return artistas, pagination_data
 
-    # Se elimina el bloque 'except Exception as e' que silenciaba los errores.
-    # Los errores de BD se propagarán a FastAPI, que devolverá un 500.
-    
-    finally:
-        # El 'finally' asegura que la conexión se cierre sin importar qué pase.
-        if conn: conn.close()
+    ranking = _ensure_leaderboard()
+    total_records = len(ranking)
+    total_pages = math.ceil(total_records / limit)
+    ids = ranking.page_ids(offset, limit)
+
+    por_id = _artistas_por_id(ids) if ids else {}
+    # Se respeta el orden del ranking (popularidad desc, id).
+    artistas = [por_id[i].as_dict() for i in ids if i in por_id]
+
+    pagination_data = {
+        "page": page, "limit": limit, "total_records": total_records,
+        "total_pages": total_pages, "has_next": page < total_pages, "has_prev": page > 1
+    }
+    return artistas, pagination_data
 
 def get_artista_by_id_from_db(artista_id: int) -> Optional[Dict[str, Any]]:
     """
     Obtiene un artista específico por su ID.
     Devuelve un diccionario con los datos del artista o None si no se encuentra.
+    Los datos del artista salen de la caché (read-through).
     Los errores de BD se propagan a FastAPI.
     """
     conn = None
     try:
-        conn = get_db_connection()
+        conn = get_read_connection()
         cursor = conn.cursor()
         
-        query_artista = """
-            SELECT id, nombre, genero, pais, popularidad, imagen_url, biografia
-            FROM artistas
-            WHERE id = ?
-        """
-        cursor.execute(query_artista, (artista_id,))
-        artista_row = cursor.fetchone()
+        artista = _artistas_por_id([artista_id], conn).get(artista_id)
         
         # Esta lógica es correcta. Si no se encuentra, devuelve None
         # y el router (routes_artistas.py) lo convertirá en un 404.
-        if artista_row is None: 
+        if artista is None: 
             return None
         
         query_conciertos = "SELECT COUNT(*) FROM conciertos WHERE artista_id = ?"
         cursor.execute(query_conciertos, (artista_id,))
         total_conciertos = cursor.fetchone()[0]
         
-        artista_data = dict(artista_row)
+        artista_data = artista.as_dict()
         artista_data["total_conciertos"] = total_conciertos
         
         return artista_data
@@ -129,16 +615,58 @@ def create_artista_in_db(artista_data: Dict[str, Any]) -> int:
             artista_data.get('biografia')
         ))
         
-        conn.commit()
         # Si la inserción es exitosa, se devuelve el ID.
         # Si falla (ej. campo NOT NULL falta), se lanzará un error de BD.
-        return cursor.lastrowid 
+        nuevo_id = cursor.lastrowid
+        version = _registrar_cambio(cursor, 'artistas', nuevo_id)
+        conn.commit()
+
+        def ajustar():
+            if leaderboard.loaded:
+                leaderboard.upsert(nuevo_id, artista_data['nombre'], artista_data.get('popularidad', 50))
+        _aplicar_propio(version - 1, version, ajustar)
+        _notify_change('artistas', nuevo_id, artista_data)
+        return nuevo_id
 
     # Se elimina el bloque 'except Exception as e' que silenciaba los errores.
     
     finally:
         if conn: conn.close()
 
+def create_artistas_in_db(artistas: List[Dict[str, Any]]) -> List[int]:
+    """
+    Inserta varios artistas en una sola transacción (todos o ninguno).
+    Devuelve sus IDs en el mismo orden.
+    Los errores de BD se propagan a FastAPI.
+    """
+    conn = None
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        ids = []
+        versiones = []
+        for artista_data in artistas:
+            cursor.execute(
+                "INSERT INTO artistas (nombre, genero, pais, popularidad, imagen_url, biografia) VALUES (?, ?, ?, ?, ?, ?)",
+                (artista_data['nombre'], artista_data['genero'], artista_data['pais'],
+                 artista_data.get('popularidad', 50), artista_data.get('imagen_url'), artista_data.get('biografia'))
+            )
+            ids.append(cursor.lastrowid)
+            versiones.append(_registrar_cambio(cursor, 'artistas', cursor.lastrowid))
+        conn.commit()
+    finally:
+        if conn: conn.close()
+
+    def ajustar():
+        if leaderboard.loaded:
+            for nuevo_id, artista_data in zip(ids, artistas):
+                leaderboard.upsert(nuevo_id, artista_data['nombre'], artista_data.get('popularidad', 50))
+    if versiones:
+        _aplicar_propio(versiones[0] - 1, versiones[-1], ajustar)
+    for nuevo_id, artista_data in zip(ids, artistas):
+        _notify_change('artistas', nuevo_id, artista_data)
+    return ids
+
 def update_artista_in_db(artista_id: int, artista_data: Dict[str, Any]) -> bool:
     """
     Actualiza un artista existente en la base de datos.
@@ -166,56 +694,393 @@ def update_artista_in_db(artista_id: int, artista_data: Dict[str, Any]) -> bool:
         query = f"UPDATE artistas SET {', '.join(updates)} WHERE id = ?"
         
         cursor.execute(query, values)
+        # Devuelve True si se actualizó 1 (o más) filas
+        actualizado = cursor.rowcount > 0
+        if actualizado:
+            version = _registrar_cambio(cursor, 'artistas', artista_id)
         conn.commit()
         
-        # Devuelve True si se actualizó 1 (o más) filas
-        return cursor.rowcount > 0 
+        if actualizado:
+            artist_cache.invalidate(artista_id)
+
+            def ajustar():
+                actual = leaderboard.get(artista_id)
+                if actual is not None and ('nombre' in artista_data or 'popularidad' in artista_data):
+                    leaderboard.upsert(
+                        artista_id,
+                        artista_data.get('nombre', actual[0]),
+                        artista_data.get('popularidad', actual[1])
+                    )
+            _aplicar_propio(version - 1, version, ajustar)
+            _notify_change('artistas', artista_id, artista_data)
+        return actualizado
 
     # Se elimina el bloque 'except Exception as e' que silenciaba los errores.
     
     finally:
         if conn: conn.close()
 
-# --- MODELOS DE CONCIERTOS (CRUD - CORREGIDOS) ---
+# --- DIMENSIONES: VENUES Y CIUDADES ---
+# Venue, ciudad y país se guardan una sola vez en sus tablas y cada concierto
+# apunta a su venue con un ID entero. El escritor resuelve (interna) los
+# textos a IDs; los IDs ya confirmados se recuerdan en memoria para no
+# repetir la búsqueda. Solo el hilo escritor usa estos diccionarios.
 
-def get_all_conciertos_from_db(page: int, limit: int, artista_id: Optional[int] = None) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+_ciudad_ids: Dict[Tuple[str, str], int] = {}
+_venue_ids: Dict[Tuple[str, int], int] = {}
+
+def _resolve_ciudad_id(cursor: sqlite3.Cursor, ciudad: str, pais: str) -> int:
+    llave = (ciudad, pais)
+    ciudad_id = _ciudad_ids.get(llave)
+    if ciudad_id is not None:
+        return ciudad_id
+    cursor.execute("SELECT id FROM ciudades WHERE nombre = ? AND pais = ?", llave)
+    row = cursor.fetchone()
+    if row is not None:
+        # Solo se recuerdan filas que ya existían: una fila recién insertada
+        # podría desaparecer si la operación se revierte (ROLLBACK TO).
+        _ciudad_ids[llave] = row[0]
+        return row[0]
+    cursor.execute("INSERT INTO ciudades (nombre, pais) VALUES (?, ?)", llave)
+    return cursor.lastrowid
+
+def _resolve_venue_id(cursor: sqlite3.Cursor, venue: str, ciudad: str, pais: str,
+                      latitud: Optional[float], longitud: Optional[float]) -> int:
+    """
+    Devuelve el ID del venue (nombre, ciudad, país), creándolo si no existe.
+    Cada concierto guarda sus propias coordenadas; el venue solo toma las
+    del primer concierto que las trae y nunca se sobrescriben desde un
+    concierto (eso movería a los demás conciertos del recinto).
     """
-    Obtiene una lista paginada de conciertos, con un filtro opcional por artista_id.
+    ciudad_id = _resolve_ciudad_id(cursor, ciudad, pais)
+    llave = (venue, ciudad_id)
+    venue_id = _venue_ids.get(llave)
+    if venue_id is None:
+        cursor.execute("SELECT id FROM venues WHERE nombre = ? AND ciudad_id = ?", llave)
+        row = cursor.fetchone()
+        if row is None:
+            cursor.execute(
+                "INSERT INTO venues (nombre, ciudad_id, latitud, longitud) VALUES (?, ?, ?, ?)",
+                (venue, ciudad_id, latitud, longitud)
+            )
+            return cursor.lastrowid
+        venue_id = _venue_ids[llave] = row[0]
+    if latitud is not None and longitud is not None:
+        cursor.execute(
+            "UPDATE venues SET latitud = ?, longitud = ? WHERE id = ? AND latitud IS NULL AND longitud IS NULL",
+            (latitud, longitud, venue_id)
+        )
+    return venue_id
+
+def get_all_venues_from_db(page: int, limit: int, ciudad: Optional[str] = None,
+                           pais: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Obtiene una lista paginada de venues con su ciudad, país, coordenadas y
+    número de conciertos, con filtros opcionales por ciudad y país.
     Los errores de BD se propagan a FastAPI.
     """
     if page < 1: page = 1
     if limit < 1 or limit > 100: limit = 10
     offset = (page - 1) * limit
-    
+
     conn = None
     try:
-        conn = get_db_connection()
+        conn = get_read_connection()
         cursor = conn.cursor()
-        
-        base_query = "FROM conciertos c JOIN artistas a ON c.artista_id = a.id"
-        where_clause = ""
-        params = []
 
-        if artista_id:
-            where_clause = " WHERE c.artista_id = ?"
-            params = [artista_id]
-        
-        cursor.execute(f"SELECT COUNT(c.id) {base_query} {where_clause}", params)
+        base_query = "FROM venues v JOIN ciudades ci ON ci.id = v.ciudad_id"
+        condiciones = []
+        params: List[Any] = []
+        if ciudad:
+            condiciones.append("ci.nombre = ?")
+            params.append(ciudad)
+        if pais:
+            condiciones.append("ci.pais = ?")
+            params.append(pais)
+        where_clause = f" WHERE {' AND '.join(condiciones)}" if condiciones else ""
+
+        cursor.execute(f"SELECT COUNT(*) {base_query} {where_clause}", params)
         total_records = cursor.fetchone()[0]
         total_pages = math.ceil(total_records / limit)
-        
-        select_clause = "SELECT c.*, a.nombre as artista_nombre"
-        query = f"{select_clause} {base_query} {where_clause} ORDER BY c.fecha DESC LIMIT ? OFFSET ?"
-        
-        params.extend([limit, offset])
-        cursor.execute(query, params)
-        
-        conciertos = [dict(row) for row in cursor.fetchall()]
-        
+
+        query = f"""
+            SELECT v.id, v.nombre, ci.nombre as ciudad, ci.pais, v.latitud, v.longitud,
+                   (SELECT COUNT(*) FROM conciertos c WHERE c.venue_id = v.id) as total_conciertos
+            {base_query} {where_clause}
+            ORDER BY ci.pais, ci.nombre, v.nombre
+            LIMIT ? OFFSET ?
+        """
+        cursor.execute(query, params + [limit, offset])
+        venues = [dict(row) for row in cursor.fetchall()]
+
         pagination_data = {
             "page": page, "limit": limit, "total_records": total_records,
             "total_pages": total_pages, "has_next": page < total_pages, "has_prev": page > 1
         }
+        return venues, pagination_data
+
+    finally:
+        if conn: conn.close()
+
+# --- MODELOS DE CONCIERTOS (CRUD - CORREGIDOS) ---
+
+# --- FILTROS Y ORDEN DE CONCIERTOS (CONSTRUCTOR DE CONSULTAS) ---
+# El listado acepta varios filtros y un campo de orden. Cada combinación se
+# arma con ConciertoQuery, que además elige el índice compuesto que debe
+# usar SQLite (INDEXED BY) para que ninguna combinación termine en un
+# recorrido completo de la tabla. Los índices viven en schema.sql.
+
+# Campo de orden -> índice que ya entrega las filas en ese orden.
+ORDEN_CONCIERTOS = {
+    'fecha': 'idx_conciertos_fecha',
+    'ingresos_taquilla': 'idx_conciertos_ingresos',
+    'asistencia_real': 'idx_conciertos_asistencia',
+}
+
+# Columnas del listado: las mismas que la vista conciertos_detalle.
+_COLUMNAS_CONCIERTO = """
+    c.id, c.artista_id, c.nombre_evento,
+    v.nombre AS venue, ci.nombre AS ciudad, ci.pais AS pais,
+    c.fecha, c.status,
+    c.asistencia_proyectada, c.asistencia_real,
+    c.costos_produccion, c.ingresos_taquilla,
+    c.latitud, c.longitud,
+    c.venue_id, v.ciudad_id
+"""
+
+class ConciertoQuery:
+    """
+    Filtros y orden de un listado de conciertos sobre la tabla base.
+    Los filtros por ciudad, país y venue se resuelven antes a una lista de
+    venue_id (ver _venue_ids_para_filtro); así todos los filtros quedan
+    sobre columnas de 'conciertos' y pueden usar sus índices.
+    """
+
+    def __init__(self, artista_id: Optional[int] = None, status: Optional[str] = None,
+                 venue_ids: Optional[List[int]] = None,
+                 ingresos_min: Optional[int] = None, ingresos_max: Optional[int] = None,
+                 asistencia_min: Optional[int] = None, asistencia_max: Optional[int] = None,
+                 orden: str = 'fecha', descendente: bool = True):
+        if orden not in ORDEN_CONCIERTOS: orden = 'fecha'
+        self.artista_id = artista_id
+        self.status = status
+        self.venue_ids = venue_ids
+        self.ingresos = (ingresos_min, ingresos_max)
+        self.asistencia = (asistencia_min, asistencia_max)
+        self.orden = orden
+        self.descendente = descendente
+
+    def where(self) -> Tuple[str, List[Any]]:
+        condiciones: List[str] = []
+        params: List[Any] = []
+        if self.artista_id:
+            condiciones.append("c.artista_id = ?")
+            params.append(self.artista_id)
+        if self.status:
+            condiciones.append("c.status = ?")
+            params.append(self.status)
+        if self.venue_ids is not None:
+            condiciones.append(f"c.venue_id IN ({', '.join('?' * len(self.venue_ids))})")
+            params.extend(self.venue_ids)
+        for columna, (minimo, maximo) in (('ingresos_taquilla', self.ingresos), ('asistencia_real', self.asistencia)):
+            if minimo is not None:
+                condiciones.append(f"c.{columna} >= ?")
+                params.append(minimo)
+            if maximo is not None:
+                condiciones.append(f"c.{columna} <= ?")
+                params.append(maximo)
+        where_clause = f" WHERE {' AND '.join(condiciones)}" if condiciones else ""
+        return where_clause, params
+
+    def llave(self) -> Tuple[Any, ...]:
+        """Identifica la combinación de filtros (el orden no cambia el total)."""
+        venue_ids = tuple(sorted(self.venue_ids)) if self.venue_ids is not None else None
+        return (self.artista_id or None, self.status or None, venue_ids, self.ingresos, self.asistencia)
+
+    def cumple(self, fila: Dict[str, Any]) -> bool:
+        """Evalúa en Python el mismo WHERE de where() sobre una fila de conciertos."""
+        if self.artista_id and fila['artista_id'] != self.artista_id:
+            return False
+        if self.status and fila['status'] != self.status:
+            return False
+        if self.venue_ids is not None and fila['venue_id'] not in self.venue_ids:
+            return False
+        for columna, (minimo, maximo) in (('ingresos_taquilla', self.ingresos), ('asistencia_real', self.asistencia)):
+            valor = fila[columna]
+            if (minimo is not None or maximo is not None) and valor is None:
+                return False
+            if (minimo is not None and valor < minimo) or (maximo is not None and valor > maximo):
+                return False
+        return True
+
+    def index(self) -> str:
+        """
+        Índice a usar: primero el filtro de igualdad más selectivo (cada uno
+        tiene su índice compuesto con fecha), luego un filtro por rango y,
+        sin filtros, el índice del campo de orden.
+        """
+        if self.artista_id:
+            return 'idx_conciertos_artista_fecha'
+        if self.venue_ids is not None:
+            return 'idx_conciertos_venue_fecha'
+        if self.status:
+            return 'idx_conciertos_status_fecha'
+        if self.ingresos != (None, None):
+            return 'idx_conciertos_ingresos'
+        if self.asistencia != (None, None):
+            return 'idx_conciertos_asistencia'
+        return ORDEN_CONCIERTOS[self.orden]
+
+    def count_sql(self) -> Tuple[str, List[Any]]:
+        where_clause, params = self.where()
+        return f"SELECT COUNT(*) FROM conciertos c INDEXED BY {self.index()}{where_clause}", params
+
+    def select_sql(self, limit: int, offset: int) -> Tuple[str, List[Any]]:
+        where_clause, params = self.where()
+        direccion = "DESC" if self.descendente else "ASC"
+        # CROSS JOIN fija a 'conciertos' como tabla externa, para que el
+        # índice elegido sea el que filtra (y ordena) las filas.
+        query = f"""
+            SELECT {_COLUMNAS_CONCIERTO}
+            FROM conciertos c INDEXED BY {self.index()}
+            CROSS JOIN venues v ON v.id = c.venue_id
+            CROSS JOIN ciudades ci ON ci.id = v.ciudad_id
+            {where_clause}
+            ORDER BY c.{self.orden} {direccion}, c.id {direccion}
+            LIMIT ? OFFSET ?
+        """
+        return query, params + [limit, offset]
+
+def _venue_ids_para_filtro(cursor: sqlite3.Cursor, ciudad: Optional[str], pais: Optional[str],
+                           venue: Optional[str]) -> Optional[List[int]]:
+    """IDs de los venues que cumplen los filtros de texto, o None si no hay filtros."""
+    condiciones = []
+    params: List[Any] = []
+    for columna, valor in (("v.nombre", venue), ("ci.nombre", ciudad), ("ci.pais", pais)):
+        if valor:
+            condiciones.append(f"{columna} = ?")
+            params.append(valor)
+    if not condiciones:
+        return None
+    cursor.execute(
+        f"SELECT v.id FROM venues v JOIN ciudades ci ON ci.id = v.ciudad_id WHERE {' AND '.join(condiciones)}",
+        params
+    )
+    return [row[0] for row in cursor.fetchall()]
+
+def explain_conciertos_query(query: ConciertoQuery) -> List[str]:
+    """
+    Plan de SQLite (EXPLAIN QUERY PLAN) del listado y del conteo de una
+    combinación de filtros, una línea por paso.
+    """
+    conn = None
+    try:
+        conn = get_read_connection()
+        detalles = []
+        for sql, params in (query.select_sql(10, 0), query.count_sql()):
+            rows = conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+            detalles.extend(row['detail'] for row in rows)
+        return detalles
+    finally:
+        if conn: conn.close()
+
+def verify_conciertos_query_plans() -> List[str]:
+    """
+    Revisa el plan de cada combinación de filtros y órdenes del listado y
+    devuelve los pasos que recorren la tabla 'conciertos' sin índice
+    ('SCAN c' a secas). Una lista vacía significa que todas usan índice.
+    """
+    filtros = [
+        {}, {'artista_id': 1}, {'status': 'Confirmado'}, {'venue_ids': [1, 2]},
+        {'ingresos_min': 1000}, {'ingresos_min': 1000, 'ingresos_max': 5000},
+        {'asistencia_max': 20000}, {'status': 'Confirmado', 'ingresos_min': 1000},
+        {'artista_id': 1, 'status': 'Confirmado', 'venue_ids': [1]},
+    ]
+    problemas = []
+    for filtro in filtros:
+        for orden in ORDEN_CONCIERTOS:
+            for descendente in (True, False):
+                query = ConciertoQuery(orden=orden, descendente=descendente, **filtro)
+                for paso in explain_conciertos_query(query):
+                    if paso.startswith('SCAN c') and 'INDEX' not in paso:
+                        problemas.append(f"{filtro} orden={orden}: {paso}")
+    return problemas
+
+# Totales del listado por combinación de filtros (ver count_cache.py). Se
+# ajustan con la fila antes y después de cada alta o edición de concierto de
+# este proceso; si otro proceso cambió algún concierto, sync_caches() los
+# descarta y se vuelven a contar.
+conteo_conciertos = ConteoCache(config.count_cache_size)
+
+# Columnas de un concierto que intervienen en los filtros del listado.
+_CAMPOS_FILTRO = ('artista_id', 'status', 'venue_id', 'ingresos_taquilla', 'asistencia_real')
+
+def _fila_filtros(cursor: sqlite3.Cursor, concierto_id: int) -> Optional[Dict[str, Any]]:
+    cursor.execute(f"SELECT {', '.join(_CAMPOS_FILTRO)} FROM conciertos WHERE id = ?", (concierto_id,))
+    row = cursor.fetchone()
+    return dict(zip(_CAMPOS_FILTRO, row)) if row is not None else None
+
+def get_all_conciertos_from_db(page: int, limit: int, artista_id: Optional[int] = None,
+                               status: Optional[str] = None, ciudad: Optional[str] = None,
+                               pais: Optional[str] = None, venue: Optional[str] = None,
+                               ingresos_min: Optional[int] = None, ingresos_max: Optional[int] = None,
+                               asistencia_min: Optional[int] = None, asistencia_max: Optional[int] = None,
+                               orden: str = 'fecha', descendente: bool = True,
+                               include_total: bool = True) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Obtiene una lista paginada de conciertos con filtros opcionales (artista,
+    status, ciudad, país, venue, rango de ingresos y de asistencia real) y
+    orden por 'orden' (ver ORDEN_CONCIERTOS); empates por ID.
+    El total sale de la caché de conteos; con include_total=False no se
+    calcula (total_records y total_pages quedan en None) y has_next se
+    deduce pidiendo una fila de más.
+    El nombre del artista sale de la caché de artistas en lugar de un JOIN.
+    Los errores de BD se propagan a FastAPI.
+    """
+    if page < 1: page = 1
+    if limit < 1 or limit > 100: limit = 10
+    offset = (page - 1) * limit
+    sync_caches()
+    
+    conn = None
+    try:
+        conn = get_read_connection()
+        cursor = conn.cursor()
+
+        venue_ids = _venue_ids_para_filtro(cursor, ciudad, pais, venue)
+        query = ConciertoQuery(artista_id, status, venue_ids, ingresos_min, ingresos_max,
+                               asistencia_min, asistencia_max, orden, descendente)
+
+        if venue_ids == []:
+            # Ningún venue coincide con el filtro: no hace falta consultar conciertos.
+            conciertos, total_records = [], 0
+        elif include_total:
+            total_records = conteo_conciertos.get(query, lambda: cursor.execute(*query.count_sql()).fetchone()[0])
+            cursor.execute(*query.select_sql(limit, offset))
+            conciertos = [dict(row) for row in cursor.fetchall()]
+        else:
+            total_records = None
+            cursor.execute(*query.select_sql(limit + 1, offset))
+            conciertos = [dict(row) for row in cursor.fetchall()]
+            has_next = len(conciertos) > limit
+            del conciertos[limit:]
+
+        artistas = _artistas_por_id([c['artista_id'] for c in conciertos], conn)
+        for concierto in conciertos:
+            artista = artistas.get(concierto['artista_id'])
+            concierto['artista_nombre'] = artista.nombre if artista else None
+        
+        if total_records is None:
+            pagination_data = {
+                "page": page, "limit": limit, "total_records": None,
+                "total_pages": None, "has_next": has_next, "has_prev": page > 1
+            }
+        else:
+            total_pages = math.ceil(total_records / limit)
+            pagination_data = {
+                "page": page, "limit": limit, "total_records": total_records,
+                "total_pages": total_pages, "has_next": page < total_pages, "has_prev": page > 1
+            }
         return conciertos, pagination_data
 
     # Se elimina el bloque 'except Exception as e' que silenciaba los errores.
@@ -226,27 +1091,27 @@ def get_all_conciertos_from_db(page: int, limit: int, artista_id: Optional[int]
 def get_concierto_by_id_from_db(concierto_id: int) -> Optional[Dict[str, Any]]:
     """
     Obtiene un concierto específico por su ID.
+    Los datos del artista (nombre, género, país) salen de la caché de artistas.
     Devuelve None si no se encuentra.
     Los errores de BD se propagan a FastAPI.
     """
     conn = None
     try:
-        conn = get_db_connection()
+        conn = get_read_connection()
         cursor = conn.cursor()
         
-        query = """
-            SELECT c.*, a.nombre as artista_nombre, a.genero as artista_genero, a.pais as artista_pais
-            FROM conciertos c
-            JOIN artistas a ON c.artista_id = a.id
-            WHERE c.id = ?
-        """
-        cursor.execute(query, (concierto_id,))
+        cursor.execute("SELECT * FROM conciertos_detalle WHERE id = ?", (concierto_id,))
         concierto_row = cursor.fetchone()
         
         if concierto_row is None:
             return None # Lógica de 404 (No Encontrado)
         
-        return dict(concierto_row)
+        concierto = dict(concierto_row)
+        artista = _artistas_por_id([concierto['artista_id']], conn).get(concierto['artista_id'])
+        concierto['artista_nombre'] = artista.nombre if artista else None
+        concierto['artista_genero'] = artista.genero if artista else None
+        concierto['artista_pais'] = artista.pais if artista else None
+        return concierto
 
     # Se elimina el bloque 'except Exception as e' que silenciaba los errores.
     
@@ -257,30 +1122,36 @@ def create_concierto_in_db(concierto_data: Dict[str, Any]) -> int:
     """
     Inserta un nuevo concierto en la base de datos.
     Devuelve el ID del concierto recién creado.
+    La inserción se delega al escritor compartido, que la agrupa con otras
+    escrituras concurrentes en una sola transacción.
     Los errores de BD (ej. FOREIGN KEY constraint) se propagan a FastAPI.
     """
-    conn = None
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Se elimina la verificación manual del artista_id.
-        # Si el artista_id no existe, la restricción FOREIGN KEY de la BD
-        # lanzará un 'sqlite3.IntegrityError' que FastAPI atrapará como 500.
-        
-        query = """
-            INSERT INTO conciertos 
-            (artista_id, nombre_evento, venue, ciudad, pais, fecha, status, 
-             asistencia_proyectada, asistencia_real, costos_produccion, ingresos_taquilla, 
-             latitud, longitud) 
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """
-        cursor.execute(query, (
-            concierto_data['artista_id'],
-            concierto_data['nombre_evento'],
+    # La ruta verifica antes el artista_id (422 si no existe, con la caché
+    # de artistas); la restricción FOREIGN KEY de la BD queda como respaldo
+    # y lanzaría un 'sqlite3.IntegrityError' que FastAPI atrapa como 500.
+
+    query = """
+        INSERT INTO conciertos 
+        (artista_id, nombre_evento, venue_id, fecha, status, 
+         asistencia_proyectada, asistencia_real, costos_produccion, ingresos_taquilla,
+         latitud, longitud) 
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """
+
+    def _insert(cursor: sqlite3.Cursor) -> Tuple[int, Dict[str, Any], int]:
+        # El venue (y su ciudad) se resuelven a IDs dentro de la misma transacción.
+        venue_id = _resolve_venue_id(
+            cursor,
             concierto_data['venue'],
             concierto_data['ciudad'],
             concierto_data['pais'],
+            concierto_data.get('latitud'),
+            concierto_data.get('longitud')
+        )
+        cursor.execute(query, (
+            concierto_data['artista_id'],
+            concierto_data['nombre_evento'],
+            venue_id,
             concierto_data['fecha'],
             concierto_data.get('status', 'Planeado'),
             concierto_data.get('asistencia_proyectada'),
@@ -290,122 +1161,548 @@ def create_concierto_in_db(concierto_data: Dict[str, Any]) -> int:
             concierto_data.get('latitud'),
             concierto_data.get('longitud')
         ))
-        
-        conn.commit()
-        return cursor.lastrowid
+        nuevo_id = cursor.lastrowid
+        version = _registrar_cambio(cursor, 'conciertos', nuevo_id)
+        return nuevo_id, _fila_filtros(cursor, nuevo_id), version
 
-    # Se elimina el bloque 'except Exception as e' que silenciaba los errores.
-    
-    finally:
-        if conn: conn.close()
+    # El Future se resuelve después del COMMIT del lote; si la operación
+    # falló, .result() relanza el error de BD original.
+    with conteo_conciertos.escritura():
+        nuevo_id, fila, version = get_writer().execute(_insert)
+        _aplicar_propio(version - 1, version, lambda: conteo_conciertos.ajustar(None, fila))
+    _notify_change('conciertos', nuevo_id, concierto_data)
+    return nuevo_id
+
+def create_conciertos_in_db(conciertos: List[Dict[str, Any]]) -> List[int]:
+    """
+    Inserta varios conciertos como UNA operación del escritor compartido:
+    quedan en la misma transacción (todos o ninguno) y el resto de las
+    escrituras espera solo lo que tarda el lote. Devuelve las IDs en el
+    mismo orden. Los errores de BD se propagan a FastAPI.
+    """
+    query = """
+        INSERT INTO conciertos 
+        (artista_id, nombre_evento, venue_id, fecha, status, 
+         asistencia_proyectada, asistencia_real, costos_produccion, ingresos_taquilla,
+         latitud, longitud) 
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """
+
+    def _insert_lote(cursor: sqlite3.Cursor) -> Tuple[List[Tuple[int, Dict[str, Any]]], List[int]]:
+        creados = []
+        versiones = []
+        for concierto_data in conciertos:
+            venue_id = _resolve_venue_id(
+                cursor,
+                concierto_data['venue'],
+                concierto_data['ciudad'],
+                concierto_data['pais'],
+                concierto_data.get('latitud'),
+                concierto_data.get('longitud')
+            )
+            cursor.execute(query, (
+                concierto_data['artista_id'],
+                concierto_data['nombre_evento'],
+                venue_id,
+                concierto_data['fecha'],
+                concierto_data.get('status', 'Planeado'),
+                concierto_data.get('asistencia_proyectada'),
+                concierto_data.get('asistencia_real'),
+                concierto_data.get('costos_produccion'),
+                concierto_data.get('ingresos_taquilla'),
+                concierto_data.get('latitud'),
+                concierto_data.get('longitud')
+            ))
+            nuevo_id = cursor.lastrowid
+            versiones.append(_registrar_cambio(cursor, 'conciertos', nuevo_id))
+            creados.append((nuevo_id, _fila_filtros(cursor, nuevo_id)))
+        return creados, versiones
+
+    with conteo_conciertos.escritura():
+        creados, versiones = get_writer().execute(_insert_lote)
+
+        def ajustar():
+            for _, fila in creados:
+                conteo_conciertos.ajustar(None, fila)
+        if versiones:
+            _aplicar_propio(versiones[0] - 1, versiones[-1], ajustar)
+    for (nuevo_id, _), concierto_data in zip(creados, conciertos):
+        _notify_change('conciertos', nuevo_id, concierto_data)
+    return [nuevo_id for nuevo_id, _ in creados]
 
 def update_concierto_in_db(concierto_id: int, concierto_data: Dict[str, Any]) -> bool:
     """
     Actualiza un concierto existente en la base de datos.
     Solo actualiza los campos proporcionados en concierto_data.
+    La actualización se ejecuta a través del escritor compartido.
+    Los errores de BD se propagan a FastAPI.
+    """
+    updates = []
+    values = []
+    
+    updatable_fields = [
+        'artista_id', 'nombre_evento', 'fecha', 'status', 
+        'asistencia_proyectada', 'asistencia_real', 'costos_produccion', 'ingresos_taquilla',
+        'latitud', 'longitud'
+    ]
+    # Estos campos viven en las tablas de venues/ciudades: si llega alguno,
+    # se vuelve a resolver el venue_id del concierto.
+    venue_fields = ['venue', 'ciudad', 'pais']
+    
+    for field in updatable_fields:
+        if field in concierto_data:
+            updates.append(f"{field} = ?")
+            values.append(concierto_data[field])
+    cambia_venue = any(field in concierto_data for field in venue_fields)
+    
+    if not updates and not cambia_venue:
+        print("No hay campos para actualizar")
+        return False # Lógica de negocio (400), no un error 500
+
+    def _update(cursor: sqlite3.Cursor) -> Tuple[int, Optional[Dict[str, Any]], Optional[Dict[str, Any]], int]:
+        campos = list(updates)
+        valores = list(values)
+        # Fila antes y después del cambio, para ajustar los conteos del listado.
+        anterior = _fila_filtros(cursor, concierto_id)
+        if anterior is None:
+            return 0, None, None, 0
+        if cambia_venue:
+            cursor.execute(
+                "SELECT venue, ciudad, pais FROM conciertos_detalle WHERE id = ?",
+                (concierto_id,)
+            )
+            actual = cursor.fetchone()
+            # Los campos no enviados conservan su valor actual.
+            datos = {field: concierto_data.get(field, actual[field]) for field in venue_fields}
+            campos.append("venue_id = ?")
+            valores.append(_resolve_venue_id(cursor, datos['venue'], datos['ciudad'], datos['pais'],
+                                             concierto_data.get('latitud'), concierto_data.get('longitud')))
+        valores.append(concierto_id)
+        cursor.execute(f"UPDATE conciertos SET {', '.join(campos)} WHERE id = ?", valores)
+        filas = cursor.rowcount
+        version = _registrar_cambio(cursor, 'conciertos', concierto_id) if filas > 0 else 0
+        return filas, anterior, _fila_filtros(cursor, concierto_id), version
+
+    with conteo_conciertos.escritura():
+        filas, anterior, nueva, version = get_writer().execute(_update)
+        if filas > 0:
+            _aplicar_propio(version - 1, version, lambda: conteo_conciertos.ajustar(anterior, nueva))
+    actualizado = filas > 0
+    if actualizado:
+        _notify_change('conciertos', concierto_id, concierto_data)
+    return actualizado
+
+# --- PRÓXIMOS CONCIERTOS POR ARTISTA ---
+
+def get_proximos_conciertos_from_db(por_artista: int, desde: str) -> List[Dict[str, Any]]:
+    """
+    Devuelve los próximos 'por_artista' conciertos de cada artista con fecha
+    >= 'desde' (ISO 8601 en UTC), sin contar los cancelados; ordenados por
+    artista y fecha. ROW_NUMBER() numera los conciertos de cada artista
+    recorriendo idx_conciertos_artista_fecha, que ya los entrega en orden
+    (artista_id, fecha), así que la ventana no necesita ordenar.
     Los errores de BD se propagan a FastAPI.
     """
     conn = None
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        conn = get_read_connection()
+        rows = conn.execute(f"""
+            SELECT {_COLUMNAS_CONCIERTO}
+            FROM (
+                SELECT id, ROW_NUMBER() OVER (PARTITION BY artista_id ORDER BY fecha, id) AS posicion
+                FROM conciertos INDEXED BY idx_conciertos_artista_fecha
+                WHERE fecha >= ? AND status != 'Cancelado'
+            ) p
+            CROSS JOIN conciertos c ON c.id = p.id
+            CROSS JOIN venues v ON v.id = c.venue_id
+            CROSS JOIN ciudades ci ON ci.id = v.ciudad_id
+            WHERE p.posicion <= ?
+            ORDER BY c.artista_id, c.fecha, c.id
+        """, (desde, por_artista)).fetchall()
+        conciertos = [dict(row) for row in rows]
+        artistas = _artistas_por_id([c['artista_id'] for c in conciertos], conn)
+        for concierto in conciertos:
+            artista = artistas.get(concierto['artista_id'])
+            concierto['artista_nombre'] = artista.nombre if artista else None
+        return conciertos
+    finally:
+        if conn: conn.close()
 
-        updates = []
-        values = []
-        
-        updatable_fields = [
-            'artista_id', 'nombre_evento', 'venue', 'ciudad', 'pais', 'fecha', 'status', 
-            'asistencia_proyectada', 'asistencia_real', 'costos_produccion', 'ingresos_taquilla', 
-            'latitud', 'longitud'
-        ]
-        
-        for field in updatable_fields:
-            if field in concierto_data:
-                updates.append(f"{field} = ?")
-                values.append(concierto_data[field])
-        
-        if not updates:
-            print("No hay campos para actualizar")
-            return False # Lógica de negocio (400), no un error 500
-        
-        values.append(concierto_id)
-        query = f"UPDATE conciertos SET {', '.join(updates)} WHERE id = ?"
-        
-        cursor.execute(query, values)
-        conn.commit()
-        
-        return cursor.rowcount > 0
+# --- CALENDARIOS iCalendar POR ARTISTA ---
+# El .ics de cada artista se genera una vez y se sirve desde memoria hasta
+# que cambia alguno de sus conciertos o su nombre. Los clientes suscritos
+# consultan cada pocos minutos, así que casi todas las peticiones son
+# aciertos (o un 304 si mandan If-None-Match).
 
-    # Se elimina el bloque 'except Exception as e' que silenciaba los errores.
-    
+calendarios = CachePorArtista()
+add_change_listener(calendarios.on_change)
+
+def get_calendario_artista(artista_id: int) -> Optional[Tuple[str, str]]:
+    """
+    Devuelve (contenido .ics, ETag) del calendario del artista, o None si el
+    artista no existe. Los errores de BD se propagan a FastAPI.
+    """
+    sync_caches()
+
+    def cargar():
+        conn = None
+        try:
+            conn = get_read_connection()
+            artista = _artistas_por_id([artista_id], conn).get(artista_id)
+            if artista is None:
+                return None
+            # Última modificación del concierto o del artista (su nombre va
+            # en cada evento), según el registro de cambios: es el DTSTAMP.
+            conciertos = conn.execute("""
+                SELECT d.*, MAX(COALESCE(cc.fecha, ''), COALESCE(ca.fecha, '')) AS modificado
+                FROM conciertos_detalle d
+                LEFT JOIN cambios cc ON cc.entidad = 'conciertos' AND cc.entidad_id = d.id
+                LEFT JOIN cambios ca ON ca.entidad = 'artistas' AND ca.entidad_id = d.artista_id
+                WHERE d.artista_id = ? ORDER BY d.fecha, d.id
+            """, (artista_id,)).fetchall()
+        finally:
+            if conn: conn.close()
+        ics = render_ics(artista.nombre, conciertos)
+        return (ics, etag_for(ics)), [row['id'] for row in conciertos]
+
+    return calendarios.get(artista_id, cargar)
+
+# --- RUTA DE GIRA POR ARTISTA ---
+# Ordena los conciertos de un artista en una ruta de viaje (ver
+# tour_route.py). El cálculo es O(n²) por pasada de 2-opt, así que la ruta
+# con el peso por defecto se guarda por artista hasta que cambia alguno de
+# sus conciertos. Con otro peso_fechas se calcula en cada petición: guardar
+# cualquier float que llegue en la URL haría crecer la caché sin límite.
+# Los conciertos cancelados no forman parte de la ruta.
+
+rutas = CachePorArtista()
+add_change_listener(rutas.on_change)
+
+def get_ruta_artista(artista_id: int, peso_fechas: float = PESO_FECHAS_DEFAULT) -> Optional[Dict[str, Any]]:
+    """
+    Devuelve la ruta de gira del artista (paradas, distancia por tramo y
+    total) o None si el artista no existe. Los errores de BD se propagan a FastAPI.
+    """
+    sync_caches()
+
+    def cargar():
+        conn = None
+        try:
+            conn = get_read_connection()
+            artista = _artistas_por_id([artista_id], conn).get(artista_id)
+            if artista is None:
+                return None
+            conciertos = [dict(row) for row in conn.execute(
+                "SELECT * FROM conciertos_detalle WHERE artista_id = ? ORDER BY fecha, id", (artista_id,)
+            ).fetchall()]
+        finally:
+            if conn: conn.close()
+        ruta = plan_route([c for c in conciertos if c['status'] != 'Cancelado'], peso_fechas)
+        ruta = {"artista_id": artista_id, "artista_nombre": artista.nombre, **ruta}
+        return ruta, [c['id'] for c in conciertos]
+
+    if peso_fechas != PESO_FECHAS_DEFAULT:
+        resultado = cargar()
+        return resultado[0] if resultado is not None else None
+    return rutas.get(artista_id, cargar)
+
+# --- MODELO DE ESTADÍSTICAS (CORREGIDO) ---
+# Las estadísticas se agrupan por filtro: los KPIs financieros y de asistencia
+# comparten WHERE status = 'Confirmado' y salen de UN solo recorrido; el Top
+# de artistas sale del ranking en memoria; y la rentabilidad por ciudad es
+# independiente. Las consultas independientes corren en paralelo, cada una
+# con su propia conexión de lectura, así que la latencia total se acerca a la
+# de la consulta más lenta.
+
+# Con CONCIERTOS_DEBUG=1 (config.debug), GET /api/estadisticas/?debug=true
+# incluye el tiempo de cada agregado.
+
+_stats_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="stats")
+
+def _run_stats_query(fn: Callable[[sqlite3.Cursor], Any], usar_snapshot: bool = True) -> Tuple[Any, float]:
+    """Ejecuta un agregado con su propia conexión; devuelve (resultado, milisegundos)."""
+    inicio = time.perf_counter()
+    conn = None
+    try:
+        conn = get_stats_connection() if usar_snapshot else get_read_connection()
+        resultado = fn(conn.cursor())
     finally:
         if conn: conn.close()
+    return resultado, (time.perf_counter() - inicio) * 1000
 
-# --- MODELO DE ESTADÍSTICAS (CORREGIDO) ---
+def _stats_confirmados(cursor: sqlite3.Cursor) -> Dict[str, Any]:
+    """KPIs financieros y de asistencia en un solo recorrido de los conciertos confirmados."""
+    cursor.execute("""
+        SELECT 
+            SUM(ingresos_taquilla) as total_ingresos, 
+            SUM(costos_produccion) as total_costos,
+            SUM(asistencia_proyectada) as total_proyectado, 
+            SUM(asistencia_real) as total_real
+        FROM conciertos
+        WHERE status = 'Confirmado'
+    """)
+    row = cursor.fetchone()
+    total_ingresos = row['total_ingresos'] or 0
+    total_costos = row['total_costos'] or 0
+    total_proyectado = row['total_proyectado'] or 0
+    total_real = row['total_real'] or 0
+    return {
+        "kpis_financieros": {
+            "total_ingresos": total_ingresos,
+            "total_costos": total_costos,
+            "ganancia_neta": total_ingresos - total_costos
+        },
+        "kpis_asistencia": {
+            "total_asistencia_proyectada": total_proyectado,
+            "total_asistencia_real": total_real,
+            "tasa_cumplimiento_asistencia": (total_real / total_proyectado * 100) if total_proyectado > 0 else 0
+        },
+    }
 
-def get_stats_from_db() -> Dict[str, Any]:
+def _stats_rentabilidad_ciudad(cursor: sqlite3.Cursor) -> List[Dict[str, Any]]:
+    """Top 5 de ciudades por ganancia neta (agrupando por el ID entero de la ciudad)."""
+    cursor.execute("""
+        SELECT ci.nombre as ciudad, t.ganancia_neta_ciudad
+        FROM (
+            SELECT 
+                v.ciudad_id, 
+                SUM(c.ingresos_taquilla) - SUM(c.costos_produccion) as ganancia_neta_ciudad
+            FROM conciertos c
+            JOIN venues v ON v.id = c.venue_id
+            WHERE c.status = 'Confirmado'
+            GROUP BY v.ciudad_id
+            ORDER BY ganancia_neta_ciudad DESC
+            LIMIT 5
+        ) t
+        JOIN ciudades ci ON ci.id = t.ciudad_id
+        ORDER BY t.ganancia_neta_ciudad DESC
+    """)
+    return [dict(row) for row in cursor.fetchall()]
+
+def get_stats_from_db(debug: bool = False, usar_snapshot: bool = True) -> Dict[str, Any]:
     """
     Obtiene un resumen de estadísticas clave para el dashboard del manager.
+    Lee del snapshot de analítica si está habilitado, para que los GROUP BY
+    sobre toda la tabla no compitan con los escritores; con
+    usar_snapshot=False lee la BD viva (el dashboard en vivo, que recalcula
+    justo después de una escritura).
+    Si debug=True, agrega '_tiempos_ms' con la duración de cada agregado.
     Los errores de BD se propagan a FastAPI.
     """
+    inicio = time.perf_counter()
+
+    # Agregados independientes en paralelo (cada uno con su conexión).
+    futuro_confirmados = _stats_executor.submit(_run_stats_query, _stats_confirmados, usar_snapshot)
+    futuro_ciudades = _stats_executor.submit(_run_stats_query, _stats_rentabilidad_ciudad, usar_snapshot)
+
+    # 1. Top 10 artistas por popularidad (desde el ranking en memoria, sin ORDER BY)
+    inicio_top = time.perf_counter()
+    top_artistas = _ensure_leaderboard().top(10)
+    tiempo_top = (time.perf_counter() - inicio_top) * 1000
+
+    # 2 y 3. KPIs financieros y de asistencia (un solo recorrido)
+    kpis, tiempo_confirmados = futuro_confirmados.result()
+    # 4. Rentabilidad por Ciudad
+    rentabilidad_ciudad, tiempo_ciudades = futuro_ciudades.result()
+
+    estadisticas = {
+        **kpis,
+        "grafica_top_artistas": top_artistas,
+        "grafica_rentabilidad_ciudad": rentabilidad_ciudad
+    }
+    if debug:
+        estadisticas["_tiempos_ms"] = {
+            "kpis_confirmados": round(tiempo_confirmados, 3),
+            "rentabilidad_ciudad": round(tiempo_ciudades, 3),
+            "top_artistas": round(tiempo_top, 3),
+            "total": round((time.perf_counter() - inicio) * 1000, 3),
+        }
+    return estadisticas
+
+# --- ESTADÍSTICAS POR ARTISTA ---
+# Todas las cifras por artista se calculan en UN solo recorrido agrupado sobre
+# conciertos (GROUP BY artista_id) y se guardan en caché hasta que cambie
+# algún concierto o artista, en este proceso o en otro (ver
+# _invalidate_stats_por_artista y sync_caches).
+
+# Campos por los que se puede ordenar el listado de estadísticas por artista.
+ORDEN_STATS_ARTISTAS = (
+    'ganancia_neta', 'total_ingresos', 'total_costos', 'total_asistencia_real',
+    'tasa_cumplimiento_asistencia', 'total_conciertos', 'conciertos_confirmados', 'artista_id'
+)
+
+_stats_artistas: Optional[Dict[int, Dict[str, Any]]] = None
+_stats_artistas_version = 0
+_stats_artistas_lock = threading.Lock()
+
+def _invalidate_stats_por_artista(entidad: str, entidad_id: int, datos: Dict[str, Any]) -> None:
+    global _stats_artistas, _stats_artistas_version
+    if entidad == 'artistas' and 'nombre' not in datos:
+        return  # Solo el nombre del artista forma parte de estas estadísticas.
+    with _stats_artistas_lock:
+        _stats_artistas = None
+        _stats_artistas_version += 1
+
+add_change_listener(_invalidate_stats_por_artista)
+
+def _compute_stats_por_artista() -> Dict[int, Dict[str, Any]]:
+    """
+    Calcula las estadísticas de todos los artistas con una sola consulta
+    agrupada. Como en get_stats_from_db, las cifras financieras y de
+    asistencia solo cuentan conciertos con status 'Confirmado'.
+    """
     conn = None
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # 1. Top 10 artistas por popularidad
-        cursor.execute("SELECT nombre, popularidad FROM artistas ORDER BY popularidad DESC LIMIT 10")
-        top_artistas = [dict(row) for row in cursor.fetchall()]
-        
-        # 2. Total de Ganancia Neta
-        cursor.execute("""
-            SELECT SUM(ingresos_taquilla) as total_ingresos, SUM(costos_produccion) as total_costos
-            FROM conciertos
-            WHERE status = 'Confirmado'
-        """)
-        financiero_row = cursor.fetchone()
-        total_ingresos = financiero_row['total_ingresos'] or 0
-        total_costos = financiero_row['total_costos'] or 0
-        ganancia_neta = total_ingresos - total_costos
-        
-        # 3. Comparación Asistencia
-        cursor.execute("""
-            SELECT SUM(asistencia_proyectada) as total_proyectado, SUM(asistencia_real) as total_real
-            FROM conciertos
-            WHERE status = 'Confirmado'
-        """)
-        asistencia_row = cursor.fetchone()
-        total_proyectado = asistencia_row['total_proyectado'] or 0
-        total_real = asistencia_row['total_real'] or 0
-        
-        # 4. Rentabilidad por Ciudad
-        cursor.execute("""
-            SELECT 
-                ciudad, 
-                SUM(ingresos_taquilla) - SUM(costos_produccion) as ganancia_neta_ciudad
+        conn = get_read_connection()
+        rows = conn.execute("""
+            SELECT
+                artista_id,
+                COUNT(*) as total_conciertos,
+                SUM(status = 'Confirmado') as conciertos_confirmados,
+                SUM(CASE WHEN status = 'Confirmado' THEN ingresos_taquilla END) as total_ingresos,
+                SUM(CASE WHEN status = 'Confirmado' THEN costos_produccion END) as total_costos,
+                SUM(CASE WHEN status = 'Confirmado' THEN asistencia_proyectada END) as total_proyectado,
+                SUM(CASE WHEN status = 'Confirmado' THEN asistencia_real END) as total_real
             FROM conciertos
-            WHERE status = 'Confirmado'
-            GROUP BY ciudad
-            ORDER BY ganancia_neta_ciudad DESC
-            LIMIT 5
-        """)
-        rentabilidad_ciudad = [dict(row) for row in cursor.fetchall()]
-        
-        return {
-            "kpis_financieros": {
-                "total_ingresos": total_ingresos,
-                "total_costos": total_costos,
-                "ganancia_neta": ganancia_neta
-            },
-            "kpis_asistencia": {
-                "total_asistencia_proyectada": total_proyectado,
-                "total_asistencia_real": total_real,
-                "tasa_cumplimiento_asistencia": (total_real / total_proyectado * 100) if total_proyectado > 0 else 0
-            },
-            "grafica_top_artistas": top_artistas,
-            "grafica_rentabilidad_ciudad": rentabilidad_ciudad
+            GROUP BY artista_id
+        """).fetchall()
+    finally:
+        if conn: conn.close()
+
+    por_artista = {row['artista_id']: row for row in rows}
+    ranking = _ensure_leaderboard()
+    resultado: Dict[int, Dict[str, Any]] = {}
+    # Se incluyen también los artistas sin conciertos (todo en cero).
+    for artista_id in ranking.page_ids(0, len(ranking)):
+        row = por_artista.get(artista_id)
+        ingresos = (row['total_ingresos'] if row else None) or 0
+        costos = (row['total_costos'] if row else None) or 0
+        proyectado = (row['total_proyectado'] if row else None) or 0
+        real = (row['total_real'] if row else None) or 0
+        resultado[artista_id] = {
+            "artista_id": artista_id,
+            "nombre": ranking.get(artista_id)[0],
+            "total_conciertos": row['total_conciertos'] if row else 0,
+            "conciertos_confirmados": (row['conciertos_confirmados'] if row else None) or 0,
+            "total_ingresos": ingresos,
+            "total_costos": costos,
+            "ganancia_neta": ingresos - costos,
+            "total_asistencia_proyectada": proyectado,
+            "total_asistencia_real": real,
+            "tasa_cumplimiento_asistencia": (real / proyectado * 100) if proyectado > 0 else 0,
         }
+    return resultado
 
-    
-    finally:
-        if conn: conn.close()
\ No newline at end of file
+def _get_stats_por_artista() -> Dict[int, Dict[str, Any]]:
+    """Devuelve las estadísticas por artista desde la caché, recalculando si fue invalidada."""
+    global _stats_artistas
+    sync_caches()
+    cache = _stats_artistas
+    if cache is not None:
+        return cache
+    version = _stats_artistas_version
+    calculado = _compute_stats_por_artista()
+    with _stats_artistas_lock:
+        # Si hubo una escritura mientras se calculaba, no se guarda (quedaría desactualizado).
+        if version == _stats_artistas_version:
+            _stats_artistas = calculado
+    return calculado
+
+def get_stats_artista_from_db(artista_id: int) -> Optional[Dict[str, Any]]:
+    """
+    Estadísticas de un artista (ingresos, costos, ganancia, asistencia y
+    número de conciertos). Devuelve None si el artista no existe.
+    """
+    return _get_stats_por_artista().get(artista_id)
+
+def get_stats_artistas_from_db(page: int, limit: int, orden: str = 'ganancia_neta',
+                               descendente: bool = True) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Listado paginado de las estadísticas de todos los artistas, ordenado por
+    el campo 'orden' (ver ORDEN_STATS_ARTISTAS); empates por artista_id.
+    """
+    if page < 1: page = 1
+    if limit < 1 or limit > 100: limit = 10
+    if orden not in ORDEN_STATS_ARTISTAS: orden = 'ganancia_neta'
+    offset = (page - 1) * limit
+
+    filas = list(_get_stats_por_artista().values())
+    filas.sort(key=lambda f: f['artista_id'])
+    filas.sort(key=lambda f: f[orden], reverse=descendente)
+
+    total_records = len(filas)
+    total_pages = math.ceil(total_records / limit)
+    pagination_data = {
+        "page": page, "limit": limit, "total_records": total_records,
+        "total_pages": total_pages, "has_next": page < total_pages, "has_prev": page > 1
+    }
+    return filas[offset:offset + limit], pagination_data
+
+# --- CAMBIO DE CONFIGURACIÓN ---
+
+# Apps en marcha que usan la configuración activa (ver acquire_config).
+_apps_activas = 0
+_apps_lock = threading.Lock()
+
+def configure(nueva: Optional[Settings] = None) -> Settings:
+    """
+    Activa otra configuración en el proceso. Detiene el escritor y el
+    snapshot de la configuración anterior y vacía todas las cachés en
+    memoria, que pertenecían a la otra BD.
+    Solo hay una configuración activa por proceso: lanza RuntimeError si hay
+    una app en marcha con otra configuración. Para pruebas de carga en
+    paralelo, usar procesos separados.
+    """
+    global config, _keeper, _vigia, _version_local, artist_cache, conteo_conciertos
+    nueva = nueva or get_settings()
+    if nueva is config and (_keeper is not None or not nueva.in_memory):
+        return config
+    if _apps_activas and nueva.as_dict() != config.as_dict():
+        raise RuntimeError(f"Ya hay una app en marcha con {config!r}: no se puede activar {nueva!r} "
+                           "en el mismo proceso.")
+
+    stop_stats_snapshot()
+    shutdown_writer()
+    if _keeper is not None:
+        _keeper.close()
+        _keeper = None
+    with _vigia_lock:
+        if _vigia is not None:
+            _vigia.close()
+            _vigia = None
+    _version_local = None
+    config = nueva
+    if config.in_memory:
+        _keeper = config.connect(check_same_thread=False)  # Se abre y se cierra desde lifespans distintos
+
+    artist_cache = ArtistCache(config.artist_cache_size)
+    conteo_conciertos = ConteoCache(config.count_cache_size)
+    _reset_caches()
+    return config
+
+def acquire_config(nueva: Settings) -> bool:
+    """
+    Activa la configuración de una app que arranca (lo llama su lifespan).
+    Varias apps pueden estar en marcha a la vez solo si usan la misma
+    configuración; si no, lanza RuntimeError y la app no arranca (antes la
+    segunda cambiaba en silencio la BD de la primera).
+    Devuelve True si es la primera app en usarla: solo esa crea la BD
+    desechable, las demás comparten la que ya existe.
+    """
+    global _apps_activas
+    with _apps_lock:
+        primera = not (_apps_activas and nueva.as_dict() == config.as_dict())
+        if primera:
+            configure(nueva)
+        _apps_activas += 1
+    return primera
+
+def release_config() -> bool:
+    """
+    La app deja de usar la configuración activa (al apagarse). Devuelve
+    True si era la última app que la usaba.
+    """
+    global _apps_activas
+    with _apps_lock:
+        _apps_activas = max(_apps_activas - 1, 0)
+        return _apps_activas == 0
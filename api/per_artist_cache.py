@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+import threading
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Set, Tuple
+
+# --- CACHÉ DE VISTAS POR ARTISTA ---
+# Guarda resultados que se calculan a partir de los conciertos de un
+# artista (el calendario .ics, la ruta de gira) hasta que alguno de esos
+# conciertos cambia. Cada entrada recuerda los IDs de conciertos de los que
+# salió, así que al cambiar un concierto de artista se invalidan el
+# calendario/ruta de ambos artistas. Se registra como listener de cambios
+# (ver add_change_listener en models.py).
+
+Cargador = Callable[[], Optional[Tuple[Any, Iterable[int]]]]
+
+
+class CachePorArtista:
+    """
+    Valores por (artista_id, variante). El cargador devuelve (valor, ids de
+    conciertos usados) o None si el artista no existe (no se guarda).
+    """
+
+    def __init__(self):
+        self._valores: Dict[Tuple[int, Hashable], Any] = {}
+        self._llaves: Dict[int, Set[Tuple[int, Hashable]]] = {}  # artista_id -> llaves en caché
+        self._conciertos: Dict[int, Set[int]] = {}               # artista_id -> conciertos usados
+        self._artista_de_concierto: Dict[int, int] = {}          # concierto_id -> artista_id
+        self._version = 0  # Aumenta en cada invalidación
+        self._lock = threading.Lock()
+
+    def get(self, artista_id: int, cargador: Cargador, variante: Hashable = None) -> Optional[Any]:
+        llave = (artista_id, variante)
+        try:
+            return self._valores[llave]
+        except KeyError:
+            pass
+
+        version = self._version
+        resultado = cargador()
+        if resultado is None:
+            return None
+        valor, ids = resultado
+        with self._lock:
+            # Si hubo un cambio mientras se calculaba, no se guarda (podría estar desactualizado).
+            if version == self._version:
+                self._valores[llave] = valor
+                self._llaves.setdefault(artista_id, set()).add(llave)
+                conciertos = self._conciertos.setdefault(artista_id, set())
+                for concierto_id in ids:
+                    conciertos.add(concierto_id)
+                    self._artista_de_concierto[concierto_id] = artista_id
+        return valor
+
+    def _descartar(self, artista_id: int) -> None:
+        # Llamar con el candado tomado.
+        for llave in self._llaves.pop(artista_id, ()):
+            self._valores.pop(llave, None)
+        for concierto_id in self._conciertos.pop(artista_id, ()):
+            if self._artista_de_concierto.get(concierto_id) == artista_id:
+                del self._artista_de_concierto[concierto_id]
+
+    def on_change(self, entidad: str, entidad_id: int, datos: Dict[str, Any]) -> None:
+        """Listener de cambios: invalida solo los artistas afectados."""
+        with self._lock:
+            self._version += 1
+            if entidad == 'artistas':
+                if 'nombre' in datos:
+                    self._descartar(entidad_id)
+                return
+            # Un concierto afecta a su artista actual y, si cambió de
+            # artista, al anterior (que lo tenía en su lista).
+            afectados = {datos.get('artista_id'), self._artista_de_concierto.get(entidad_id)}
+            for artista_id in afectados - {None}:
+                self._descartar(artista_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._version += 1
+            self._valores.clear()
+            self._llaves.clear()
+            self._conciertos.clear()
+            self._artista_de_concierto.clear()
+
+    def __len__(self) -> int:
+        return len(self._valores)
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+import hmac
+from fastapi import APIRouter, Depends, Header, HTTPException, Path, Query, status
+from typing import List, Optional
+from . import models  # Importa el módulo models.py (models.config es la configuración activa)
+from . import backup  # Backup en línea de la BD (API de backup incremental de SQLite)
+from pydantic import BaseModel, Field # Importa utilidades de Pydantic
+
+# --- Seguridad ---
+def verificar_token(x_admin_token: Optional[str] = Header(None, description="Token de administración (CONCIERTOS_ADMIN_TOKEN)")):
+    """
+    Todas las rutas de administración exigen el header X-Admin-Token igual a
+    'admin_token' de la configuración. Sin token configurado quedan deshabilitadas.
+    """
+    esperado = models.config.admin_token
+    if not esperado or not x_admin_token or not hmac.compare_digest(x_admin_token.encode(), esperado.encode()):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Token de administración inválido o no configurado")
+
+# --- Router ---
+# Rutas de administración: backups de la BD sin detener la API.
+router = APIRouter(
+    prefix="/api/admin",       # Define el prefijo base para todas las rutas en este archivo.
+    tags=["Administración"],   # Agrupa estas rutas bajo la etiqueta "Administración" en la documentación.
+    dependencies=[Depends(verificar_token)],
+)
+
+# --- Schemas Pydantic (Modelos de Datos y Validación) ---
+
+# Schema con el estado de un backup (el mismo que se guarda en '<id>.json').
+class Backup(BaseModel):
+    id: str = Field(..., description="Identificador del backup (conciertos-AAAAMMDD-HHMMSS-ffffff-xxxxxx: fecha UTC con microsegundos y sufijo aleatorio)")
+    archivo: str = Field(..., description="Ruta del archivo de backup en el servidor")
+    comprimido: bool = Field(..., description="Indica si la copia está comprimida con gzip")
+    estado: str = Field(..., description="en_curso, completado o error")
+    fase: str = Field(..., description="copiando, verificando, comprimiendo o completado")
+    paginas_copiadas: int = Field(..., description="Páginas de la BD copiadas hasta ahora")
+    paginas_totales: int = Field(..., description="Páginas totales de la BD")
+    reinicios: int = Field(..., description="Veces que la copia volvió a empezar por escrituras concurrentes")
+    inicio: str = Field(..., description="Fecha de inicio (ISO 8601, UTC)")
+    fin: Optional[str] = Field(None, description="Fecha de fin (ISO 8601, UTC)")
+    bytes: Optional[int] = Field(None, description="Tamaño del archivo final")
+    error: Optional[str] = Field(None, description="Mensaje de error si el backup falló")
+
+# Schema para la respuesta de POST /backups y GET /backups/{backup_id}.
+class BackupResponse(BaseModel):
+    success: bool = Field(True, description="Indica si la solicitud fue exitosa")
+    data: Backup = Field(..., description="Estado del backup")
+
+# Schema para la respuesta de GET /backups.
+class BackupListResponse(BaseModel):
+    success: bool = Field(True, description="Indica si la solicitud fue exitosa")
+    data: List[Backup] = Field(..., description="Backups de la carpeta, del más reciente al más antiguo")
+
+
+# --- Endpoints (Definiciones de Rutas API) ---
+
+@router.post("/backups",
+             response_model=BackupResponse,
+             status_code=status.HTTP_202_ACCEPTED,
+             summary="Iniciar un backup en línea",
+             description="Copia la BD en segundo plano, en pasos pequeños para no bloquear a las peticiones. Consultar el progreso en GET /backups/{backup_id}.")
+def create_backup(comprimir: bool = Query(True, description="Comprimir la copia con gzip")):
+    """
+    Lanza el backup y responde 202 de inmediato con su estado inicial.
+    Responde 409 si este proceso ya está haciendo un backup.
+    """
+    estado = backup.start_backup(models.config, comprimir)
+    if estado is None:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Ya hay un backup en curso")
+    return {"data": estado}
+
+@router.get("/backups",
+            response_model=BackupListResponse,
+            summary="Listar backups",
+            description="Devuelve el estado de todos los backups de la carpeta de backups.")
+def get_backups():
+    return {"data": backup.list_backups(models.config)}
+
+@router.get("/backups/{backup_id}",
+            response_model=BackupResponse,
+            summary="Obtener el estado de un backup",
+            description="Devuelve el progreso (páginas copiadas, fase, reinicios) o el resultado de un backup.")
+def get_backup(backup_id: str = Path(..., pattern=backup.PATRON_ID, description="ID del backup")):
+    estado = backup.get_backup_status(backup_id, models.config)
+    if estado is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Backup {backup_id} no encontrado")
+    return {"data": estado}
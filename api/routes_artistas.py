@@ -1,7 +1,10 @@
 # -*- coding: utf-8 -*-
-from fastapi import APIRouter, HTTPException, Query, Body, status
+from fastapi import APIRouter, HTTPException, Query, Body, Header, Response, status
 from typing import List, Optional, Dict, Any
 from . import models  # Importa el módulo models.py que contiene la lógica de base de datos
+from .coalescing import request_coalescer, make_key  # Comparte resultados entre peticiones GET idénticas simultáneas
+from .routes_stats import EstadisticaArtista  # Schema de estadísticas por artista
+from . import batch_validation  # Validación de cargas masivas (TypeAdapter)
 from pydantic import BaseModel, Field # Importa utilidades de Pydantic para validación y definición de schemas
 
 # --- Router ---
@@ -65,6 +68,54 @@ class ArtistaListResponse(BaseModel):
     data: List[ArtistaResponse] = Field(..., description="Lista de artistas encontrados")
     pagination: Pagination = Field(..., description="Metadatos de la paginación")
 
+# Schema para la posición de un artista en el ranking de popularidad.
+class ArtistaRanking(BaseModel):
+    artista_id: int = Field(..., description="Identificador único del artista")
+    nombre: str = Field(..., description="Nombre del artista")
+    popularidad: Optional[int] = Field(None, description="Nivel de popularidad del artista")
+    posicion: int = Field(..., description="Posición en el ranking (1 = más popular; empates por ID ascendente)")
+    total_artistas: int = Field(..., description="Número total de artistas en el ranking")
+
+# Schema para la respuesta al solicitar el ranking de un artista (GET /{artista_id}/ranking).
+class ArtistaRankingResponse(BaseModel):
+    success: bool = Field(True, description="Indica si la solicitud fue exitosa")
+    data: ArtistaRanking = Field(..., description="Posición del artista en el ranking de popularidad")
+
+# Schema para la respuesta al solicitar las estadísticas de un artista (GET /{artista_id}/estadisticas).
+class ArtistaEstadisticasResponse(BaseModel):
+    success: bool = Field(True, description="Indica si la solicitud fue exitosa")
+    data: EstadisticaArtista = Field(..., description="Estadísticas de desempeño del artista")
+
+# Schema para una parada de la ruta de gira (GET /{artista_id}/ruta).
+class RutaParada(BaseModel):
+    orden: int = Field(..., description="Posición de la parada en la ruta (1 = primera)")
+    id: int = Field(..., description="ID del concierto")
+    nombre_evento: str = Field(..., description="Nombre del evento o gira")
+    fecha: str = Field(..., description="Fecha y hora del concierto (ISO 8601)")
+    status: Optional[str] = Field(None, description="Estado del concierto")
+    venue: str = Field(..., description="Lugar (recinto) del concierto")
+    ciudad: str = Field(..., description="Ciudad del concierto")
+    pais: str = Field(..., description="País del concierto")
+    latitud: float = Field(..., description="Latitud del venue")
+    longitud: float = Field(..., description="Longitud del venue")
+    distancia_km: float = Field(..., description="Distancia en km desde la parada anterior (0 en la primera)")
+
+# Schema de la ruta de gira de un artista.
+class RutaArtista(BaseModel):
+    artista_id: int = Field(..., description="Identificador único del artista")
+    artista_nombre: str = Field(..., description="Nombre del artista")
+    peso_fechas: float = Field(..., description="Penalización (km) por cada día que la ruta retrocede en el calendario")
+    paradas: List[RutaParada] = Field(..., description="Conciertos en el orden de la ruta")
+    distancia_total_km: float = Field(..., description="Suma de las distancias de todos los tramos")
+    distancia_cronologica_km: float = Field(..., description="Distancia recorriendo los conciertos en orden de fecha (para comparar)")
+    retrocesos: int = Field(..., description="Tramos que van a un concierto de fecha anterior")
+    sin_coordenadas: List[int] = Field(..., description="IDs de conciertos que no entran en la ruta por no tener latitud/longitud")
+
+# Schema para la respuesta al solicitar la ruta de gira de un artista.
+class RutaArtistaResponse(BaseModel):
+    success: bool = Field(True, description="Indica si la solicitud fue exitosa")
+    data: RutaArtista = Field(..., description="Ruta de gira del artista")
+
 # Schema para la respuesta exitosa al crear un nuevo artista (POST /).
 class ArtistaCreateResponse(BaseModel):
     success: bool = Field(True, description="Indica si la creación fue exitosa")
@@ -94,7 +145,11 @@ def get_artistas(
     para controlar la paginación de los resultados.
     """
     # Llama a la función correspondiente en 'models.py' para interactuar con la base de datos.
-    artistas, pagination_data = models.get_all_artistas_from_db(page, limit)
+    # Si ya hay una consulta idéntica en curso, se espera y se reutiliza su resultado.
+    artistas, pagination_data = request_coalescer.do(
+        make_key("artistas", page=page, limit=limit),
+        lambda: models.get_all_artistas_from_db(page, limit)
+    )
 
     # FastAPI utiliza 'response_model' para validar y formatear la respuesta saliente.
     # Se devuelve un diccionario que coincide con la estructura de 'ArtistaListResponse'.
@@ -120,6 +175,77 @@ def get_artista(artista_id: int):
     # Si se encuentra, FastAPI usa 'response_model' para devolver los datos del artista.
     return artista
 
+@router.get("/{artista_id}/ranking",
+            response_model=ArtistaRankingResponse,
+            summary="Obtener la posición de un artista en el ranking",
+            description="Devuelve la posición del artista en el ranking de popularidad (mismo orden que el listado paginado).")
+def get_artista_ranking(artista_id: int):
+    """
+    Endpoint para consultar el ranking de un artista.
+    Se resuelve desde el índice de popularidad en memoria, sin consultar la BD.
+    """
+    ranking = models.get_artista_ranking(artista_id)
+    if ranking is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Artista con ID {artista_id} no encontrado")
+    return {"data": ranking}
+
+@router.get("/{artista_id}/estadisticas",
+            response_model=ArtistaEstadisticasResponse,
+            summary="Obtener estadísticas de un artista",
+            description="Ingresos, costos, ganancia neta, asistencia y número de conciertos del artista.")
+def get_artista_estadisticas(artista_id: int):
+    """
+    Endpoint para obtener las estadísticas de desempeño de un artista.
+    Las cifras salen de la caché de estadísticas por artista (ver GET /api/estadisticas/artistas).
+    """
+    estadisticas = models.get_stats_artista_from_db(artista_id)
+    if estadisticas is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Artista con ID {artista_id} no encontrado")
+    return {"data": estadisticas}
+
+@router.get("/{artista_id}/calendario.ics",
+            response_class=Response,
+            summary="Calendario iCalendar de los conciertos de un artista",
+            description="Feed .ics para suscribirse desde Google Calendar, Outlook o Apple Calendar. Admite If-None-Match (304).",
+            responses={200: {"content": {"text/calendar": {}}}})
+def get_artista_calendario(artista_id: int, if_none_match: Optional[str] = Header(None)):
+    """
+    Endpoint del calendario de un artista.
+    El .ics se genera una vez y se sirve desde caché hasta que cambia algún
+    concierto del artista; si el cliente ya tiene la versión actual (ETag)
+    se responde 304 sin cuerpo.
+    """
+    calendario = models.get_calendario_artista(artista_id)
+    if calendario is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Artista con ID {artista_id} no encontrado")
+    contenido, etag = calendario
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=300"}
+    if if_none_match is not None and etag in (v.strip() for v in if_none_match.split(",")):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=contenido, media_type="text/calendar; charset=utf-8", headers=headers)
+
+@router.get("/{artista_id}/ruta",
+            response_model=RutaArtistaResponse,
+            summary="Ruta de gira de un artista",
+            description="Ordena los conciertos del artista (sin los cancelados) en una ruta de viaje que combina la distancia entre venues con el orden cronológico.")
+def get_artista_ruta(
+    artista_id: int,
+    peso_fechas: float = Query(models.PESO_FECHAS_DEFAULT, ge=0, le=100000,
+                               description="Km de penalización por cada día que la ruta retrocede en el calendario (0 = solo distancia)")
+):
+    """
+    Endpoint de la ruta de gira de un artista.
+    La ruta se calcula con vecino más cercano + 2-opt sobre una matriz de
+    distancias haversine. La del peso por defecto se guarda en caché hasta
+    que cambia algún concierto del artista; con otro peso se calcula en
+    cada petición (las idénticas simultáneas se comparten).
+    """
+    ruta = request_coalescer.do(make_key("artista_ruta", artista_id=artista_id, peso_fechas=peso_fechas),
+                                lambda: models.get_ruta_artista(artista_id, peso_fechas))
+    if ruta is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Artista con ID {artista_id} no encontrado")
+    return {"data": ruta}
+
 @router.post("/", 
              status_code=status.HTTP_201_CREATED, 
              response_model=ArtistaCreateResponse, 
@@ -147,6 +273,34 @@ def create_artista(artista: ArtistaBase = Body(..., description="Datos del nuevo
     # Si la creación es exitosa, se devuelve la respuesta definida en 'ArtistaCreateResponse'.
     return {"data": {"id": nuevo_id}}
 
+@router.post("/lote",
+             status_code=status.HTTP_201_CREATED,
+             response_model=batch_validation.LoteResponse,
+             summary="Crear varios artistas",
+             description=f"Carga masiva de hasta {batch_validation.MAX_LOTE} artistas (mismo formato que POST /). Con parcial=false (default) cualquier error rechaza el lote completo con 422.")
+def create_artistas_lote(
+    artistas: List[Dict[str, Any]] = Body(..., max_length=batch_validation.MAX_LOTE, description="Lista de artistas según el schema ArtistaBase"),
+    parcial: bool = Query(False, description="Si es true, se crean las filas válidas y las demás se reportan en 'errores'")
+):
+    """
+    Endpoint de carga masiva de artistas.
+    Todas las filas se validan en una sola llamada (TypeAdapter sobre
+    TypedDict, ver batch_validation.py) y las válidas se insertan en una
+    sola transacción.
+    """
+    validas, errores = batch_validation.validar_lote(batch_validation.artistas_adapter, artistas)
+    if errores and not parcial:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=errores)
+
+    ids = models.create_artistas_in_db([fila for _, fila in validas]) if validas else []
+    return {
+        "message": f"{len(ids)} artistas creados, {len(errores)} errores",
+        "data": {
+            "creados": [{"indice": indice, "id": nuevo_id} for (indice, _), nuevo_id in zip(validas, ids)],
+            "errores": errores,
+        },
+    }
+
 @router.put("/{artista_id}", 
             response_model=ArtistaUpdateResponse, 
             summary="Actualizar un artista existente",
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+from fastapi import APIRouter, Query
+from typing import List, Dict, Any
+from . import models  # Importa el módulo models.py que contiene la lógica de base de datos
+from .coalescing import request_coalescer, make_key  # Comparte resultados entre peticiones GET idénticas simultáneas
+from pydantic import BaseModel, Field # Importa utilidades de Pydantic
+
+# --- Router ---
+# Rutas del registro de cambios: permiten a los clientes mantener una copia
+# local de artistas y conciertos pidiendo solo lo que cambió.
+router = APIRouter(
+    prefix="/api/cambios",  # Define el prefijo base para todas las rutas en este archivo.
+    tags=["Cambios"],       # Agrupa estas rutas bajo la etiqueta "Cambios" en la documentación.
+)
+
+# --- Schemas Pydantic (Modelos de Datos y Validación) ---
+
+# Schema con los registros que cambiaron después de la versión pedida.
+class Cambios(BaseModel):
+    version: int = Field(..., description="Versión a enviar como 'desde' en la siguiente petición")
+    hay_mas: bool = Field(..., description="Indica si quedan cambios por pedir (repetir con la nueva versión)")
+    reiniciar: bool = Field(..., description="Si es true, el cliente debe descartar su copia local y sincronizar desde 0")
+    artistas: List[Dict[str, Any]] = Field(..., description="Artistas creados o editados, en su estado actual")
+    conciertos: List[Dict[str, Any]] = Field(..., description="Conciertos creados o editados, en su estado actual (con artista_nombre)")
+
+# Schema para la respuesta de GET /.
+class CambiosResponse(BaseModel):
+    success: bool = Field(True, description="Indica si la solicitud fue exitosa")
+    data: Cambios = Field(..., description="Cambios desde la versión pedida")
+
+
+# --- Endpoints (Definiciones de Rutas API) ---
+
+@router.get("/",
+            response_model=CambiosResponse,
+            summary="Obtener los cambios desde una versión",
+            description="Devuelve los artistas y conciertos creados o editados después de la versión 'desde'. Con desde=0 se obtiene todo.")
+def get_cambios(
+    desde: int = Query(0, ge=0, description="Última versión que tiene el cliente (0 para sincronizar todo)"),
+    limit: int = Query(500, ge=1, le=1000, description="Máximo de cambios por respuesta (entre 1 y 1000)")
+):
+    """
+    Endpoint de sincronización incremental.
+    El cliente guarda 'version' y la manda como 'desde' en la siguiente
+    petición; mientras 'hay_mas' sea true, repite de inmediato.
+    """
+    cambios = request_coalescer.do(
+        make_key("cambios", desde=desde, limit=limit),
+        lambda: models.get_cambios_from_db(desde, limit)
+    )
+    return {"data": cambios}
@@ -2,8 +2,10 @@
 from fastapi import APIRouter, HTTPException, Query, Body, status
 from typing import List, Optional, Dict, Any
 from . import models  # Importa el módulo models.py que contiene la lógica de base de datos
-from pydantic import BaseModel, Field, validator # Importa utilidades de Pydantic
-import datetime # Para validación de fechas
+from .coalescing import request_coalescer, make_key  # Comparte resultados entre peticiones GET idénticas simultáneas
+from pydantic import BaseModel, Field, field_validator # Importa utilidades de Pydantic
+from . import batch_validation  # Validación por lotes y de fechas ISO 8601
+import datetime # Para interpretar fechas (ej. el parámetro desde de /proximos)
 
 # --- Router ---
 # Se crea una instancia de APIRouter para agrupar las rutas relacionadas con conciertos.
@@ -16,11 +18,12 @@ router = APIRouter(
 # --- Schemas Pydantic (Modelos de Datos y Validación) ---
 
 # Schema importado de routes_artistas para la paginación.
+# total_records y total_pages son None cuando se pide include_total=false.
 class Pagination(BaseModel):
     page: int
     limit: int
-    total_records: int
-    total_pages: int
+    total_records: Optional[int] = None
+    total_pages: Optional[int] = None
     has_next: bool
     has_prev: bool
 
@@ -41,14 +44,11 @@ class ConciertoBase(BaseModel):
     longitud: Optional[float] = Field(None, description="Coordenada de longitud del venue")
 
     # Validador personalizado para asegurar que el formato de fecha sea correcto (ISO 8601).
-    @validator('fecha')
-    def validate_fecha_format(cls, v):
-        try:
-            # Intenta parsear la fecha/hora. Si falla, el formato es incorrecto.
-            datetime.datetime.fromisoformat(v.replace('Z', '+00:00'))
-            return v
-        except ValueError:
-            raise ValueError("El formato de fecha debe ser ISO 8601 (ej: '2025-11-20T20:00:00Z')")
+    # Es la misma función que usa la validación por lotes (batch_validation.py).
+    @field_validator('fecha')
+    @classmethod
+    def validate_fecha_format(cls, v: str) -> str:
+        return batch_validation.validar_fecha(v)
 
     # Configuración de Pydantic para añadir un ejemplo en la documentación de la API.
     model_config = {
@@ -86,6 +86,11 @@ class ConciertoListResponse(BaseModel):
     data: List[ConciertoResponse] = Field(..., description="Lista de conciertos encontrados")
     pagination: Pagination = Field(..., description="Metadatos de la paginación")
 
+# Schema para la respuesta de los próximos conciertos por artista (GET /proximos).
+class ConciertoProximosResponse(BaseModel):
+    success: bool = Field(True, description="Indica si la solicitud fue exitosa")
+    data: List[ConciertoResponse] = Field(..., description="Próximos conciertos, agrupados por artista y ordenados por fecha")
+
 # Schema para la respuesta exitosa al crear un nuevo concierto (POST /).
 class ConciertoCreateResponse(BaseModel):
     success: bool = Field(True, description="Indica si la creación fue exitosa")
@@ -103,22 +108,81 @@ class ConciertoUpdateResponse(BaseModel):
 @router.get("/",
             response_model=ConciertoListResponse,
             summary="Obtener lista paginada de conciertos",
-            description="Recupera una lista de conciertos con paginación, opcionalmente filtrada por artista, ordenada por fecha descendente.")
+            description="Recupera una lista de conciertos con paginación, filtros opcionales (artista, status, ciudad, país, venue, rangos de ingresos y asistencia) y orden configurable.")
 def get_conciertos(
     page: int = Query(1, ge=1, description="Número de página a solicitar (mínimo 1)"),
     limit: int = Query(10, ge=1, le=100, description="Número de conciertos por página (entre 1 y 100)"),
-    artista_id: Optional[int] = Query(None, description="ID opcional del artista para filtrar los conciertos")
+    artista_id: Optional[int] = Query(None, description="ID opcional del artista para filtrar los conciertos"),
+    status_concierto: Optional[str] = Query(None, alias="status", max_length=50, description="Filtra por estado del concierto (ej: 'Confirmado')"),
+    ciudad: Optional[str] = Query(None, max_length=100, description="Filtra por ciudad (coincidencia exacta)"),
+    pais: Optional[str] = Query(None, max_length=100, description="Filtra por país (coincidencia exacta)"),
+    venue: Optional[str] = Query(None, max_length=100, description="Filtra por nombre del venue (coincidencia exacta)"),
+    ingresos_min: Optional[int] = Query(None, ge=0, description="Ingresos de taquilla mínimos"),
+    ingresos_max: Optional[int] = Query(None, ge=0, description="Ingresos de taquilla máximos"),
+    asistencia_min: Optional[int] = Query(None, ge=0, description="Asistencia real mínima"),
+    asistencia_max: Optional[int] = Query(None, ge=0, description="Asistencia real máxima"),
+    orden: str = Query("fecha", description=f"Campo de orden: {', '.join(models.ORDEN_CONCIERTOS)}"),
+    direccion: str = Query("desc", pattern="^(asc|desc)$", description="Dirección del orden: 'asc' o 'desc'"),
+    include_total: bool = Query(True, description="Si es false, no se calculan total_records ni total_pages (paginación más barata)")
 ):
     """
     Endpoint para obtener una lista paginada de conciertos.
-    Permite filtrar los resultados por el ID de un artista ('artista_id').
+    Todos los filtros son opcionales y se combinan con AND. Los filtros por
+    rango excluyen los conciertos sin ese dato (NULL).
     """
-    # Llama a la función en 'models.py', pasando los parámetros de paginación y el filtro opcional.
-    conciertos, pagination_data = models.get_all_conciertos_from_db(page, limit, artista_id)
+    if orden not in models.ORDEN_CONCIERTOS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail=f"Campo de orden inválido. Opciones: {', '.join(models.ORDEN_CONCIERTOS)}")
+    filtros = {
+        "artista_id": artista_id, "status": status_concierto, "ciudad": ciudad, "pais": pais,
+        "venue": venue, "ingresos_min": ingresos_min, "ingresos_max": ingresos_max,
+        "asistencia_min": asistencia_min, "asistencia_max": asistencia_max,
+    }
+
+    # Llama a la función en 'models.py', pasando los parámetros de paginación, filtros y orden.
+    # Las peticiones idénticas simultáneas comparten una sola ejecución.
+    conciertos, pagination_data = request_coalescer.do(
+        make_key("conciertos", page=page, limit=limit, orden=orden, direccion=direccion,
+                 include_total=include_total, **filtros),
+        lambda: models.get_all_conciertos_from_db(page, limit, orden=orden, descendente=direccion == "desc",
+                                                  include_total=include_total, **filtros)
+    )
 
     # Devuelve los datos formateados según 'ConciertoListResponse'.
     return {"data": conciertos, "pagination": pagination_data}
 
+# Debe declararse antes de "/{concierto_id}" para que "proximos" no se tome como un ID.
+@router.get("/proximos",
+            response_model=ConciertoProximosResponse,
+            summary="Obtener los próximos conciertos de cada artista",
+            description="Devuelve los siguientes N conciertos (no cancelados) de cada artista a partir de una fecha.")
+def get_proximos_conciertos(
+    por_artista: int = Query(1, ge=1, le=50, description="Número de conciertos por artista (entre 1 y 50)"),
+    desde: Optional[str] = Query(None, description="Fecha/hora ISO 8601 desde la que se buscan conciertos (default: ahora)")
+):
+    """
+    Endpoint para obtener los próximos conciertos de cada artista en una
+    sola consulta (ej. "siguiente concierto de cada artista" con por_artista=1).
+    """
+    if desde is None:
+        inicio = datetime.datetime.now(datetime.timezone.utc)
+    else:
+        try:
+            inicio = datetime.datetime.fromisoformat(desde.replace('Z', '+00:00'))
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                                detail="El formato de 'desde' debe ser ISO 8601 (ej: '2025-11-20' o '2025-11-20T20:00:00Z')")
+        if inicio.tzinfo is None:
+            inicio = inicio.replace(tzinfo=datetime.timezone.utc)
+    # Las fechas se guardan como texto ISO en UTC ('...Z'), así que se comparan en ese mismo formato.
+    desde_utc = inicio.astimezone(datetime.timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+    conciertos = request_coalescer.do(
+        make_key("conciertos_proximos", por_artista=por_artista, desde=desde_utc),
+        lambda: models.get_proximos_conciertos_from_db(por_artista, desde_utc)
+    )
+    return {"data": conciertos}
+
 @router.get("/{concierto_id}",
             response_model=ConciertoResponse,
             summary="Obtener un concierto por ID",
@@ -137,6 +201,18 @@ def get_concierto(concierto_id: int):
     # Devuelve los datos del concierto.
     return concierto
 
+def _verificar_artista(artista_id: int) -> None:
+    """
+    Responde 422 si el artista no existe, en lugar de dejar que la
+    FOREIGN KEY falle en la BD con un 500. La verificación usa la caché de
+    artistas (ver models.get_artistas_inexistentes).
+    """
+    if models.get_artistas_inexistentes([artista_id]):
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                            detail=[{"loc": ["body", "artista_id"],
+                                     "msg": f"El artista con ID {artista_id} no existe",
+                                     "type": "foreign_key"}])
+
 @router.post("/",
              status_code=status.HTTP_201_CREATED,
              response_model=ConciertoCreateResponse,
@@ -150,9 +226,10 @@ def create_concierto(concierto: ConciertoBase = Body(..., description="Datos del
     """
     # Convierte el modelo Pydantic a diccionario.
     concierto_data = concierto.model_dump()
+    _verificar_artista(concierto_data['artista_id'])
     
     # Llama a la función en 'models.py' para insertar el nuevo concierto.
-    # Si 'models.py' (corregido) lanza un error de BD (ej. artista_id no existe),
+    # Si 'models.py' (corregido) lanza un error de BD,
     # FastAPI lo atrapará y devolverá un 500 automáticamente.
     nuevo_id = models.create_concierto_in_db(concierto_data)
     
@@ -162,6 +239,40 @@ def create_concierto(concierto: ConciertoBase = Body(..., description="Datos del
     # Devuelve la respuesta de éxito con el ID del nuevo concierto.
     return {"data": {"id": nuevo_id}}
 
+@router.post("/lote",
+             status_code=status.HTTP_201_CREATED,
+             response_model=batch_validation.LoteResponse,
+             summary="Crear varios conciertos",
+             description=f"Carga masiva de hasta {batch_validation.MAX_LOTE} conciertos (mismo formato que POST /). Con parcial=false (default) cualquier error rechaza el lote completo con 422.")
+def create_conciertos_lote(
+    conciertos: List[Dict[str, Any]] = Body(..., max_length=batch_validation.MAX_LOTE, description="Lista de conciertos según el schema ConciertoBase"),
+    parcial: bool = Query(False, description="Si es true, se crean las filas válidas y las demás se reportan en 'errores'")
+):
+    """
+    Endpoint de carga masiva de conciertos.
+    Todas las filas se validan en una sola llamada (TypeAdapter sobre
+    TypedDict, ver batch_validation.py) y los artista_id se verifican juntos
+    contra la caché de artistas. Las filas válidas se insertan en una sola
+    transacción del escritor compartido.
+    """
+    validas, errores = batch_validation.validar_lote(batch_validation.conciertos_adapter, conciertos)
+    inexistentes = models.get_artistas_inexistentes(fila['artista_id'] for _, fila in validas)
+    if inexistentes:
+        errores += batch_validation.errores_artista_inexistente(validas, inexistentes)
+        validas = [(indice, fila) for indice, fila in validas if fila['artista_id'] not in inexistentes]
+    errores.sort(key=lambda error: error["loc"][1])
+    if errores and not parcial:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=errores)
+
+    ids = models.create_conciertos_in_db([fila for _, fila in validas]) if validas else []
+    return {
+        "message": f"{len(ids)} conciertos creados, {len(errores)} errores",
+        "data": {
+            "creados": [{"indice": indice, "id": nuevo_id} for (indice, _), nuevo_id in zip(validas, ids)],
+            "errores": errores,
+        },
+    }
+
 @router.put("/{concierto_id}",
             response_model=ConciertoUpdateResponse,
             summary="Actualizar un concierto existente",
@@ -184,6 +295,8 @@ def update_concierto(concierto_id: int, concierto: ConciertoBase = Body(..., des
     if not concierto_data:
          # Si el body está vacío o no contiene campos actualizables, error 400.
          raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No se proporcionaron campos válidos para actualizar")
+    if 'artista_id' in concierto_data:
+        _verificar_artista(concierto_data['artista_id'])
 
     # Paso 3: Llamar a 'models.py' para ejecutar la actualización.
     # Si 'models.py' (corregido) lanza un error de BD,
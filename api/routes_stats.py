@@ -1,7 +1,10 @@
 # -*- coding: utf-8 -*-
-from fastapi import APIRouter, HTTPException, status
+import asyncio
+from fastapi import APIRouter, HTTPException, Query, status, WebSocket, WebSocketDisconnect
 from typing import List, Dict, Any, Optional
 from . import models # Importa el módulo models.py
+from .broadcaster import StatsBroadcaster
+from .coalescing import request_coalescer, make_key
 from pydantic import BaseModel, Field # Para definir el schema de respuesta
 
 # --- Router ---
@@ -12,6 +15,16 @@ router = APIRouter(
     responses={500: {"description": "Error interno del servidor"}} # Respuesta estándar para 500.
 )
 
+# Router sin prefijo para el canal WebSocket del dashboard (/ws/estadisticas).
+ws_router = APIRouter(tags=["Estadísticas"])
+
+# Difusor único: recalcula las estadísticas una vez por cambio y las envía
+# a todos los dashboards conectados. Se arranca en el lifespan de app.py.
+# Lee la BD viva (no el snapshot de analítica, que aún no tendría el cambio)
+# y, con varios workers, busca cada segundo las escrituras de los demás.
+stats_broadcaster = StatsBroadcaster(lambda: models.get_stats_from_db(usar_snapshot=False),
+                                     sincronizar=lambda: models.sync_caches())
+
 # --- Schemas Pydantic (Modelos de Datos para la Respuesta) ---
 
 # Define la estructura esperada para un elemento en la lista de top artistas.
@@ -49,25 +62,114 @@ class EstadisticasResponse(BaseModel):
     # }
 
 
+# Schema de paginación (misma estructura que en routes_artistas y routes_conciertos).
+class Pagination(BaseModel):
+    page: int
+    limit: int
+    total_records: int
+    total_pages: int
+    has_next: bool
+    has_prev: bool
+
+# Define las estadísticas de desempeño de un artista.
+class EstadisticaArtista(BaseModel):
+    artista_id: int = Field(..., description="Identificador único del artista")
+    nombre: str = Field(..., description="Nombre del artista")
+    total_conciertos: int = Field(..., description="Número total de conciertos del artista (cualquier status)")
+    conciertos_confirmados: int = Field(..., description="Número de conciertos con status 'Confirmado'")
+    total_ingresos: float = Field(..., description="Suma de ingresos_taquilla de conciertos confirmados")
+    total_costos: float = Field(..., description="Suma de costos_produccion de conciertos confirmados")
+    ganancia_neta: float = Field(..., description="Diferencia entre ingresos y costos")
+    total_asistencia_proyectada: int = Field(..., description="Suma de asistencia_proyectada de conciertos confirmados")
+    total_asistencia_real: int = Field(..., description="Suma de asistencia_real de conciertos confirmados")
+    tasa_cumplimiento_asistencia: float = Field(..., description="Porcentaje de asistencia real sobre la proyectada")
+
+# Respuesta del listado de estadísticas por artista.
+class EstadisticasArtistasResponse(BaseModel):
+    success: bool = Field(True, description="Indica si la solicitud fue exitosa")
+    data: List[EstadisticaArtista] = Field(..., description="Estadísticas de cada artista")
+    pagination: Pagination = Field(..., description="Metadatos de la paginación")
+
+
 # --- Endpoint (Definición de Ruta API) ---
 
 @router.get("/",
             response_model=EstadisticasResponse,
             summary="Obtener estadísticas consolidadas",
             description="Recupera un conjunto de KPIs y datos agregados para el dashboard del manager.")
-def get_estadisticas():
+def get_estadisticas(
+    debug: bool = Query(False, description="Incluye '_tiempos_ms' con la duración de cada agregado (solo si el servidor corre con CONCIERTOS_DEBUG=1)")
+):
     """
     Endpoint para obtener las estadísticas consolidadas.
-    Llama a la función 'get_stats_from_db' en 'models.py' que realiza
-    múltiples consultas de agregación a la base de datos.
+    Llama a la función 'get_stats_from_db' en 'models.py', que agrupa los
+    agregados que comparten filtro en una sola consulta y ejecuta en
+    paralelo los que son independientes.
     """
+    debug = debug and models.config.debug
+
     # Llama a la función en 'models.py' para obtener todas las estadísticas.
     # Si 'models.py' (corregido) lanza un error de BD, 
     # FastAPI lo atrapará y devolverá un 500 automáticamente.
-    estadisticas_data = models.get_stats_from_db()
+    # Las peticiones simultáneas (ej. un enlace al dashboard compartido con
+    # todo el equipo) comparten una sola ejecución de las consultas.
+    estadisticas_data = request_coalescer.do(
+        make_key("estadisticas", debug=debug),
+        lambda: models.get_stats_from_db(debug)
+    )
 
     # Se elimina el bloque 'if not estadisticas_data: raise HTTPException(500)'
     # para seguir la recomendación del profesor de no lanzar errores 500 manualmente.
 
     # Devuelve los datos formateados según 'EstadisticasResponse'.
-    return {"data": estadisticas_data}
\ No newline at end of file
+    return {"data": estadisticas_data}
+
+@router.get("/artistas",
+            response_model=EstadisticasArtistasResponse,
+            summary="Obtener estadísticas por artista",
+            description="Ingresos, costos, ganancia, asistencia y número de conciertos de cada artista, con orden y paginación.")
+def get_estadisticas_artistas(
+    page: int = Query(1, ge=1, description="Número de página a solicitar (mínimo 1)"),
+    limit: int = Query(10, ge=1, le=100, description="Número de artistas por página (entre 1 y 100)"),
+    orden: str = Query("ganancia_neta", description=f"Campo de orden: {', '.join(models.ORDEN_STATS_ARTISTAS)}"),
+    direccion: str = Query("desc", pattern="^(asc|desc)$", description="Dirección del orden: 'asc' o 'desc'")
+):
+    """
+    Endpoint para obtener las estadísticas de todos los artistas.
+    Se calculan en un solo recorrido agrupado sobre conciertos y se sirven
+    desde caché hasta que cambie algún concierto.
+    """
+    if orden not in models.ORDEN_STATS_ARTISTAS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail=f"Campo de orden inválido. Opciones: {', '.join(models.ORDEN_STATS_ARTISTAS)}")
+    data, pagination_data = models.get_stats_artistas_from_db(page, limit, orden, direccion == "desc")
+    return {"data": data, "pagination": pagination_data}
+
+# --- Canal en Vivo (WebSocket) ---
+
+@ws_router.websocket("/ws/estadisticas")
+async def estadisticas_en_vivo(websocket: WebSocket):
+    """
+    Canal push para el dashboard.
+    Al conectar envía {"tipo": "completo", "data": {...}} con el mismo
+    contenido que GET /api/estadisticas/; después, con cada alta o
+    actualización de artistas o conciertos, envía {"tipo": "delta", "data": {...}}
+    solo con las claves que cambiaron.
+    """
+    await websocket.accept()
+    queue = await stats_broadcaster.subscribe()
+
+    async def enviar():
+        while True:
+            await websocket.send_json(await queue.get())
+
+    sender = asyncio.create_task(enviar())
+    try:
+        # Los mensajes del cliente se ignoran; leer sirve para detectar la desconexión.
+        while True:
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        sender.cancel()
+        stats_broadcaster.unsubscribe(queue)
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+from fastapi import APIRouter, Query
+from typing import List, Optional
+from . import models  # Importa el módulo models.py que contiene la lógica de base de datos
+from pydantic import BaseModel, Field # Importa utilidades de Pydantic
+
+# --- Router ---
+# Se crea una instancia de APIRouter para las rutas de venues (recintos).
+router = APIRouter(
+    prefix="/api/venues",   # Define el prefijo base para todas las rutas en este archivo.
+    tags=["Venues"],        # Agrupa estas rutas bajo la etiqueta "Venues" en la documentación.
+    responses={404: {"description": "Recurso no encontrado"}} # Respuesta estándar para 404.
+)
+
+# --- Schemas Pydantic (Modelos de Datos y Validación) ---
+
+# Schema de paginación (misma estructura que en los demás routers).
+class Pagination(BaseModel):
+    page: int
+    limit: int
+    total_records: int
+    total_pages: int
+    has_next: bool
+    has_prev: bool
+
+# Schema de un venue con su ciudad, país y coordenadas.
+class VenueResponse(BaseModel):
+    id: int = Field(..., description="Identificador único del venue")
+    nombre: str = Field(..., description="Nombre del recinto")
+    ciudad: str = Field(..., description="Ciudad donde se encuentra el venue")
+    pais: str = Field(..., description="País donde se encuentra el venue")
+    latitud: Optional[float] = Field(None, description="Coordenada de latitud del venue")
+    longitud: Optional[float] = Field(None, description="Coordenada de longitud del venue")
+    total_conciertos: int = Field(..., description="Número de conciertos registrados en el venue")
+
+# Schema para la respuesta al solicitar la lista de venues (GET /).
+class VenueListResponse(BaseModel):
+    success: bool = Field(True, description="Indica si la solicitud fue exitosa")
+    data: List[VenueResponse] = Field(..., description="Lista de venues encontrados")
+    pagination: Pagination = Field(..., description="Metadatos de la paginación")
+
+
+# --- Endpoints (Definiciones de Rutas API) ---
+
+@router.get("/",
+            response_model=VenueListResponse,
+            summary="Obtener lista paginada de venues",
+            description="Recupera los venues registrados (ordenados por país, ciudad y nombre), opcionalmente filtrados por ciudad y/o país.")
+def get_venues(
+    page: int = Query(1, ge=1, description="Número de página a solicitar (mínimo 1)"),
+    limit: int = Query(10, ge=1, le=100, description="Número de venues por página (entre 1 y 100)"),
+    ciudad: Optional[str] = Query(None, description="Filtrar por nombre exacto de la ciudad"),
+    pais: Optional[str] = Query(None, description="Filtrar por nombre exacto del país")
+):
+    """
+    Endpoint para obtener la lista de venues.
+    Los venues se crean automáticamente al registrar conciertos.
+    """
+    venues, pagination_data = models.get_all_venues_from_db(page, limit, ciudad, pais)
+    return {"data": venues, "pagination": pagination_data}
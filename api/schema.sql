@@ -1,6 +1,10 @@
 -- Borra las tablas si ya existen (para poder reiniciar la BD fácilmente)
+DROP VIEW IF EXISTS conciertos_detalle;
 DROP TABLE IF EXISTS artistas;
 DROP TABLE IF EXISTS conciertos;
+DROP TABLE IF EXISTS venues;
+DROP TABLE IF EXISTS ciudades;
+DROP TABLE IF EXISTS cambios;
 
 -- 1. Tabla de Artistas
 CREATE TABLE artistas (
@@ -13,16 +17,36 @@ CREATE TABLE artistas (
     biografia TEXT
 );
 
--- 2. Tabla de Conciertos
+-- 2. Dimensión de Ciudades
+-- Cada (ciudad, país) se guarda una sola vez; los conciertos la referencian por ID.
+CREATE TABLE ciudades (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    nombre TEXT NOT NULL,
+    pais TEXT NOT NULL,
+    UNIQUE (nombre, pais)
+);
+
+-- 3. Dimensión de Venues (recintos)
+-- Un venue es único por (nombre, ciudad) y guarda sus coordenadas para el mapa
+-- (las del primer concierto que las trae; cada concierto conserva las suyas).
+CREATE TABLE venues (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    nombre TEXT NOT NULL,
+    ciudad_id INTEGER NOT NULL,
+    latitud REAL,
+    longitud REAL,
+    UNIQUE (nombre, ciudad_id),
+    FOREIGN KEY (ciudad_id) REFERENCES ciudades (id)
+);
+
+-- 4. Tabla de Conciertos
 CREATE TABLE conciertos (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     artista_id INTEGER NOT NULL,
     
     -- Info del Evento
     nombre_evento TEXT NOT NULL,
-    venue TEXT NOT NULL,
-    ciudad TEXT NOT NULL,
-    pais TEXT NOT NULL,
+    venue_id INTEGER NOT NULL,        -- Recinto (y por medio de él, ciudad y país)
     fecha TEXT NOT NULL,              -- Formato ISO 8601: "2025-11-20T20:00:00Z"
     status TEXT NOT NULL DEFAULT 'Planeado', 
 
@@ -34,10 +58,65 @@ CREATE TABLE conciertos (
     costos_produccion INTEGER,
     ingresos_taquilla INTEGER,
 
-    -- Info de Mapa (para el Frontend)
+    -- Coordenadas del concierto (opcionales, para el mapa y la ruta de gira)
     latitud REAL,
     longitud REAL,
 
     -- Conexión
-    FOREIGN KEY (artista_id) REFERENCES artistas (id)
-);
\ No newline at end of file
+    FOREIGN KEY (artista_id) REFERENCES artistas (id),
+    FOREIGN KEY (venue_id) REFERENCES venues (id)
+);
+
+-- Índices del listado de conciertos (ver ConciertoQuery en models.py).
+-- Cada filtro de igualdad tiene un índice compuesto con fecha, de modo que
+-- filtrar y ordenar por fecha se resuelve con un solo recorrido del índice.
+-- Estos índices NO son cubrientes: el listado devuelve todas las columnas,
+-- así que por cada entrada del índice SQLite lee la fila de la tabla (una
+-- búsqueda por rowid); con LIMIT son solo las filas de la página. El único
+-- índice cubriente es idx_conciertos_status_metricas (estadísticas).
+-- tests/test_query_plans.py verifica que ningún listado recorra la tabla.
+CREATE INDEX idx_conciertos_fecha ON conciertos (fecha);
+CREATE INDEX idx_conciertos_artista_fecha ON conciertos (artista_id, fecha);
+CREATE INDEX idx_conciertos_venue_fecha ON conciertos (venue_id, fecha);
+CREATE INDEX idx_conciertos_status_fecha ON conciertos (status, fecha);
+CREATE INDEX idx_conciertos_ingresos ON conciertos (ingresos_taquilla);
+CREATE INDEX idx_conciertos_asistencia ON conciertos (asistencia_real);
+
+-- Índice cubriente de las estadísticas de conciertos confirmados: contiene
+-- todas las columnas que leen, así que no hace falta tocar la tabla.
+CREATE INDEX idx_conciertos_status_metricas ON conciertos (
+    status, venue_id, ingresos_taquilla, costos_produccion,
+    asistencia_proyectada, asistencia_real
+);
+
+-- 5. Registro de Cambios
+-- Cada alta o edición de un artista o concierto anota aquí su entidad e ID
+-- en la misma transacción. 'version' crece con cada cambio (AUTOINCREMENT
+-- nunca reutiliza valores), así que GET /api/cambios?desde=N devuelve lo
+-- que cambió después de la versión N.
+-- Compactación: UNIQUE (entidad, entidad_id) + INSERT OR REPLACE deja solo
+-- la entrada más reciente de cada registro, así que la tabla nunca crece
+-- más que artistas + conciertos.
+CREATE TABLE cambios (
+    version INTEGER PRIMARY KEY AUTOINCREMENT,
+    entidad TEXT NOT NULL,            -- 'artistas' o 'conciertos'
+    entidad_id INTEGER NOT NULL,
+    fecha TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%SZ', 'now')),
+    UNIQUE (entidad, entidad_id)
+);
+
+-- 6. Vista con la forma original de un concierto
+-- Expone venue, ciudad, pais, latitud y longitud como columnas, igual que
+-- antes de normalizar, para que las lecturas de la API no cambien.
+CREATE VIEW conciertos_detalle AS
+SELECT
+    c.id, c.artista_id, c.nombre_evento,
+    v.nombre AS venue, ci.nombre AS ciudad, ci.pais AS pais,
+    c.fecha, c.status,
+    c.asistencia_proyectada, c.asistencia_real,
+    c.costos_produccion, c.ingresos_taquilla,
+    c.latitud, c.longitud,
+    c.venue_id, v.ciudad_id
+FROM conciertos c
+JOIN venues v ON v.id = c.venue_id
+JOIN ciudades ci ON ci.id = v.ciudad_id;
\ No newline at end of file
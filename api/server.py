@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+import argparse
+import os
+
+import uvicorn
+
+from . import models
+from . import build_frontend
+from . import init_db
+from .settings import get_settings
+
+# --- LANZADOR DE PRODUCCIÓN ---
+# Uso (desde la raíz del proyecto):
+#   python -m api.server --workers 4 --port 8000
+# A diferencia de app.py (__main__), no usa el reloader de desarrollo y
+# levanta varios procesos worker que comparten el mismo archivo SQLite.
+
+def parse_args() -> argparse.Namespace:
+    """Lee los parámetros del servidor (con valores por defecto desde settings.py)."""
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Servidor de producción de la API de Conciertos.")
+    parser.add_argument("--host", default=settings.host,
+                        help="Interfaz donde escuchar (default: 0.0.0.0)")
+    parser.add_argument("--port", type=int, default=settings.port,
+                        help="Puerto (default: 8000)")
+    parser.add_argument("--workers", type=int, default=settings.workers,
+                        help="Número de procesos worker (default: número de CPUs)")
+    parser.add_argument("--graceful-timeout", type=int, default=settings.graceful_timeout,
+                        help="Segundos para terminar las peticiones en curso al apagar (default: 30)")
+    parser.add_argument("--build-frontend", action="store_true",
+                        help="Genera frontend_dist/ antes de arrancar para servir el frontend en el mismo origen")
+    return parser.parse_args()
+
+def prepare_database() -> None:
+    """
+    Preparación única en el proceso padre, antes de crear los workers:
+    fija el modo WAL (persistente en el archivo) y precarga la BD en la
+    caché de páginas del sistema operativo, que comparten todos los workers.
+    Una BD desechable en tmpfs se crea aquí, una sola vez: los workers la
+    abren ya creada (CONCIERTOS_BOOTSTRAP=0) en lugar de recrearla cada uno.
+    Una BD existente se migra aquí al schema actual (cada worker lo vuelve
+    a comprobar al arrancar, pero ya no encuentra nada que hacer).
+    """
+    settings = get_settings()
+    if settings.should_bootstrap and not settings.in_memory:
+        init_db.init_db(settings)
+        init_db.seed_db(settings)
+        # Los workers leen el entorno al arrancar; con un solo worker uvicorn
+        # carga la app en este mismo proceso y usa esta misma configuración.
+        os.environ["CONCIERTOS_BOOTSTRAP"] = "0"
+        settings.bootstrap = False
+    elif not settings.in_memory:
+        init_db.migrate_db(settings)
+    models.configure_database()
+    leidos = models.warm_page_cache()
+    print(f"   - Caché de páginas precargada ({leidos} bytes).")
+
+def main() -> None:
+    args = parse_args()
+    print(f"Iniciando servidor de producción en http://{args.host}:{args.port} con {args.workers} workers")
+    if get_settings().in_memory and args.workers > 1:
+        # La BD en memoria (memdb) es por proceso: cada worker
+        # tendría su propia BD y las escrituras no se verían entre ellos.
+        print("⚠️ Con CONCIERTOS_DB_PATH=:memory: cada worker tiene su propia BD; usar --workers 1 o tmpfs.")
+    prepare_database()
+    if args.build_frontend:
+        manifest = build_frontend.build()
+        print(f"   - Frontend generado en {build_frontend.DIST_DIR} ({len(manifest)} archivos con hash).")
+    # Cada worker ejecuta su propio warmup en el lifespan de la app y solo
+    # entonces empieza a aceptar conexiones; /health responde 503 si falla.
+    uvicorn.run(
+        "api.app:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        reload=False,
+        timeout_graceful_shutdown=args.graceful_timeout,
+        proxy_headers=True,
+    )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+import pathlib
+import sqlite3
+import tempfile
+import uuid
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+# --- CONFIGURACIÓN CENTRAL ---
+# Único lugar que decide dónde vive la base de datos, con qué PRAGMAs se
+# abren las conexiones y el resto de ajustes de la API. Cada ajuste se lee
+# (en este orden de prioridad) de:
+#   1. La variable de entorno CONCIERTOS_<CAMPO> (ej. CONCIERTOS_DB_PATH).
+#   2. El archivo JSON indicado en CONCIERTOS_CONFIG ({"db_path": ...}).
+#   3. El valor por defecto de DEFAULTS.
+#
+# La BD puede ser:
+#   - Un archivo (default: api/data/conciertos.db).
+#   - ":memory:": BD en memoria compartida entre las conexiones del
+#     proceso (VFS memdb); aísla el costo de las consultas del disco.
+#   - "tmpfs": archivo en /dev/shm (o el directorio temporal si no existe).
+# En memoria y tmpfs el archivo/BD se llama como 'db_name', así que varias
+# pruebas de carga en paralelo no se pisan si usan nombres distintos.
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(BASE_DIR, 'data')
+ROOT_DIR = os.path.dirname(BASE_DIR)
+
+MEMORY = ":memory:"
+TMPFS = "tmpfs"
+TMPFS_DIR = "/dev/shm"
+
+DEFAULTS: Dict[str, Any] = {
+    # --- Base de datos ---
+    "db_path": os.path.join(DATA_DIR, 'conciertos.db'),  # Archivo, ":memory:" o "tmpfs"
+    "db_name": "conciertos",          # Nombre de la BD en memoria o del archivo en tmpfs
+    "bootstrap": None,                # Crear schema y datos de ejemplo al arrancar (default: en memoria y tmpfs)
+    "busy_timeout": 5000,             # ms que una conexión espera por un candado antes de fallar
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",          # Solo la conexión del escritor
+    "mmap_size": 256 * 1024 * 1024,   # Bytes mapeados por conexión de lectura (0 = desactivado)
+    "stats_snapshot_interval": 0.0,   # Segundos entre snapshots de estadísticas (0 = desactivado)
+    "snapshot_dir": None,             # Carpeta de los snapshots (default: junto a la BD)
+    "backup_dir": None,               # Carpeta de los backups (default: 'backups' junto a la BD)
+    "backup_pages": 64,               # Páginas copiadas por paso del backup en línea
+    "backup_pause": 0.005,            # Segundos de pausa entre pasos (deja pasar a las peticiones)
+    # --- Cachés en memoria ---
+    "artist_cache_size": 1024,
+    "count_cache_size": 512,
+    "debug": False,                   # Habilita ?debug=true en /api/estadisticas
+    "admin_token": None,              # Token de /api/admin (X-Admin-Token); sin token, deshabilitado
+    # --- Servidor y frontend ---
+    "host": "0.0.0.0",
+    "port": 8000,
+    "workers": os.cpu_count() or 1,
+    "graceful_timeout": 30,
+    "frontend_dir": os.path.join(ROOT_DIR, 'frontend_dist'),
+}
+
+_VERDADERO = ("1", "true", "yes", "si", "sí", "on")
+
+
+def _convertir(campo: str, valor: str) -> Any:
+    """Convierte el texto de una variable de entorno al tipo del valor por defecto."""
+    defecto = DEFAULTS[campo]
+    if isinstance(defecto, bool) or campo == "bootstrap":
+        return valor.strip().lower() in _VERDADERO
+    if isinstance(defecto, int):
+        return int(valor)
+    if isinstance(defecto, float):
+        return float(valor)
+    return valor
+
+
+class Settings:
+    """Configuración de la API. Los campos y sus valores por defecto están en DEFAULTS."""
+
+    db_path: str
+    db_name: str
+    bootstrap: Optional[bool]
+    busy_timeout: int
+    journal_mode: str
+    synchronous: str
+    mmap_size: int
+    stats_snapshot_interval: float
+    snapshot_dir: Optional[str]
+    backup_dir: Optional[str]
+    backup_pages: int
+    backup_pause: float
+    artist_cache_size: int
+    count_cache_size: int
+    debug: bool
+    admin_token: Optional[str]
+    host: str
+    port: int
+    workers: int
+    graceful_timeout: int
+    frontend_dir: str
+
+    def __init__(self, **valores: Any):
+        desconocidos = set(valores) - set(DEFAULTS)
+        if desconocidos:
+            raise TypeError(f"Ajustes desconocidos: {', '.join(sorted(desconocidos))}")
+        for campo, defecto in DEFAULTS.items():
+            setattr(self, campo, valores.get(campo, defecto))
+
+    # --- Constructores ---
+
+    @classmethod
+    def from_env(cls, environ: Optional[Mapping[str, str]] = None) -> "Settings":
+        """Lee el archivo de CONCIERTOS_CONFIG (si existe) y encima las variables de entorno."""
+        environ = os.environ if environ is None else environ
+        valores: Dict[str, Any] = {}
+        archivo = environ.get("CONCIERTOS_CONFIG")
+        if archivo:
+            with open(archivo, encoding="utf-8") as f:
+                valores.update(json.load(f))
+        for campo in DEFAULTS:
+            texto = environ.get(f"CONCIERTOS_{campo.upper()}")
+            if texto is not None:
+                valores[campo] = _convertir(campo, texto)
+        return cls(**valores)
+
+    @classmethod
+    def memory(cls, db_name: str = "conciertos", **valores: Any) -> "Settings":
+        """BD en memoria compartida; se crea con datos de ejemplo al arrancar."""
+        return cls(db_path=MEMORY, db_name=db_name, **valores)
+
+    @classmethod
+    def tmpfs(cls, db_name: Optional[str] = None, **valores: Any) -> "Settings":
+        """
+        BD en un archivo de /dev/shm (RAM); se crea con datos de ejemplo al
+        arrancar. Sin db_name se usa un nombre único, así dos pruebas en
+        paralelo no comparten (ni pisan) el mismo archivo.
+        """
+        return cls(db_path=TMPFS, db_name=db_name or f"conciertos-{uuid.uuid4().hex[:12]}", **valores)
+
+    def replace(self, **cambios: Any) -> "Settings":
+        """Copia con algunos campos cambiados."""
+        return Settings(**{**self.as_dict(), **cambios})
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {campo: getattr(self, campo) for campo in DEFAULTS}
+
+    # --- Ubicación de la BD ---
+
+    @property
+    def in_memory(self) -> bool:
+        return self.db_path == MEMORY
+
+    @property
+    def should_bootstrap(self) -> bool:
+        """Las BD en memoria y en tmpfs son desechables: por defecto se crean al arrancar."""
+        if self.bootstrap is None:
+            return self.db_path in (MEMORY, TMPFS)
+        return self.bootstrap
+
+    @property
+    def database_file(self) -> Optional[str]:
+        """Ruta absoluta del archivo de la BD, o None si está en memoria."""
+        if self.in_memory:
+            return None
+        if self.db_path == TMPFS:
+            carpeta = TMPFS_DIR if os.path.isdir(TMPFS_DIR) else tempfile.gettempdir()
+            return os.path.join(carpeta, f"{self.db_name}.db")
+        return os.path.abspath(self.db_path)
+
+    def snapshot_paths(self) -> Tuple[str, str]:
+        """
+        Los dos archivos que se alternan como snapshot de estadísticas. Son
+        de este proceso (llevan su pid): cada worker refresca los suyos y
+        nunca reescribe un archivo que otro worker está leyendo.
+        """
+        archivo = self.database_file
+        carpeta = self.snapshot_dir or (os.path.dirname(archivo) if archivo else tempfile.gettempdir())
+        base = os.path.splitext(os.path.basename(archivo))[0] if archivo else self.db_name
+        pid = os.getpid()
+        return (os.path.join(carpeta, f"{base}_snapshot_{pid}_a.db"),
+                os.path.join(carpeta, f"{base}_snapshot_{pid}_b.db"))
+
+    def backup_directory(self) -> str:
+        """Carpeta donde se escriben los backups."""
+        archivo = self.database_file
+        return self.backup_dir or os.path.join(os.path.dirname(archivo) if archivo else tempfile.gettempdir(), 'backups')
+
+    def connect(self, read_only: bool = False, factory: type = sqlite3.Connection,
+                check_same_thread: bool = True) -> sqlite3.Connection:
+        """
+        Abre una conexión a la BD configurada (sin PRAGMAs: eso lo decide
+        quien la pide). En memoria se usa el VFS memdb con un nombre que
+        empieza con "/" (compartido por las conexiones del proceso): bloquea
+        como un archivo con journal de rollback, así que busy_timeout aplica
+        y las lecturas nunca ven datos sin confirmar (cache=shared bloquea
+        por tabla y falla de inmediato). read_only se cubre con PRAGMA
+        query_only.
+        """
+        if self.in_memory:
+            uri = f"file:/{self.db_name}?vfs=memdb"
+        else:
+            archivo = self.database_file
+            if not read_only:
+                os.makedirs(os.path.dirname(archivo), exist_ok=True)
+            uri = pathlib.Path(archivo).as_uri() + ("?mode=ro" if read_only else "")
+        return sqlite3.connect(uri, uri=True, factory=factory, check_same_thread=check_same_thread)
+
+    def __repr__(self) -> str:
+        return f"Settings(db_path={self.db_path!r}, db_name={self.db_name!r})"
+
+
+# --- CONFIGURACIÓN DEL PROCESO ---
+
+_settings: Optional[Settings] = None
+
+
+def get_settings() -> Settings:
+    """Configuración leída del entorno (una sola vez por proceso)."""
+    global _settings
+    if _settings is None:
+        _settings = Settings.from_env()
+    return _settings
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+import mimetypes
+import os
+import re
+from typing import Set
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+
+# --- ARCHIVOS ESTÁTICOS PRECOMPRIMIDOS ---
+# Sirve el frontend generado por build_frontend.py. Si el navegador acepta
+# brotli o gzip y existe la variante .br/.gz, se envía esa (sin comprimir
+# en cada petición). Los archivos con hash en el nombre nunca cambian de
+# contenido, así que se cachean como inmutables por un año; los .html
+# (sin hash) se revalidan siempre con su ETag.
+
+CACHE_INMUTABLE = "public, max-age=31536000, immutable"
+CACHE_REVALIDAR = "no-cache"
+_CON_HASH = re.compile(r"\.[0-9a-f]{10}\.[^./]+$")
+
+# Codificación aceptada -> extensión de la variante precomprimida, en orden de preferencia.
+VARIANTES = (("br", ".br"), ("gzip", ".gz"))
+
+
+def _codificaciones(accept_encoding: str) -> Set[str]:
+    """Codificaciones aceptadas en Accept-Encoding (se ignoran las que tienen q=0)."""
+    aceptadas = set()
+    for parte in accept_encoding.split(","):
+        nombre, _, parametros = parte.strip().partition(";")
+        if nombre and parametros.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            aceptadas.add(nombre.lower())
+    return aceptadas
+
+
+def cache_control_for(path: str) -> str:
+    return CACHE_INMUTABLE if _CON_HASH.search(path) else CACHE_REVALIDAR
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """StaticFiles que prefiere las variantes .br/.gz y fija Cache-Control."""
+
+    def file_response(self, full_path, stat_result: os.stat_result, scope, status_code: int = 200) -> Response:
+        request_headers = Headers(scope=scope)
+        ruta = str(full_path)
+        headers = {"Cache-Control": cache_control_for(ruta), "Vary": "Accept-Encoding"}
+        aceptadas = _codificaciones(request_headers.get("accept-encoding", ""))
+
+        response = None
+        for codificacion, ext in VARIANTES:
+            if codificacion not in aceptadas:
+                continue
+            try:
+                variante_stat = os.stat(ruta + ext)
+            except OSError:
+                continue
+            response = FileResponse(
+                ruta + ext, status_code=status_code, stat_result=variante_stat,
+                media_type=mimetypes.guess_type(ruta)[0] or "text/plain",
+                headers={**headers, "Content-Encoding": codificacion},
+            )
+            break
+        if response is None:
+            response = FileResponse(ruta, status_code=status_code, stat_result=stat_result, headers=headers)
+
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
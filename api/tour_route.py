@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+import datetime
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+# --- RUTA DE GIRA POR ARTISTA ---
+# Ordena los conciertos de un artista en una ruta de viaje corta sin
+# perder de vista el calendario. El costo de ir del concierto i al j es
+#     distancia_km(i, j) + peso_fechas * días que se retrocede en el tiempo
+# (0 si j es posterior a i), así que con peso_fechas alto la ruta sigue el
+# orden cronológico y con 0 es la ruta geográfica más corta.
+# Heurística: vecino más cercano desde el primer concierto y después 2-opt.
+# Todo el trabajo por iteración está vectorizado con NumPy: la matriz de
+# distancias (haversine) se calcula de una vez y cada pasada de 2-opt evalúa
+# todos los pares (i, j) con operaciones sobre matrices.
+
+RADIO_TIERRA_KM = 6371.0088
+PESO_FECHAS_DEFAULT = 100.0  # km de penalización por cada día que se retrocede
+MAX_PASADAS_2OPT = 1000
+TOLERANCIA = 1e-9
+
+
+def distance_matrix(latitudes: Sequence[float], longitudes: Sequence[float]) -> np.ndarray:
+    """Matriz n x n de distancias haversine en km entre todos los puntos."""
+    lat = np.radians(np.asarray(latitudes, dtype=np.float64))
+    lon = np.radians(np.asarray(longitudes, dtype=np.float64))
+    dlat = lat[:, None] - lat[None, :]
+    dlon = lon[:, None] - lon[None, :]
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat)[:, None] * np.cos(lat)[None, :] * np.sin(dlon / 2) ** 2
+    return 2 * RADIO_TIERRA_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def _dias(fecha: str) -> float:
+    """'2025-11-20T20:00:00Z' -> días desde la época (con fracción)."""
+    valor = datetime.datetime.fromisoformat(fecha.replace("Z", "+00:00"))
+    if valor.tzinfo is None:
+        valor = valor.replace(tzinfo=datetime.timezone.utc)
+    return valor.timestamp() / 86400.0
+
+
+def cost_matrix(distancias: np.ndarray, dias: np.ndarray, peso_fechas: float) -> np.ndarray:
+    """Costo asimétrico: distancia más la penalización por retroceder en el calendario."""
+    retroceso = np.maximum(dias[:, None] - dias[None, :], 0.0)
+    return distancias + peso_fechas * retroceso
+
+
+def nearest_neighbour(costos: np.ndarray, inicio: int) -> np.ndarray:
+    """Ruta abierta que siempre va al destino pendiente más barato."""
+    n = len(costos)
+    ruta = np.empty(n, dtype=np.intp)
+    visitado = np.zeros(n, dtype=bool)
+    actual = inicio
+    for paso in range(n):
+        ruta[paso] = actual
+        visitado[actual] = True
+        if paso < n - 1:
+            fila = np.where(visitado, np.inf, costos[actual])
+            actual = int(np.argmin(fila))
+    return ruta
+
+
+def two_opt(costos: np.ndarray, ruta: np.ndarray, max_pasadas: int = MAX_PASADAS_2OPT) -> np.ndarray:
+    """
+    Mejora una ruta abierta invirtiendo tramos (2-opt). El costo es
+    asimétrico, así que invertir ruta[i..j] también cambia el costo de las
+    aristas internas; se obtiene en O(1) por par con sumas prefijas de las
+    aristas en sentido directo e inverso. Cada pasada evalúa todos los pares
+    a la vez y aplica juntas las mejores inversiones que no se tocan (sus
+    ahorros se suman), lo que reduce mucho el número de pasadas.
+    """
+    n = len(ruta)
+    if n < 3:
+        return ruta
+    # Nodo virtual n con costo 0 en ambos extremos: así el primer y el último
+    # tramo también pueden invertirse sin casos especiales.
+    extendida = np.zeros((n + 1, n + 1))
+    extendida[:n, :n] = costos
+    invalidos = np.tri(n, dtype=bool)  # solo pares i < j
+
+    ruta = ruta.copy()
+    for _ in range(max_pasadas):
+        p = np.concatenate(([n], ruta, [n]))
+        directo = extendida[p[:-1], p[1:]]   # costo de p[k] -> p[k+1]
+        inverso = extendida[p[1:], p[:-1]]   # costo de p[k+1] -> p[k]
+        pref_directo = np.concatenate(([0.0], np.cumsum(directo)))
+        pref_inverso = np.concatenate(([0.0], np.cumsum(inverso)))
+        interno = pref_inverso - pref_directo
+
+        # Invertir p[i..j] (1 <= i < j <= n): cambian las aristas de los
+        # bordes y el sentido de las internas (de i a j-1). Con la matriz
+        # reordenada según la ruta, cada término es una rebanada n x n.
+        m = extendida[p[:, None], p[None, :]]
+        delta = (m[:-2, 1:-1] + m[1:-1, 2:]
+                 - directo[:-1, None] - directo[None, 1:]
+                 + interno[None, 1:-1] - interno[1:-1, None])
+        delta[invalidos] = np.inf
+
+        # La mejor inversión de cada i; se aplican de la más a la menos
+        # ventajosa mientras no compartan posiciones ni aristas de borde.
+        mejores_j = np.argmin(delta, axis=1)
+        ahorro = delta[np.arange(n), mejores_j]
+        candidatos = np.flatnonzero(ahorro < -TOLERANCIA)
+        if not len(candidatos):
+            break
+        ocupado = np.zeros(n + 2, dtype=bool)
+        for fila in candidatos[np.argsort(ahorro[candidatos])]:
+            ini, fin = fila + 1, mejores_j[fila] + 1  # posiciones en p
+            if ocupado[ini - 1:fin + 2].any():
+                continue
+            ocupado[ini:fin + 1] = True
+            ruta[ini - 1:fin] = ruta[ini - 1:fin][::-1]
+    return ruta
+
+
+def plan_route(conciertos: List[Dict[str, Any]], peso_fechas: float = PESO_FECHAS_DEFAULT) -> Dict[str, Any]:
+    """
+    Ordena los conciertos (con 'id', 'fecha', 'latitud' y 'longitud') y
+    devuelve las paradas con la distancia de cada tramo, la distancia total
+    y, para comparar, la distancia recorriendo en orden cronológico.
+    Los conciertos sin coordenadas no entran en la ruta ('sin_coordenadas').
+    """
+    con_coordenadas = [c for c in conciertos if c["latitud"] is not None and c["longitud"] is not None]
+    sin_coordenadas = [c["id"] for c in conciertos if c["latitud"] is None or c["longitud"] is None]
+    con_coordenadas.sort(key=lambda c: (c["fecha"], c["id"]))
+    n = len(con_coordenadas)
+
+    paradas: List[Dict[str, Any]] = []
+    distancia_total = distancia_cronologica = 0.0
+    retrocesos = 0
+    if n:
+        distancias = distance_matrix([c["latitud"] for c in con_coordenadas],
+                                     [c["longitud"] for c in con_coordenadas])
+        dias = np.array([_dias(c["fecha"]) for c in con_coordenadas])
+        costos = cost_matrix(distancias, dias, peso_fechas)
+        # Se parte del primer concierto del calendario (índice 0).
+        ruta = two_opt(costos, nearest_neighbour(costos, 0))
+
+        tramos = np.concatenate(([0.0], distancias[ruta[:-1], ruta[1:]]))
+        distancia_total = float(tramos.sum())
+        distancia_cronologica = float(np.diagonal(distancias, 1).sum())
+        retrocesos = int(np.count_nonzero(dias[ruta[1:]] < dias[ruta[:-1]]))
+        for orden, (k, tramo) in enumerate(zip(ruta.tolist(), tramos.tolist()), start=1):
+            paradas.append({**con_coordenadas[k], "orden": orden, "distancia_km": round(tramo, 1)})
+
+    return {
+        "peso_fechas": peso_fechas,
+        "paradas": paradas,
+        "distancia_total_km": round(distancia_total, 1),
+        "distancia_cronologica_km": round(distancia_cronologica, 1),
+        "retrocesos": retrocesos,
+        "sin_coordenadas": sin_coordenadas,
+    }
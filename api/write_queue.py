@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, InvalidStateError, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, List, Optional, Tuple
+
+# --- ESCRITOR ÚNICO CON COMMIT AGRUPADO (GROUP COMMIT) ---
+# SQLite solo admite un escritor a la vez. Si cada handler abre su propia
+# conexión y hace COMMIT por fila, las escrituras concurrentes se serializan
+# en el fsync y terminan en errores "database is locked".
+# Este módulo concentra TODAS las escrituras en un solo hilo: los handlers
+# encolan operaciones y reciben un Future; el hilo las agrupa en una sola
+# transacción (un solo fsync) dentro de una ventana de latencia acotada.
+
+# Una operación recibe el cursor del escritor y devuelve su resultado
+# (normalmente cursor.lastrowid o cursor.rowcount).
+Operacion = Callable[[sqlite3.Cursor], Any]
+
+# Marcador para indicar al hilo escritor que debe terminar.
+_DETENER = object()
+
+
+def _fallar(future: Future, error: BaseException) -> None:
+    """Resuelve el Future con el error, salvo que ya esté resuelto o cancelado."""
+    if not future.done():
+        try:
+            future.set_exception(error)
+        except InvalidStateError:
+            pass
+
+
+class WriteQueue:
+    """
+    Cola de escritura atendida por un único hilo.
+    Cada operación se ejecuta dentro de un SAVEPOINT propio, de modo que si
+    una falla (ej. FOREIGN KEY) solo se revierte esa operación y su Future
+    recibe la excepción; el resto del lote se confirma normalmente.
+    Si el hilo muere (ej. no puede abrir la conexión), las operaciones
+    pendientes reciben el error y la siguiente operación arranca otro hilo.
+    """
+
+    def __init__(self, connect: Callable[[], sqlite3.Connection],
+                 max_batch: int = 64, max_latency: float = 0.005, max_wait: float = 30.0):
+        self._connect = connect          # Fábrica de la conexión de escritura
+        self._max_batch = max_batch      # Máximo de operaciones por transacción
+        self._max_latency = max_latency  # Ventana (segundos) para juntar operaciones
+        self._max_wait = max_wait        # Segundos máximos que execute() espera un resultado
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        # Métricas simples del escritor
+        self.batches = 0
+        self.operations = 0
+
+    # --- Ciclo de vida ---
+
+    def start(self) -> None:
+        """Arranca el hilo escritor (idempotente)."""
+        with self._lock:
+            self._start_locked()
+
+    def _start_locked(self) -> None:
+        # Llamar con el candado tomado.
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name="sqlite-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """
+        Detiene el hilo escritor. Las operaciones ya encoladas se
+        procesan antes de terminar.
+        """
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is None:
+            return
+        self._queue.put(_DETENER)
+        thread.join(timeout)
+
+    # --- API para los handlers ---
+
+    def submit(self, operation: Operacion) -> Future:
+        """Encola una operación de escritura y devuelve su Future."""
+        future: Future = Future()
+        # Con el candado: si el hilo acaba de morir, esta operación no puede
+        # quedar en la cola de un hilo que ya no la va a atender.
+        with self._lock:
+            self._start_locked()
+            self._queue.put((operation, future))
+        return future
+
+    def execute(self, operation: Operacion, timeout: Optional[float] = None) -> Any:
+        """
+        Encola una operación y espera su resultado, como mucho 'timeout'
+        segundos (por defecto max_wait). Las excepciones de la BD (ej.
+        sqlite3.IntegrityError) se relanzan en el hilo que llama, igual que
+        con una conexión propia. Si se agota la espera y la operación aún no
+        empezó, se cancela y se lanza sqlite3.OperationalError; si ya empezó
+        se sigue esperando, porque su lote se va a confirmar igual y quien
+        llama necesita el resultado (ej. para ajustar sus cachés).
+        """
+        espera = self._max_wait if timeout is None else timeout
+        future = self.submit(operation)
+        try:
+            return future.result(espera)
+        except FutureTimeoutError:
+            if future.cancel():
+                raise sqlite3.OperationalError(f"El escritor no respondió en {espera} s")
+            return future.result()
+
+    # --- Hilo escritor ---
+
+    def _collect_batch(self, first: Any) -> Tuple[List[Tuple[Operacion, Future]], bool]:
+        """
+        Junta operaciones a partir de la primera recibida hasta llenar el
+        lote o agotar la ventana de latencia. Devuelve el lote y si se
+        recibió la señal de detener.
+        """
+        batch = [first]
+        deadline = time.monotonic() + self._max_latency
+        while len(batch) < self._max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _DETENER:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run_batch(self, conn: sqlite3.Connection, batch: List[Tuple[Operacion, Future]]) -> None:
+        """Ejecuta un lote en una sola transacción y resuelve los Futures."""
+        # Descarta las operaciones cuyo llamador ya se rindió (cancel()).
+        batch = [(op, fut) for op, fut in batch if fut.set_running_or_notify_cancel()]
+        if not batch:
+            return
+
+        results: List[Tuple[Future, bool, Any]] = []
+        cursor = conn.cursor()
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            for operation, future in batch:
+                cursor.execute("SAVEPOINT operacion")
+                try:
+                    value = operation(cursor)
+                except Exception as e:
+                    cursor.execute("ROLLBACK TO operacion")
+                    cursor.execute("RELEASE operacion")
+                    results.append((future, False, e))
+                else:
+                    cursor.execute("RELEASE operacion")
+                    results.append((future, True, value))
+            cursor.execute("COMMIT")
+        except Exception as e:
+            # Si falla el BEGIN o el COMMIT, todo el lote se considera fallido.
+            if conn.in_transaction:
+                conn.rollback()
+            for _, future in batch:
+                _fallar(future, e)
+            return
+
+        self.batches += 1
+        self.operations += len(batch)
+        # Los Futures se resuelven DESPUÉS del COMMIT: quien espera ve datos ya persistidos.
+        for future, ok, value in results:
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+
+    def _run(self) -> None:
+        conn = None
+        batch: List[Tuple[Operacion, Future]] = []
+        try:
+            conn = self._connect()
+            # Control manual de transacciones (BEGIN/COMMIT explícitos).
+            conn.isolation_level = None
+            while True:
+                first = self._queue.get()
+                if first is _DETENER:
+                    break
+                batch, stop = self._collect_batch(first)
+                self._run_batch(conn, batch)
+                if stop:
+                    break
+        except Exception as e:
+            # Falla fuera de un lote (ej. no se pudo abrir la conexión): el
+            # hilo termina, así que nadie atendería la cola. Se falla el lote
+            # en curso y todo lo encolado; la próxima operación arranca otro hilo.
+            print(f"❌ Error en el hilo escritor: {e}")
+            with self._lock:
+                if self._thread is threading.current_thread():
+                    self._thread = None
+                pendientes = []
+                while True:
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is not _DETENER:
+                        pendientes.append(item)
+            for _, future in batch + pendientes:
+                _fallar(future, e)
+        finally:
+            if conn is not None:
+                conn.close()
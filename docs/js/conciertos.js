@@ -37,6 +37,9 @@ let markerLayer = L.layerGroup().addTo(map);
 // guardamos todos los artistas que cargamos para no volver a pedir
 let artistasCache = [];
 
+// copia local sincronizada con /api/cambios (null si no está disponible)
+let copiaLocal = null;
+
 
 // formatea fechas ISO a algo más legible
 function formatearFecha(iso) {
@@ -64,6 +67,17 @@ function renderStatusBadge(status) {
 // Cargar artistas (con paginación)
 
 async function cargarArtistas() {
+    try {
+        // Copia local al día: solo se descarga lo que cambió (ver sync.js)
+        copiaLocal = await sincronizarDatos();
+        artistasCache = artistasOrdenados(copiaLocal);
+        popularDropdownArtistas(artistasCache);
+        return;
+    } catch (err) {
+        console.warn("Sincronización incremental no disponible, se usan los listados paginados:", err);
+        copiaLocal = null;
+    }
+
     let page = 1;
     let allArtists = [];
     let hasNext = true;
@@ -148,6 +162,10 @@ function renderArtistaCard({ nombre, imagen, pais, popularidad, bio }) {
 // Cargar conciertos por artista
 
 async function cargarConciertosPorArtista(artistaId) {
+    if (copiaLocal) {
+        return conciertosDeArtista(copiaLocal, artistaId);
+    }
+
     let page = 1;
     let allConcerts = [];
     let hasNext = true;
@@ -0,0 +1,74 @@
+const URL_CAMBIOS = "http://127.0.0.1:8000/api/cambios/";
+
+// SINCRONIZACIÓN INCREMENTAL DE ARTISTAS Y CONCIERTOS
+// Guardamos una copia local (localStorage) de artistas y conciertos con la
+// última versión recibida. En cada visita solo pedimos a /api/cambios lo que
+// cambió desde esa versión, en lugar de volver a descargar todas las páginas.
+
+const SYNC_STORAGE_KEY = "pp-sync";
+const SYNC_LIMIT = 500;
+
+function copiaVacia() {
+    return { version: 0, artistas: {}, conciertos: {} };
+}
+
+function leerCopiaLocal() {
+    try {
+        const guardada = JSON.parse(localStorage.getItem(SYNC_STORAGE_KEY));
+        if (guardada && typeof guardada.version === "number") return guardada;
+    } catch (error) {
+        console.warn("Copia local inválida, se sincroniza desde cero:", error);
+    }
+    return copiaVacia();
+}
+
+function guardarCopiaLocal(copia) {
+    try {
+        localStorage.setItem(SYNC_STORAGE_KEY, JSON.stringify(copia));
+    } catch (error) {
+        // Sin espacio en localStorage: la copia sigue sirviendo en esta visita.
+        console.warn("No se pudo guardar la copia local:", error);
+    }
+}
+
+// Trae los cambios pendientes y devuelve la copia local actualizada.
+// Si la petición falla, lanza el error (el llamador decide el respaldo).
+async function sincronizarDatos() {
+    let copia = leerCopiaLocal();
+    let hayMas = true;
+
+    while (hayMas) {
+        const res = await fetch(`${URL_CAMBIOS}?desde=${copia.version}&limit=${SYNC_LIMIT}`);
+        if (!res.ok) throw new Error(`HTTP ${res.status} en /api/cambios`);
+        const { data } = await res.json();
+
+        if (data.reiniciar) {
+            // La BD del servidor se reinició: la copia local ya no sirve.
+            copia = copiaVacia();
+            continue;
+        }
+
+        data.artistas.forEach(a => { copia.artistas[a.id] = a; });
+        data.conciertos.forEach(c => { copia.conciertos[c.id] = c; });
+        copia.version = data.version;
+        hayMas = data.hay_mas;
+    }
+
+    guardarCopiaLocal(copia);
+    return copia;
+}
+
+// Artistas de la copia en el mismo orden que GET /api/artistas
+// (popularidad descendente, empate por ID).
+function artistasOrdenados(copia) {
+    return Object.values(copia.artistas).sort((a, b) =>
+        (b.popularidad ?? -1) - (a.popularidad ?? -1) || a.id - b.id
+    );
+}
+
+// Conciertos de un artista, del más reciente al más antiguo (como GET /api/conciertos).
+function conciertosDeArtista(copia, artistaId) {
+    return Object.values(copia.conciertos)
+        .filter(c => String(c.artista_id) === String(artistaId))
+        .sort((a, b) => b.fecha.localeCompare(a.fecha) || b.id - a.id);
+}
@@ -1,5 +1,6 @@
 const URL_ARTISTAS_BASE = "http://127.0.0.1:8000/api/artistas";
 const URL_STATS = "http://127.0.0.1:8000/api/estadisticas/";
+const URL_STATS_WS = "ws://127.0.0.1:8000/ws/estadisticas";
 
 // REFERENCIAS DEL DOM 
 const selectArtista = document.getElementById("selectArtista");
@@ -43,24 +44,37 @@ let chart1, chart2;
 window.artistasData = []; // Arreglo global para guardar todos los artistas
 
 // CARGAR TODOS LOS ARTISTAS CON PAGINACIÓN
+// (respaldo si /api/cambios no está disponible)
 
-async function cargarArtistas() {
+async function descargarArtistas() {
     let allArtists = [];
     let currentPage = 1;
     let hasNext = true;
 
-    try {
-        // Bucle para recorrer todas las páginas
-        while (hasNext) {
-            const response = await fetch(`${URL_ARTISTAS_BASE}?page=${currentPage}&limit=20`);
-            const data = await response.json();
+    // Bucle para recorrer todas las páginas
+    while (hasNext) {
+        const response = await fetch(`${URL_ARTISTAS_BASE}?page=${currentPage}&limit=20`);
+        const data = await response.json();
 
-            if (data.success && Array.isArray(data.data)) {
-                allArtists = allArtists.concat(data.data);
-            }
+        if (data.success && Array.isArray(data.data)) {
+            allArtists = allArtists.concat(data.data);
+        }
+
+        hasNext = data.pagination?.has_next || false;
+        currentPage++;
+    }
+    return allArtists;
+}
 
-            hasNext = data.pagination?.has_next || false;
-            currentPage++;
+async function cargarArtistas() {
+    try {
+        let allArtists;
+        try {
+            // Copia local al día: solo se descarga lo que cambió (ver sync.js)
+            allArtists = artistasOrdenados(await sincronizarDatos());
+        } catch (syncError) {
+            console.warn("Sincronización incremental no disponible:", syncError);
+            allArtists = await descargarArtistas();
         }
 
         // Guarda todos los artistas globalmente
@@ -110,6 +124,8 @@ selectArtista.addEventListener("change", () => {
 
 // OBTENER Y GRAFICAR ESTADÍSTICAS GLOBALES
 
+let estadisticasActuales = null; // Último payload recibido (completo + deltas aplicados)
+
 async function cargarEstadisticas() {
     try {
         const res = await fetch(URL_STATS);
@@ -117,8 +133,57 @@ async function cargarEstadisticas() {
 
         if (!json.success || !json.data) throw new Error("Error al obtener estadísticas");
 
-        const data = json.data;
+        estadisticasActuales = json.data;
+        renderEstadisticas(estadisticasActuales);
+        console.log("Estadísticas cargadas correctamente");
+    } catch (error) {
+        console.error("Error al cargar estadísticas:", error);
+    }
+}
+
+// Aplica un delta del servidor sobre el payload local (los objetos se mezclan, el resto se reemplaza)
+function aplicarDelta(destino, delta) {
+    for (const [clave, valor] of Object.entries(delta)) {
+        const esObjeto = valor && typeof valor === "object" && !Array.isArray(valor);
+        if (esObjeto && destino[clave] && typeof destino[clave] === "object") {
+            aplicarDelta(destino[clave], valor);
+        } else {
+            destino[clave] = valor;
+        }
+    }
+}
 
+// SUSCRIPCIÓN EN VIVO: el servidor envía el estado completo al conectar y luego solo los cambios
+function suscribirEstadisticas(intento = 0) {
+    let abierto = false;
+    const ws = new WebSocket(URL_STATS_WS);
+
+    ws.addEventListener("open", () => {
+        abierto = true;
+        intento = 0;
+    });
+
+    ws.addEventListener("message", (event) => {
+        const mensaje = JSON.parse(event.data);
+        if (mensaje.tipo === "completo" || !estadisticasActuales) {
+            estadisticasActuales = mensaje.data;
+        } else {
+            aplicarDelta(estadisticasActuales, mensaje.data);
+        }
+        renderEstadisticas(estadisticasActuales);
+    });
+
+    ws.addEventListener("close", () => {
+        // Si nunca se pudo abrir, se cargan las estadísticas una vez por HTTP
+        if (!abierto && intento === 0) cargarEstadisticas();
+        // Reintento con espera creciente (máximo 30 s)
+        const espera = Math.min(30000, 1000 * 2 ** intento);
+        setTimeout(() => suscribirEstadisticas(intento + 1), espera);
+    });
+}
+
+function renderEstadisticas(data) {
+    try {
         // Gráfica 1: Popularidad de los artistas 
         const artistasTop = data.grafica_top_artistas;
         const nombres = artistasTop.map(a => a.nombre);
@@ -213,9 +278,8 @@ async function cargarEstadisticas() {
             }
         });
 
-        console.log("Estadísticas cargadas correctamente");
     } catch (error) {
-        console.error("Error al cargar estadísticas:", error);
+        console.error("Error al graficar estadísticas:", error);
     }
 }
 
@@ -225,5 +289,5 @@ async function cargarEstadisticas() {
 document.addEventListener("DOMContentLoaded", async () => {
     initTheme();
     await cargarArtistas();
-    await cargarEstadisticas();
+    suscribirEstadisticas();
 });
@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+
+import pytest
+
+# Las pruebas importan el paquete 'api' desde la raíz del repositorio.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api import init_db, models  # noqa: E402
+from api.settings import Settings  # noqa: E402
+
+
+@pytest.fixture
+def bd_memoria(request):
+    """
+    BD en memoria con el schema de schema.sql y los datos de ejemplo, activa
+    como configuración del proceso mientras dura la prueba.
+    """
+    settings = Settings.memory(f"prueba_{request.node.name}")
+    models.configure(settings)
+    init_db.init_db(settings)
+    init_db.seed_db(settings)
+    yield settings
+    models.shutdown_writer()
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+import time
+
+import pytest
+
+from api import backup
+
+
+def _esperar(backup_id, settings, plazo=10.0):
+    limite = time.monotonic() + plazo
+    while time.monotonic() < limite:
+        estado = backup.get_backup_status(backup_id, settings)
+        if estado and estado["estado"] != "en_curso":
+            return estado
+        time.sleep(0.02)
+    raise AssertionError(f"El backup {backup_id} no terminó")
+
+
+def test_error_al_preparar_el_backup_libera_el_candado(bd_memoria, tmp_path):
+    archivo = tmp_path / "no_es_carpeta"
+    archivo.write_text("")
+    with pytest.raises(OSError):
+        backup.start_backup(bd_memoria.replace(backup_dir=str(archivo / "backups")))
+
+    settings = bd_memoria.replace(backup_dir=str(tmp_path / "backups"))
+    estado = backup.start_backup(settings, comprimir=False)
+    assert estado is not None
+    assert _esperar(estado["id"], settings)["estado"] == "completado"
+
+
+def test_backups_seguidos_tienen_ids_distintos(bd_memoria, tmp_path):
+    settings = bd_memoria.replace(backup_dir=str(tmp_path))
+    primero = backup.start_backup(settings, comprimir=False)
+    _esperar(primero["id"], settings)
+    segundo = backup.start_backup(settings, comprimir=False)
+    _esperar(segundo["id"], settings)
+
+    assert primero["id"] != segundo["id"]
+    assert [b["id"] for b in backup.list_backups(settings)] == [segundo["id"], primero["id"]]
+    assert all(b["estado"] == "completado" for b in backup.list_backups(settings))
+
+
+def test_error_inesperado_termina_el_backup(bd_memoria, tmp_path, monkeypatch):
+    def fallar(*args, **kwargs):
+        raise ValueError("inesperado")
+
+    monkeypatch.setattr(backup, "backup_database", fallar)
+    settings = bd_memoria.replace(backup_dir=str(tmp_path))
+    estado = _esperar(backup.start_backup(settings)["id"], settings)
+    assert estado["estado"] == "error"
+    assert estado["error"] == "inesperado"
+    siguiente = backup.start_backup(settings, comprimir=False)
+    assert siguiente is not None
+    _esperar(siguiente["id"], settings)
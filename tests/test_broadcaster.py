@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import time
+
+from api import broadcaster
+from api.broadcaster import StatsBroadcaster
+
+
+def _mensajes(queue):
+    mensajes = []
+    while not queue.empty():
+        mensajes.append(queue.get_nowait())
+    return mensajes
+
+
+def test_aviso_durante_el_recalculo_no_se_pierde():
+    estado = {"n": 0}
+
+    def compute():
+        valor = estado["n"]
+        time.sleep(0.2)
+        return {"n": valor}
+
+    async def escenario():
+        difusor = StatsBroadcaster(compute, debounce=0.01)
+        difusor.start()
+        queue = await difusor.subscribe()
+        estado["n"] = 1
+        difusor.notify()
+        await asyncio.sleep(0.1)  # El recálculo ya leyó n=1
+        estado["n"] = 2
+        difusor.notify()
+        await asyncio.sleep(0.8)
+        difusor.stop()
+        return _mensajes(queue)
+
+    mensajes = asyncio.run(escenario())
+    assert mensajes[-1] == {"tipo": "delta", "data": {"n": 2}}
+
+
+def test_recalculo_fallido_se_reintenta(monkeypatch):
+    monkeypatch.setattr(broadcaster, "REINTENTO_INICIAL", 0.01)
+    estado = {"n": 0, "fallos": 1}
+
+    def compute():
+        if estado["n"] and estado["fallos"]:
+            estado["fallos"] -= 1
+            raise RuntimeError("BD no disponible")
+        return {"n": estado["n"]}
+
+    async def escenario():
+        difusor = StatsBroadcaster(compute, debounce=0.01)
+        difusor.start()
+        queue = await difusor.subscribe()
+        estado["n"] = 1
+        difusor.notify()  # Sin más escrituras: solo el reintento puede enviar el delta
+        await asyncio.sleep(0.3)
+        difusor.stop()
+        return _mensajes(queue)
+
+    mensajes = asyncio.run(escenario())
+    assert mensajes[-1] == {"tipo": "delta", "data": {"n": 1}}
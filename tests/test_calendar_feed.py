@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+from api import models
+
+
+def test_etag_estable_entre_regeneraciones(bd_memoria):
+    # Otro worker (o la misma caché vaciada) genera exactamente el mismo archivo.
+    contenido, etag = models.get_calendario_artista(1)
+    models.calendarios.clear()
+    assert models.get_calendario_artista(1) == (contenido, etag)
+    assert "DTSTAMP:" in contenido
+
+
+def test_etag_cambia_con_los_datos(bd_memoria):
+    _, etag = models.get_calendario_artista(1)
+    models.update_concierto_in_db(1, {'status': 'Cancelado'})
+    contenido, nuevo = models.get_calendario_artista(1)
+    assert nuevo != etag
+    assert "STATUS:CANCELLED" in contenido
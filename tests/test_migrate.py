@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+import sqlite3
+
+import pytest
+
+from api import init_db
+from api.settings import Settings
+
+# Schema original: venue, ciudad y país como texto en cada concierto.
+SCHEMA_ORIGINAL = """
+CREATE TABLE artistas (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    nombre TEXT NOT NULL,
+    genero TEXT NOT NULL,
+    pais TEXT NOT NULL,
+    popularidad INTEGER DEFAULT 50,
+    imagen_url TEXT,
+    biografia TEXT
+);
+CREATE TABLE conciertos (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    artista_id INTEGER NOT NULL,
+    nombre_evento TEXT NOT NULL,
+    venue TEXT NOT NULL,
+    ciudad TEXT NOT NULL,
+    pais TEXT NOT NULL,
+    fecha TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'Planeado',
+    asistencia_proyectada INTEGER,
+    asistencia_real INTEGER,
+    costos_produccion INTEGER,
+    ingresos_taquilla INTEGER,
+    latitud REAL,
+    longitud REAL,
+    FOREIGN KEY (artista_id) REFERENCES artistas (id)
+);
+"""
+
+# (id, venue, ciudad, país, latitud, longitud): el mismo venue aparece con
+# coordenadas distintas (y sin coordenadas), y hay dos "Valencia" en países distintos.
+CONCIERTOS = [
+    (1, "Foro Sol", "Ciudad de México", "México", 19.4048, -99.0907),
+    (2, "Foro Sol", "Ciudad de México", "México", 19.4050, -99.0910),
+    (3, "Foro Sol", "Ciudad de México", "México", None, None),
+    (4, "Palacio de los Deportes", "Ciudad de México", "México", 19.4036, -99.0975),
+    (5, "Auditorio", "Valencia", "España", 39.4699, -0.3763),
+    (6, "Auditorio", "Valencia", "Venezuela", 10.1620, -68.0077),
+    (7, "Movistar Arena", "Bogotá", "Colombia", None, None),
+    (9, "Movistar Arena", "Bogotá", "Colombia", 4.6486, -74.0775),
+]
+
+
+@pytest.fixture
+def bd_original(tmp_path):
+    """Archivo con el schema original y algunos conciertos (la ID 8 se borró)."""
+    ruta = tmp_path / "original.db"
+    conn = sqlite3.connect(ruta)
+    try:
+        conn.executescript(SCHEMA_ORIGINAL)
+        conn.execute("INSERT INTO artistas (id, nombre, genero, pais) VALUES (1, 'Artista', 'Rock', 'México')")
+        conn.executemany(
+            "INSERT INTO conciertos (id, artista_id, nombre_evento, venue, ciudad, pais, fecha, latitud, longitud) "
+            "VALUES (?, 1, 'Gira', ?, ?, ?, '2025-11-20T20:00:00Z', ?, ?)",
+            [(i, venue, ciudad, pais, lat, lon) for i, venue, ciudad, pais, lat, lon in CONCIERTOS],
+        )
+        conn.execute("UPDATE sqlite_sequence SET seq = 10 WHERE name = 'conciertos'")
+        conn.commit()
+    finally:
+        conn.close()
+    return Settings(db_path=str(ruta))
+
+
+def _consultar(settings, sql):
+    conn = sqlite3.connect(settings.database_file)
+    try:
+        return conn.execute(sql).fetchall()
+    finally:
+        conn.close()
+
+
+def test_migracion_conserva_los_conciertos(bd_original):
+    assert init_db.migrate_db(bd_original)
+
+    assert _consultar(bd_original, "SELECT COUNT(*) FROM artistas") == [(1,)]
+    assert _consultar(bd_original, """
+        SELECT id, venue, ciudad, pais, latitud, longitud FROM conciertos_detalle ORDER BY id
+    """) == CONCIERTOS
+    assert _consultar(bd_original, "SELECT seq FROM sqlite_sequence WHERE name = 'conciertos'") == [(10,)]
+
+
+def test_migracion_deduplica_venues_y_ciudades(bd_original):
+    init_db.migrate_db(bd_original)
+
+    assert _consultar(bd_original, "SELECT nombre, pais FROM ciudades ORDER BY id") == [
+        ("Ciudad de México", "México"), ("Valencia", "España"),
+        ("Valencia", "Venezuela"), ("Bogotá", "Colombia"),
+    ]
+    # Cada venue toma las coordenadas del primer concierto que las tiene.
+    assert _consultar(bd_original, """
+        SELECT v.nombre, ci.nombre, ci.pais, v.latitud, v.longitud
+        FROM venues v JOIN ciudades ci ON ci.id = v.ciudad_id ORDER BY v.nombre, ci.pais
+    """) == [
+        ("Auditorio", "Valencia", "España", 39.4699, -0.3763),
+        ("Auditorio", "Valencia", "Venezuela", 10.1620, -68.0077),
+        ("Foro Sol", "Ciudad de México", "México", 19.4048, -99.0907),
+        ("Movistar Arena", "Bogotá", "Colombia", 4.6486, -74.0775),
+        ("Palacio de los Deportes", "Ciudad de México", "México", 19.4036, -99.0975),
+    ]
+
+
+def test_migracion_es_idempotente(bd_original):
+    assert init_db.migrate_db(bd_original)
+    antes = _consultar(bd_original, "SELECT * FROM conciertos_detalle ORDER BY id")
+    esquema = _consultar(bd_original, "SELECT type, name, sql FROM sqlite_master ORDER BY name")
+
+    assert init_db.migrate_db(bd_original) == []
+    assert _consultar(bd_original, "SELECT * FROM conciertos_detalle ORDER BY id") == antes
+    assert _consultar(bd_original, "SELECT type, name, sql FROM sqlite_master ORDER BY name") == esquema
+    assert _consultar(bd_original, "SELECT COUNT(*) FROM cambios") == [(1 + len(CONCIERTOS),)]
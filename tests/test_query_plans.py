@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from api import models
+
+ORDENA = 'USE TEMP B-TREE FOR ORDER BY'
+
+# Combinaciones cuyo índice ya entrega las filas en el orden pedido: el
+# listado se corta en LIMIT sin leer ni ordenar el resto de las filas.
+SIN_ORDENAR = [
+    ({}, 'fecha'),
+    ({}, 'ingresos_taquilla'),
+    ({}, 'asistencia_real'),
+    ({'artista_id': 1}, 'fecha'),
+    ({'status': 'Confirmado'}, 'fecha'),
+    ({'venue_ids': [1]}, 'fecha'),
+    ({'ingresos_min': 1000}, 'ingresos_taquilla'),
+    ({'ingresos_min': 1000, 'ingresos_max': 5000}, 'ingresos_taquilla'),
+    ({'asistencia_max': 20000}, 'asistencia_real'),
+    ({'status': 'Confirmado', 'ingresos_min': 1000}, 'fecha'),
+    ({'artista_id': 1, 'status': 'Confirmado', 'venue_ids': [1]}, 'fecha'),
+]
+
+# Filtros por rango con otro orden: sin INDEXED BY, SQLite recorre entero el
+# índice del orden y descarta fila por fila en lugar de buscar el rango.
+RANGO_CON_OTRO_ORDEN = [
+    ({'ingresos_min': 1000}, 'fecha'),
+    ({'ingresos_min': 1000}, 'asistencia_real'),
+    ({'asistencia_max': 20000}, 'fecha'),
+    ({'asistencia_max': 20000}, 'ingresos_taquilla'),
+]
+
+
+def _plan(sql, params):
+    conn = None
+    try:
+        conn = models.get_read_connection()
+        return [row['detail'] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+    finally:
+        if conn: conn.close()
+
+
+def _paso_conciertos(plan):
+    return next(paso for paso in plan if paso.startswith(('SCAN c ', 'SEARCH c ')))
+
+
+def test_listado_de_conciertos_siempre_usa_indice(bd_memoria):
+    # Ninguna combinación de filtros y orden puede terminar en 'SCAN c' sin índice.
+    assert models.verify_conciertos_query_plans() == []
+
+
+@pytest.mark.parametrize('descendente', [True, False])
+@pytest.mark.parametrize('filtro, orden', SIN_ORDENAR)
+def test_indice_entrega_el_orden(bd_memoria, filtro, orden, descendente):
+    query = models.ConciertoQuery(orden=orden, descendente=descendente, **filtro)
+    plan = _plan(*query.select_sql(10, 0))
+    assert ORDENA not in plan, plan
+    # Con filtros, el índice busca las filas (SEARCH) en lugar de recorrerlas todas.
+    assert _paso_conciertos(plan).startswith('SEARCH c ' if filtro else 'SCAN c '), plan
+
+
+@pytest.mark.parametrize('filtro, orden', [
+    ({'artista_id': 1}, 'ingresos_taquilla'),
+    ({'status': 'Confirmado'}, 'asistencia_real'),
+    ({'venue_ids': [1, 2]}, 'fecha'),
+] + RANGO_CON_OTRO_ORDEN)
+def test_orden_distinto_al_indice_ordena_solo_las_filas_filtradas(bd_memoria, filtro, orden):
+    query = models.ConciertoQuery(orden=orden, **filtro)
+    plan = _plan(*query.select_sql(10, 0))
+    assert ORDENA in plan, plan
+    assert _paso_conciertos(plan).startswith('SEARCH c '), plan
+
+
+@pytest.mark.parametrize('filtro, orden', RANGO_CON_OTRO_ORDEN)
+def test_sin_indexed_by_el_rango_no_usa_su_indice(bd_memoria, filtro, orden):
+    # Si SQLite empieza a elegir solo el índice del rango, INDEXED BY sobra.
+    query = models.ConciertoQuery(orden=orden, **filtro)
+    sql, params = query.select_sql(10, 0)
+    sin_hint = _plan(sql.replace(f" INDEXED BY {query.index()}", ""), params)
+    con_hint = _plan(sql, params)
+    assert _paso_conciertos(sin_hint).startswith('SCAN c '), sin_hint
+    assert _paso_conciertos(con_hint).startswith(f"SEARCH c USING INDEX {query.index()} ("), con_hint
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from api import models
+from api.write_queue import WriteQueue
+
+
+def _insertar(valor):
+    def operacion(cursor):
+        cursor.execute("INSERT INTO prueba (valor) VALUES (?)", (valor,))
+        return cursor.lastrowid
+    return operacion
+
+
+@pytest.fixture
+def escritor(bd_memoria):
+    """WriteQueue sobre la BD de la prueba que anota cada sentencia ejecutada."""
+    sentencias = []
+
+    def conectar():
+        conn = models.get_write_connection()
+        conn.set_trace_callback(sentencias.append)
+        return conn
+
+    cola = WriteQueue(conectar, max_latency=0.2)
+    cola.execute(lambda cursor: cursor.execute("CREATE TABLE prueba (valor INTEGER NOT NULL)"))
+    sentencias.clear()
+    yield cola, sentencias
+    cola.stop(5)
+
+
+def _valores(settings):
+    conn = settings.connect(read_only=True)
+    try:
+        return [fila[0] for fila in conn.execute("SELECT valor FROM prueba ORDER BY valor")]
+    finally:
+        conn.close()
+
+
+def test_operaciones_concurrentes_se_confirman_en_un_solo_commit(escritor, bd_memoria):
+    cola, sentencias = escritor
+    futures = [cola.submit(_insertar(i)) for i in range(10)]
+
+    assert [f.result(5) for f in futures] == list(range(1, 11))
+    assert sentencias.count("BEGIN IMMEDIATE") == 1
+    assert sentencias.count("COMMIT") == 1
+    assert (cola.batches, cola.operations) == (2, 11)  # Incluye el CREATE TABLE
+    assert _valores(bd_memoria) == list(range(10))
+
+
+def test_operacion_fallida_solo_revierte_su_savepoint(escritor, bd_memoria):
+    cola, _ = escritor
+
+    def fallar(cursor):
+        cursor.execute("INSERT INTO prueba (valor) VALUES (99)")
+        cursor.execute("INSERT INTO prueba (valor) VALUES (NULL)")
+
+    antes, mala, despues = cola.submit(_insertar(1)), cola.submit(fallar), cola.submit(_insertar(2))
+
+    assert antes.result(5) and despues.result(5)
+    with pytest.raises(sqlite3.IntegrityError):
+        mala.result(5)
+    assert _valores(bd_memoria) == [1, 2]
+
+
+def test_espera_agotada_devuelve_el_resultado_si_la_operacion_ya_empezo(escritor, bd_memoria):
+    cola, _ = escritor
+
+    def lenta(cursor):
+        time.sleep(0.5)
+        return _insertar(7)(cursor)
+
+    # La espera vence pasada la ventana de 0.2 s, con la operación ya en curso.
+    assert cola.execute(lenta, timeout=0.3)
+    assert _valores(bd_memoria) == [7]
+
+
+def test_espera_agotada_cancela_la_operacion_que_no_empezo(escritor, bd_memoria):
+    cola, _ = escritor
+    liberar = threading.Event()
+    bloqueo = cola.submit(lambda cursor: liberar.wait(5))
+    time.sleep(0.3)  # El primer lote ya está en curso y retiene al escritor
+
+    with pytest.raises(sqlite3.OperationalError):
+        cola.execute(_insertar(1), timeout=0.05)
+    liberar.set()
+    bloqueo.result(5)
+    assert _valores(bd_memoria) == []
+
+
+def test_si_el_hilo_muere_las_operaciones_pendientes_fallan(bd_memoria):
+    abrir = threading.Event()
+    intentos = []
+
+    def conectar():
+        intentos.append(1)
+        abrir.wait(5)
+        if len(intentos) == 1:
+            raise sqlite3.OperationalError("no se pudo abrir la BD")
+        return models.get_write_connection()
+
+    cola = WriteQueue(conectar)
+    try:
+        futures = [cola.submit(lambda cursor: cursor.execute("SELECT 1").fetchone()[0]) for _ in range(5)]
+        abrir.set()
+        for future in futures:
+            with pytest.raises(sqlite3.OperationalError, match="no se pudo abrir"):
+                future.result(5)
+
+        # La siguiente operación arranca otro hilo.
+        assert cola.execute(lambda cursor: cursor.execute("SELECT 1").fetchone()[0]) == 1
+        assert len(intentos) == 2
+    finally:
+        cola.stop(5)